@@ -164,6 +164,29 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Parse-result cache (see invoices/parse_cache.py)
+PARSE_CACHE_ENABLED = True
+PARSE_CACHE_MAX_ENTRIES = 2000
+PARSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+PARSE_CACHE_EVICT_EVERY = 100  # stores between LRU eviction passes
+
+# Gmail ingest pipeline (see process_pending_gmail_invoices). The defaults of 1 and 1 keep
+# the sequential loop; raise either to fetch or parse several messages at once.
+GMAIL_INGEST_FETCH_WORKERS = int(os.environ.get('GMAIL_INGEST_FETCH_WORKERS', '1'))
+GMAIL_INGEST_PARSE_WORKERS = int(os.environ.get('GMAIL_INGEST_PARSE_WORKERS', '1'))
+
+# Inbox listing source: 'gmail' pages through Gmail, 'local' answers from EmailMessageCache
+# (see invoices/inbox_search.py); either can be chosen per request with ?source=
+INBOX_SOURCE = os.environ.get('INBOX_SOURCE', 'gmail')
+
+# Background inbox metadata sync (see invoices/inbox_sync.py). Off by default (0): each pass
+# re-lists the whole max_email_age_days window, so set an interval only for INBOX_SOURCE=local.
+# messages.get costs 5 of Gmail's 250 quota units per user per second, so 40 gets
+# a second stays within the quota with room for interactive requests.
+INBOX_SYNC_INTERVAL_SECONDS = int(os.environ.get('INBOX_SYNC_INTERVAL_SECONDS', '0'))
+INBOX_SYNC_BATCH_SIZE = int(os.environ.get('INBOX_SYNC_BATCH_SIZE', '40'))
+INBOX_SYNC_BATCH_INTERVAL = float(os.environ.get('INBOX_SYNC_BATCH_INTERVAL', '1.0'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -4,7 +4,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from .views import FrontendProxyView
 
-# Serve media files first
+# Serve media files first (DEBUG only; stored attachments go through /api/attachments/)
 urlpatterns = static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
 # Then add other URL patterns
@@ -8,7 +8,9 @@ from .models import (
     Job,
     LineItem,
     ItemType,
+    ParseResultCache,
     ProcessedEmail,
+    StoredAttachment,
     Vendor,
 )
 
@@ -21,6 +23,13 @@ class EmailMessageCacheAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at')
 
 
+@admin.register(StoredAttachment)
+class StoredAttachmentAdmin(admin.ModelAdmin):
+    list_display = ('filename', 'email_id', 'sha256', 'size', 'created_at')
+    search_fields = ('filename', 'email_id', 'sha256')
+    readonly_fields = ('created_at', 'updated_at')
+
+
 @admin.register(ProcessedEmail)
 class ProcessedEmailAdmin(admin.ModelAdmin):
     list_display = ('email_id', 'status', 'processed')
@@ -91,3 +100,11 @@ class LineItemAdmin(admin.ModelAdmin):
 class InventoryItemAdmin(admin.ModelAdmin):
     list_display = ('item_key', 'name', 'vendor', 'item_type', 'current_qty', 'last_invoiced_at')
     search_fields = ('item_key', 'item_id', 'name')
+
+
+@admin.register(ParseResultCache)
+class ParseResultCacheAdmin(admin.ModelAdmin):
+    list_display = ('parser_method', 'pdf_sha256', 'hit_count', 'result_bytes', 'last_used_at', 'created_at')
+    list_filter = ('parser_method',)
+    search_fields = ('pdf_sha256', 'parser_method')
+    readonly_fields = ('created_at',)
@@ -12,5 +12,7 @@ class InvoicesConfig(AppConfig):
         if os.environ.get('RUN_MAIN') != 'true':
             return
 
+        from .inbox_sync import start_inbox_sync_worker
         from .services import start_autoprocess_worker
         start_autoprocess_worker()
+        start_inbox_sync_worker()
@@ -0,0 +1,178 @@
+"""Content-addressed store for Gmail attachments.
+
+Attachment bytes are written once under ``MEDIA_ROOT/blobs/``, sharded by their
+SHA-256 (``blobs/ab/cd/abcd….pdf``), and served by digest from
+``/api/attachments/``. The per-message filenames shown in the app are
+``StoredAttachment`` rows pointing at a blob, so a PDF a vendor resends takes
+no extra disk space, its digest keys the parse cache, and renaming it after
+parsing is a row update rather than a file move.
+
+Rows are indexed by Gmail message id, so finding a message's attachment is one
+query. PDFs saved directly under ``MEDIA_ROOT`` as ``{message_id}_{name}.pdf``
+before the store existed are still served by name in DEBUG; ``manage.py
+backfill_attachment_index`` moves them into the store once, and is the repair
+tool for files later copied into the media folder by hand. Nothing else scans
+the media folder.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+
+from .models import StoredAttachment
+
+BLOB_DIRNAME = 'blobs'
+BLOB_EXTENSION = '.pdf'
+_READ_CHUNK_SIZE = 1024 * 1024
+
+
+def blob_root():
+    return os.path.join(settings.MEDIA_ROOT, BLOB_DIRNAME)
+
+
+def blob_path(sha256):
+    """Absolute path of the blob for ``sha256``: two levels of two-hex-digit shards."""
+    return os.path.join(blob_root(), sha256[:2], sha256[2:4], f'{sha256}{BLOB_EXTENSION}')
+
+
+def write_blob(chunks):
+    """
+    Write the byte ``chunks`` into the store and return their SHA-256.
+
+    The bytes go to a temp file beside the shards while they are hashed. When a
+    blob with that digest already exists the temp file is dropped; otherwise it
+    is fsynced and renamed into place, so readers never see a partial blob.
+    """
+    root = blob_root()
+    os.makedirs(root, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, temp_path = tempfile.mkstemp(dir=root, prefix='.', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            for chunk in chunks:
+                digest.update(chunk)
+                handle.write(chunk)
+            sha256 = digest.hexdigest()
+            target = blob_path(sha256)
+            duplicate = os.path.exists(target)
+            if not duplicate:
+                handle.flush()
+                os.fsync(handle.fileno())
+        if duplicate:
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return sha256
+
+
+def unique_attachment_filename(filename, exclude_pk=None):
+    """``filename``, or ``name_2.pdf``, ``name_3.pdf``… if another attachment already uses it."""
+    base, extension = os.path.splitext(filename)
+    taken = set(
+        StoredAttachment.objects
+        .filter(filename__startswith=base)
+        .exclude(pk=exclude_pk)
+        .values_list('filename', flat=True)
+    )
+    candidate = filename
+    index = 2
+    while candidate in taken:
+        candidate = f'{base}_{index}{extension}'
+        index += 1
+    return candidate
+
+
+def link_attachment(message_id, filename, sha256, original_filename='', mime_type=''):
+    """
+    The ``StoredAttachment`` naming blob ``sha256`` for ``message_id``.
+
+    A message that is fetched again keeps its existing row (and any name it was
+    renamed to); otherwise a row is created under a free variant of ``filename``.
+    """
+    stored = StoredAttachment.objects.filter(email_id=message_id, sha256=sha256).first()
+    if stored:
+        return stored
+    return StoredAttachment.objects.create(
+        filename=unique_attachment_filename(filename),
+        email_id=message_id,
+        sha256=sha256,
+        original_filename=original_filename or '',
+        mime_type=mime_type or '',
+        size=os.path.getsize(blob_path(sha256)),
+    )
+
+
+def rename_attachment(stored, filename):
+    """Point ``stored`` at a free variant of ``filename``; the blob is untouched. Returns the new name."""
+    if stored.filename == filename:
+        return filename
+    stored.filename = unique_attachment_filename(filename, exclude_pk=stored.pk)
+    stored.save(update_fields=['filename', 'updated_at'])
+    return stored.filename
+
+
+def attachment_path(filename):
+    """Path on disk of the attachment named ``filename``: its blob, or a pre-store file under ``MEDIA_ROOT``."""
+    sha256 = StoredAttachment.objects.filter(filename=filename).values_list('sha256', flat=True).first()
+    if sha256:
+        return blob_path(sha256)
+    return os.path.join(settings.MEDIA_ROOT, filename)
+
+
+def legacy_media_files(message_id=None):
+    """``[(message_id, filename), ...]`` for PDFs saved directly in ``MEDIA_ROOT`` as ``{message_id}_{name}.pdf``."""
+    media_dir = settings.MEDIA_ROOT
+    if not os.path.isdir(media_dir):
+        return []
+    found = []
+    with os.scandir(media_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.') or '_' not in name or not name.lower().endswith('.pdf'):
+                continue
+            if not entry.is_file():
+                continue
+            owner = name.split('_', 1)[0]
+            if message_id is None or owner == message_id:
+                found.append((owner, name))
+    return sorted(found)
+
+
+def index_legacy_file(message_id, filename, keep_file=False):
+    """
+    Move ``MEDIA_ROOT/filename`` into the store under its existing name and return its ``StoredAttachment``.
+
+    The original file is kept when ``keep_file`` is set, or when the name could
+    not be kept (the message already has this PDF under another name, or the
+    name is taken), so its old URL keeps working.
+    """
+    path = os.path.join(settings.MEDIA_ROOT, filename)
+    with open(path, 'rb') as handle:
+        sha256 = write_blob(iter(lambda: handle.read(_READ_CHUNK_SIZE), b''))
+    stored = link_attachment(
+        message_id,
+        filename,
+        sha256,
+        original_filename=filename[len(message_id) + 1:],
+        mime_type='application/pdf',
+    )
+    if not keep_file and stored.filename == filename:
+        os.remove(path)
+    return stored
+
+
+def backfill_attachment_index(message_id=None, keep_files=False):
+    """Index every pre-store PDF in ``MEDIA_ROOT`` (or only ``message_id``'s); returns the ``StoredAttachment`` rows."""
+    return [
+        index_legacy_file(owner, filename, keep_file=keep_files)
+        for owner, filename in legacy_media_files(message_id)
+    ]
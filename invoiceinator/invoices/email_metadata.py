@@ -0,0 +1,217 @@
+"""Gmail message metadata cached in ``EmailMessageCache``.
+
+Shared by the inbox listing (``views.list_invoice_emails``) and the background
+metadata sync (``inbox_sync.py``): the ``format=metadata`` request, mapping a
+response onto a cache row, and resolving a sender to a known vendor.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone as dt_timezone
+from email.utils import parsedate_to_datetime
+import logging
+import re
+
+from django.utils import timezone
+
+from .gmail_batch import execute_batched
+from .models import EmailMessageCache, VendorEmail
+
+logger = logging.getLogger(__name__)
+
+# List of email domains that require special handling (extracting name before email)
+SPECIAL_EMAIL_DOMAINS = [
+    'notification.intuit.com',
+    'billtrust.com',
+    'live.com',
+    'outlook.com',
+    'gmail.com',
+    'yahoo.com',
+    'hotmail.com',
+    'msn.com',
+]
+
+
+def extract_sender_email(from_header):
+    if not from_header:
+        return None
+    email_match = re.search(r'<(.+?)>|([^<\s]+@[^>\s]+)', from_header)
+    if not email_match:
+        return None
+    return email_match.group(1) or email_match.group(2)
+
+
+def vendor_name_from_sender(from_header, sender_email):
+    if not sender_email:
+        return None
+    if any(sender_email.endswith(f'@{domain}') for domain in SPECIAL_EMAIL_DOMAINS):
+        name_match = re.search(r'^(.+?)\s*<', from_header or '')
+        if name_match:
+            return name_match.group(1).strip()
+    domain_match = re.search(r'@(.+?)\.[^.]+$', sender_email)
+    return domain_match.group(1).title() if domain_match else "Unknown"
+
+
+def header_map(headers):
+    return {
+        str(header.get('name') or '').lower(): header.get('value') or ''
+        for header in headers or []
+    }
+
+
+def count_attachment_parts(part):
+    count = 1 if part.get('filename') else 0
+    for child in part.get('parts') or []:
+        count += count_attachment_parts(child)
+    return count
+
+
+class SenderVendors:
+    """
+    Known vendors for a set of ``From`` headers, loaded with one ``VendorEmail`` query.
+
+    The inbox listing builds one per Gmail page, and the metadata sync one per
+    batch, so that resolving each row's vendor (and whether it is ignored)
+    needs no query of its own.
+    """
+
+    def __init__(self, from_headers=()):
+        self._by_email = {}
+        self._loaded = set()
+        self.add(from_headers)
+
+    def add(self, from_headers):
+        """Load the vendors for senders not seen yet; at most one query."""
+        senders = {extract_sender_email(from_header) for from_header in from_headers}
+        senders = {sender for sender in senders if sender} - self._loaded
+        if not senders:
+            return
+        self._loaded |= senders
+        for vendor_email in VendorEmail.objects.select_related('vendor').filter(email__in=senders):
+            self._by_email[vendor_email.email] = vendor_email.vendor
+
+    def vendor_for(self, from_header):
+        """
+        ``(vendor_name, vendor_id, ignored)``; unknown senders get a name
+        inferred from the address.
+        """
+        sender_email = extract_sender_email(from_header)
+        if not sender_email:
+            return None, None, False
+        self.add([from_header])
+        vendor = self._by_email.get(sender_email)
+        if vendor:
+            return vendor.name, vendor.id, bool(vendor.ignore)
+        return vendor_name_from_sender(from_header, sender_email), None, False
+
+
+def vendor_from_cached_sender(from_header, sender_vendors=None):
+    vendor_name, vendor_id, _ignored = (sender_vendors or SenderVendors()).vendor_for(from_header)
+    return vendor_name, vendor_id
+
+
+def restamp_cached_sender(sender_email, vendor_id):
+    """
+    Point cached messages from ``sender_email`` at ``vendor_id`` (``None`` clears it).
+
+    Cache rows keep the vendor their sender resolved to when they were fetched
+    and the local inbox filters on it, so a ``VendorEmail`` added, moved or
+    removed later has to be copied onto them. Returns the rows changed.
+    """
+    if not sender_email:
+        return 0
+    candidates = EmailMessageCache.objects.filter(from_header__icontains=sender_email)
+    if vendor_id:
+        candidates = candidates.exclude(vendor_id=vendor_id)
+    else:
+        candidates = candidates.filter(vendor__isnull=False)
+    stale = [
+        pk for pk, from_header in candidates.values_list('id', 'from_header')
+        if extract_sender_email(from_header) == sender_email
+    ]
+    if not stale:
+        return 0
+    return EmailMessageCache.objects.filter(pk__in=stale).update(vendor_id=vendor_id)
+
+
+def gmail_metadata_request(service, message_id):
+    return service.users().messages().get(
+        userId='me',
+        id=message_id,
+        format='metadata',
+        metadataHeaders=['From', 'Date', 'Subject'],
+    )
+
+
+def fetch_gmail_metadata(service, message_id):
+    return gmail_metadata_request(service, message_id).execute()
+
+
+def prefetch_email_metadata(service, message_ids, sender_vendors=None):
+    """
+    Cache metadata for ``message_ids`` using batched Gmail requests.
+
+    Returns ``{email_id: EmailMessageCache}`` for the messages that came back;
+    failed ids are left for the caller (the inbox listing fetches them one by one).
+    """
+    if not message_ids:
+        return {}
+    responses, errors = execute_batched(
+        service,
+        {message_id: gmail_metadata_request(service, message_id) for message_id in message_ids},
+    )
+    for message_id, exc in errors.items():
+        logger.warning('Batched metadata fetch failed for %s: %s', message_id, exc)
+    sender_vendors = sender_vendors or SenderVendors()
+    sender_vendors.add(
+        header_map((response.get('payload') or {}).get('headers')).get('from', '')
+        for response in responses.values()
+    )
+    return {
+        message_id: cache_email_metadata(message_id, responses[message_id], sender_vendors)
+        for message_id in message_ids
+        if message_id in responses
+    }
+
+
+def cache_email_metadata(message_id, gmail_message, sender_vendors=None):
+    payload = gmail_message.get('payload') or {}
+    headers = payload.get('headers') or []
+    headers_by_name = header_map(headers)
+    from_header = headers_by_name.get('from', '')
+    vendor_name, vendor_id = vendor_from_cached_sender(from_header, sender_vendors)
+    cache, _created = EmailMessageCache.objects.update_or_create(
+        email_id=message_id,
+        defaults={
+            'thread_id': gmail_message.get('threadId') or '',
+            'snippet': gmail_message.get('snippet') or '',
+            'from_header': from_header,
+            'subject': headers_by_name.get('subject', ''),
+            'date_header': headers_by_name.get('date', ''),
+            'attachment_count': count_attachment_parts(payload),
+            'vendor_id': vendor_id,
+            'raw_headers': headers_by_name,
+            'received_at': gmail_received_at(gmail_message, headers_by_name),
+            'last_seen_at': timezone.now(),
+        },
+    )
+    if vendor_name and not cache.vendor_id:
+        cache._inferred_vendor_name = vendor_name
+    return cache
+
+
+def gmail_received_at(gmail_message, headers_by_name):
+    """Gmail's ``internalDate`` (epoch milliseconds), else the ``Date`` header, else now."""
+    internal_date = gmail_message.get('internalDate')
+    if internal_date:
+        try:
+            return datetime.fromtimestamp(int(internal_date) / 1000, tz=dt_timezone.utc)
+        except (TypeError, ValueError, OverflowError, OSError):
+            pass
+    try:
+        received_at = parsedate_to_datetime(headers_by_name.get('date', ''))
+    except (TypeError, ValueError, IndexError):
+        return timezone.now()
+    if timezone.is_naive(received_at):
+        received_at = timezone.make_aware(received_at)
+    return received_at
@@ -0,0 +1,42 @@
+"""Gmail API batch requests: many API calls per HTTP round trip.
+
+Gmail accepts at most 100 calls in one batch. ``execute_batched`` takes
+unexecuted ``HttpRequest`` objects (``service.users().messages().get(...)``
+without ``.execute()``), sends them in as few round trips as the limit allows,
+and reports each call's response or error under the caller's key.
+"""
+
+from __future__ import annotations
+
+GMAIL_BATCH_LIMIT = 100
+
+
+def execute_batched(service, requests, batch_size=GMAIL_BATCH_LIMIT):
+    """
+    Execute ``{key: HttpRequest}`` through Gmail batch requests.
+
+    Returns ``(responses, errors)``: dicts mapping each key to its decoded
+    response or to the exception raised for that call. A failed call does not
+    fail the rest of its batch.
+    """
+    batch_size = max(1, min(batch_size, GMAIL_BATCH_LIMIT))
+    responses = {}
+    errors = {}
+    items = list(requests.items())
+    for start in range(0, len(items), batch_size):
+        chunk = items[start:start + batch_size]
+        # Batch request ids must be plain tokens; index them and map back to the caller's keys.
+        keys_by_request_id = {str(index): key for index, (key, _request) in enumerate(chunk)}
+
+        def callback(request_id, response, exception, keys_by_request_id=keys_by_request_id):
+            key = keys_by_request_id[request_id]
+            if exception is not None:
+                errors[key] = exception
+            else:
+                responses[key] = response
+
+        batch = service.new_batch_http_request(callback=callback)
+        for request_id, (_key, request) in zip(keys_by_request_id, chunk):
+            batch.add(request, request_id=request_id)
+        batch.execute()
+    return responses, errors
@@ -0,0 +1,158 @@
+"""Local-first inbox listing and search over ``EmailMessageCache``.
+
+``list_invoice_emails(source=local)`` answers inbox queries from the cached
+Gmail metadata joined with ``ProcessedEmail`` instead of paging through Gmail:
+status, vendor and date filters are SQL, and search text goes through an SQLite
+FTS5 index over subject, sender, snippet and vendor name
+(``invoices_emailmessagecache_fts``, kept current by triggers created in
+migration 0024). Databases without FTS5 fall back to ``icontains``. Pages are
+keyset-paginated on ``(received_at, id)``, newest first, so deep pages cost the
+same as the first.
+
+A migration that rebuilds ``invoices_emailmessagecache`` or ``invoices_vendor``
+on SQLite drops the triggers; recreate them there and call
+``rebuild_inbox_index``.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import re
+
+from django.db import connection
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.expressions import RawSQL
+from django.utils.dateparse import parse_datetime
+
+from .models import EmailMessageCache, ProcessedEmail
+
+FTS_TABLE = 'invoices_emailmessagecache_fts'
+
+_fts_tables = {}
+
+
+class InvalidInboxCursor(ValueError):
+    pass
+
+
+def fts_available():
+    """True when the default database has the inbox FTS5 table (checked once per database)."""
+    name = str(connection.settings_dict['NAME'])
+    if name not in _fts_tables:
+        _fts_tables[name] = (
+            connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_tables[name]
+
+
+def fts_query(search):
+    """An FTS5 ``MATCH`` expression requiring every word of ``search`` as a prefix, or ``None``."""
+    terms = re.findall(r'\w+', search or '')
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def rebuild_inbox_index():
+    """Refill the FTS table from ``EmailMessageCache``; returns the rows indexed."""
+    if not fts_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, subject, from_header, snippet, vendor_name) '
+            'SELECT cache.id, cache.subject, cache.from_header, cache.snippet, '
+            "COALESCE(vendor.name, '') FROM invoices_emailmessagecache cache "
+            'LEFT JOIN invoices_vendor vendor ON vendor.id = cache.vendor_id'
+        )
+        return cursor.rowcount
+
+
+def encode_cursor(cache):
+    payload = json.dumps([cache.received_at.isoformat(), cache.pk]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """``(received_at, id)`` from a page token made by ``encode_cursor``."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        received_at, pk = json.loads(raw)
+        received_at = parse_datetime(received_at)
+        pk = int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidInboxCursor(f'Invalid page token: {token}') from None
+    if received_at is None:
+        raise InvalidInboxCursor(f'Invalid page token: {token}')
+    return received_at, pk
+
+
+def _search_filter(search):
+    expression = fts_query(search) if fts_available() else None
+    if expression:
+        return Q(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression],
+        ))
+    return (
+        Q(subject__icontains=search)
+        | Q(from_header__icontains=search)
+        | Q(snippet__icontains=search)
+        | Q(vendor__name__icontains=search)
+    )
+
+
+def cached_inbox_queryset(
+    status=None, vendor_id=None, search=None, received_after=None, received_before=None,
+):
+    """
+    Cached messages matching the inbox filters, newest first.
+
+    Mirrors the Gmail-backed listing: a message's vendor is its processed row's
+    vendor, else the cached sender's (re-stamped by ``signals.py`` whenever a
+    ``VendorEmail`` changes); messages of ignored vendors are left out, and a
+    message without a ``ProcessedEmail`` is ``pending``.
+    """
+    processed = ProcessedEmail.objects.filter(email_id=OuterRef('email_id'))
+    queryset = EmailMessageCache.objects.select_related('vendor').annotate(
+        processed_status=Subquery(processed.values('status')[:1]),
+        processed_vendor_id=Subquery(processed.values('vendor_id')[:1]),
+        processed_vendor_ignored=Subquery(processed.values('vendor__ignore')[:1]),
+    ).filter(
+        # Spelled as a filter: SQL NULLs from the subqueries would make an
+        # exclude() drop unprocessed rows.
+        Q(processed_vendor_id__isnull=False, processed_vendor_ignored=False)
+        | Q(processed_vendor_id__isnull=True) & (Q(vendor__isnull=True) | Q(vendor__ignore=False))
+    )
+    if status == 'pending':
+        queryset = queryset.filter(
+            Q(processed_status__isnull=True) | Q(processed_status__in=('', 'pending'))
+        )
+    elif status:
+        queryset = queryset.filter(processed_status=status)
+    if vendor_id:
+        queryset = queryset.filter(
+            Q(processed_vendor_id=vendor_id)
+            | Q(processed_vendor_id__isnull=True, vendor_id=vendor_id)
+        )
+    if search:
+        queryset = queryset.filter(_search_filter(search))
+    if received_after:
+        queryset = queryset.filter(received_at__gte=received_after)
+    if received_before:
+        queryset = queryset.filter(received_at__lt=received_before)
+    return queryset.order_by('-received_at', '-id')
+
+
+def cached_inbox_page(queryset, page_size, page_token=None):
+    """``(caches, next_page_token)`` for one keyset page of ``cached_inbox_queryset``."""
+    if page_token:
+        received_at, pk = decode_cursor(page_token)
+        queryset = queryset.filter(
+            Q(received_at__lt=received_at) | Q(received_at=received_at, id__lt=pk)
+        )
+    caches = list(queryset[:page_size + 1])
+    if len(caches) <= page_size:
+        return caches, None
+    caches = caches[:page_size]
+    return caches, encode_cursor(caches[-1])
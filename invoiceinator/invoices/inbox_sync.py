@@ -0,0 +1,195 @@
+"""Background sync that keeps ``EmailMessageCache`` warm.
+
+Every ``INBOX_SYNC_INTERVAL_SECONDS`` a daemon thread lists the invoice messages
+inside the automation window (``max_email_age_days``). Messages already cached
+only get ``last_seen_at`` bumped, in bulk; the rest have their metadata
+(headers, snippet, attachment count) fetched in Gmail batches of
+``INBOX_SYNC_BATCH_SIZE``, newest first, so inbox listings find them locally.
+The thread is opt-in (the interval defaults to 0): each pass re-lists the
+whole window, which is only worth its quota when listings read the cache.
+
+Batches start at least ``INBOX_SYNC_BATCH_INTERVAL`` seconds apart. When Gmail
+answers with a rate-limit error the interval doubles (up to
+``MAX_BATCH_INTERVAL``) and the throttled messages are queued again; clean
+batches bring the interval back down.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import timedelta
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from googleapiclient.errors import HttpError
+
+from .email_metadata import SenderVendors, cache_email_metadata, gmail_metadata_request, header_map
+from .gmail_batch import execute_batched
+from .models import EmailMessageCache
+from .services import GMAIL_INVOICE_QUERY, _ensure_invoice_automation_settings, _list_message_ids
+from .utils import get_gmail_service
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_INTERVAL = 64.0
+MAX_RATE_LIMIT_RETRIES = 5
+_RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+_LAST_SEEN_CHUNK = 500
+
+_sync_thread = None
+_sync_lock = threading.Lock()
+
+
+class MetadataPacer:
+    """Spaces metadata batches ``interval`` seconds apart, backing off while Gmail rate-limits."""
+
+    def __init__(
+        self, interval, max_interval=MAX_BATCH_INTERVAL, sleep=time.sleep, clock=time.monotonic,
+    ):
+        self.interval = max(0.0, interval)
+        self.max_interval = max(self.interval, max_interval)
+        self.delay = self.interval
+        self._sleep = sleep
+        self._clock = clock
+        self._next_batch_at = None
+
+    def wait(self):
+        """Sleep until the next batch may start."""
+        if self._next_batch_at is None:
+            return
+        remaining = self._next_batch_at - self._clock()
+        if remaining > 0:
+            self._sleep(remaining)
+
+    def record(self, rate_limited):
+        """Note how the batch just sent went and schedule the next one."""
+        if rate_limited:
+            self.delay = min(self.max_interval, max(self.delay * 2, 1.0))
+        else:
+            self.delay = max(self.interval, self.delay / 2)
+        self._next_batch_at = self._clock() + self.delay
+
+
+def is_rate_limited(exc):
+    """True for Gmail's 429, and for the 403s it sends when a per-user quota is exceeded."""
+    if not isinstance(exc, HttpError):
+        return False
+    status = getattr(exc.resp, 'status', None)
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    content = exc.content
+    content = content.decode('utf-8', 'replace') if isinstance(content, bytes) else str(content)
+    return any(reason in content for reason in _RATE_LIMIT_REASONS)
+
+
+def _touch_cached(message_ids, seen_at):
+    """Bump ``last_seen_at`` on the cached rows among ``message_ids``; returns their ids."""
+    cached = set()
+    for start in range(0, len(message_ids), _LAST_SEEN_CHUNK):
+        rows = EmailMessageCache.objects.filter(
+            email_id__in=message_ids[start:start + _LAST_SEEN_CHUNK],
+        ).exclude(from_header='')
+        cached.update(rows.values_list('email_id', flat=True))
+        rows.update(last_seen_at=seen_at)
+    return cached
+
+
+def _fetch_batch(service, message_ids):
+    """Fetch and cache metadata for ``message_ids``; returns the Gmail errors by id."""
+    responses, errors = execute_batched(
+        service,
+        {message_id: gmail_metadata_request(service, message_id) for message_id in message_ids},
+    )
+    sender_vendors = SenderVendors(
+        header_map((response.get('payload') or {}).get('headers')).get('from', '')
+        for response in responses.values()
+    )
+    for message_id in message_ids:
+        if message_id in responses:
+            cache_email_metadata(message_id, responses[message_id], sender_vendors)
+    return errors
+
+
+def sync_inbox_metadata(service, window_days=None, batch_size=None, pacer=None, should_stop=None):
+    """
+    Bring ``EmailMessageCache`` up to date with the invoice messages of the last ``window_days``.
+
+    Returns counts: ``listed`` messages, ``refreshed`` (already cached),
+    ``fetched``, ``failed`` and ``rate_limited`` responses. ``should_stop`` is
+    checked before each batch.
+    """
+    if window_days is None:
+        window_days = _ensure_invoice_automation_settings().max_email_age_days
+    batch_size = max(1, batch_size or settings.INBOX_SYNC_BATCH_SIZE)
+    pacer = pacer or MetadataPacer(settings.INBOX_SYNC_BATCH_INTERVAL)
+
+    cutoff = timezone.now() - timedelta(days=window_days)
+    query = f"{GMAIL_INVOICE_QUERY} after:{cutoff.strftime('%Y/%m/%d')}"
+    message_ids = list(_list_message_ids(service, query))
+    cached = _touch_cached(message_ids, timezone.now())
+    summary = {
+        'listed': len(message_ids),
+        'refreshed': len(cached),
+        'fetched': 0,
+        'failed': 0,
+        'rate_limited': 0,
+    }
+
+    pending = deque(message_id for message_id in message_ids if message_id not in cached)
+    retries = {}
+    while pending:
+        if should_stop and should_stop():
+            break
+        batch = [pending.popleft() for _ in range(min(batch_size, len(pending)))]
+        pacer.wait()
+        errors = _fetch_batch(service, batch)
+        summary['fetched'] += len(batch) - len(errors)
+
+        throttled = False
+        for message_id, exc in errors.items():
+            if is_rate_limited(exc):
+                throttled = True
+                summary['rate_limited'] += 1
+                retries[message_id] = retries.get(message_id, 0) + 1
+                if retries[message_id] <= MAX_RATE_LIMIT_RETRIES:
+                    pending.append(message_id)
+                    continue
+            logger.warning('Inbox metadata sync failed for %s: %s', message_id, exc)
+            summary['failed'] += 1
+        pacer.record(throttled)
+    return summary
+
+
+def start_inbox_sync_worker():
+    """Start the metadata sync thread unless ``INBOX_SYNC_INTERVAL_SECONDS`` is 0."""
+    global _sync_thread
+    interval = settings.INBOX_SYNC_INTERVAL_SECONDS
+    if interval <= 0:
+        return None
+    with _sync_lock:
+        if _sync_thread and _sync_thread.is_alive():
+            return _sync_thread
+
+        def _run():
+            while True:
+                try:
+                    service = get_gmail_service()
+                except RuntimeError:
+                    # Gmail is not connected yet; try again next interval.
+                    service = None
+                try:
+                    if service is not None:
+                        summary = sync_inbox_metadata(service)
+                        logger.info('Inbox metadata sync: %s', summary)
+                except Exception:
+                    logger.exception('Inbox metadata sync failed')
+                time.sleep(max(15, interval))
+
+        _sync_thread = threading.Thread(target=_run, name='invoiceinator-inbox-sync', daemon=True)
+        _sync_thread.start()
+        return _sync_thread
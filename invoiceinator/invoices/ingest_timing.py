@@ -0,0 +1,109 @@
+"""Per-stage timing of Gmail invoice ingest.
+
+Each message processed by ``process_gmail_message`` or the ingest pipeline
+carries a ``StageTimings`` in its stage context. The finished spans are stored
+on ``ProcessedEmail.timings`` as::
+
+    {"stages": {"fetch": 0.41, "decode": 0.002, ...},
+     "parser_method": "parse_generic_invoice", "candidates_tried": 3}
+
+``stage_timing_percentiles`` summarizes them (p50/p95) per stage and per
+vendor over a time window.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import time
+
+from .models import ProcessedEmail
+
+# Gmail message + attachment download, base64 decode and write, parser run
+# (including the parse-cache lookup), database writes, attachment rename.
+INGEST_STAGES = ('fetch', 'decode', 'parse', 'persist', 'rename')
+TOTAL_STAGE = 'total'
+
+
+class StageTimings:
+    """Seconds spent per ingest stage for one message; repeated spans add up."""
+
+    def __init__(self):
+        self.seconds = {}
+        self.parser_method = ''
+        self.candidates_tried = None
+
+    def add(self, stage, seconds):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def note_parse(self, parser, parsed):
+        self.parser_method = getattr(parser, '__name__', '') or ''
+        if isinstance(parsed, dict):
+            self.candidates_tried = parsed.get('candidates_tried')
+
+    def as_dict(self):
+        return {
+            'stages': {stage: round(seconds, 6) for stage, seconds in self.seconds.items()},
+            'parser_method': self.parser_method,
+            'candidates_tried': self.candidates_tried,
+        }
+
+
+def _percentile(ordered, fraction):
+    """Linear-interpolated percentile of an ascending list."""
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _summarize(samples):
+    summary = {}
+    for stage, values in samples.items():
+        values.sort()
+        summary[stage] = {
+            'count': len(values),
+            'p50': round(_percentile(values, 0.5), 6),
+            'p95': round(_percentile(values, 0.95), 6),
+        }
+    return summary
+
+
+def stage_timing_percentiles(since, until=None):
+    """
+    p50/p95 seconds per stage, overall and per vendor, for messages processed in ``[since, until)``.
+
+    ``total`` is the sum of a message's stages. Vendors are keyed by name
+    (``""`` for messages without one).
+    """
+    rows = ProcessedEmail.objects.filter(processed__gte=since).exclude(timings={})
+    if until is not None:
+        rows = rows.filter(processed__lt=until)
+
+    overall = {}
+    by_vendor = {}
+    count = 0
+    for vendor_name, timings in rows.values_list('vendor__name', 'timings').iterator():
+        stages = (timings or {}).get('stages') or {}
+        if not stages:
+            continue
+        count += 1
+        vendor_samples = by_vendor.setdefault(vendor_name or '', {})
+        for stage, seconds in [*stages.items(), (TOTAL_STAGE, sum(stages.values()))]:
+            overall.setdefault(stage, []).append(seconds)
+            vendor_samples.setdefault(stage, []).append(seconds)
+
+    return {
+        'messages': count,
+        'stages': _summarize(overall),
+        'vendors': {name: _summarize(samples) for name, samples in sorted(by_vendor.items())},
+    }
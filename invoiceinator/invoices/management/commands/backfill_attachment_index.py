@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from invoices.attachment_store import backfill_attachment_index, legacy_media_files
+
+
+class Command(BaseCommand):
+    help = (
+        'Move PDFs saved directly in MEDIA_ROOT as {message_id}_{name}.pdf into the attachment '
+        'store and index them by message id. Safe to re-run; use it to repair the index after '
+        'copying files into the media folder by hand.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--message', help='only index this Gmail message id')
+        parser.add_argument(
+            '--keep-files',
+            action='store_true',
+            help='leave the original files in MEDIA_ROOT after copying them into the store',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='list the files that would be indexed')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            found = legacy_media_files(options['message'])
+            for message_id, filename in found:
+                self.stdout.write(f'{message_id}\t{filename}')
+            self.stdout.write(f'{len(found)} file(s) to index')
+            return
+        stored = backfill_attachment_index(options['message'], keep_files=options['keep_files'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {len(stored)} attachment(s)'))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.10 on 2026-10-17 04:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0019_processedemail_incorrect_parsing_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParseResultCache',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                )),
+                ('pdf_sha256', models.CharField(max_length=64)),
+                ('parser_method', models.CharField(max_length=255)),
+                ('parser_version', models.CharField(max_length=64)),
+                ('result', models.JSONField(blank=True, default=dict)),
+                ('result_bytes', models.PositiveIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('last_used_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['last_used_at'], name='parse_cache_last_used_idx'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('pdf_sha256', 'parser_method', 'parser_version'),
+                        name='unique_parse_result_cache_key',
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-17 05:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0020_parseresultcache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoiceautomationsettings',
+            name='gmail_history_id',
+            field=models.CharField(
+                blank=True,
+                default='',
+                help_text=(
+                    'Gmail mailbox historyId at the last complete sync; empty forces a full resync.'
+                ),
+                max_length=64,
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-17 05:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0021_invoiceautomationsettings_gmail_history_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processedemail',
+            name='timings',
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text=(
+                    'Seconds per ingest stage, parser method and generic candidate count '
+                    '(see ingest_timing.py)'
+                ),
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.10 on 2026-10-17 05:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0022_processedemail_timings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredAttachment',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True, primary_key=True, serialize=False, verbose_name='ID'
+                )),
+                ('filename', models.CharField(max_length=512, unique=True)),
+                ('email_id', models.CharField(db_index=True, max_length=255)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('original_filename', models.CharField(blank=True, default='', max_length=512)),
+                ('mime_type', models.CharField(blank=True, default='', max_length=255)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.10 on 2026-10-17 05:47
+
+from email.utils import parsedate_to_datetime
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'invoices_emailmessagecache_fts'
+VENDOR_NAME_SQL = "COALESCE((SELECT name FROM invoices_vendor WHERE id = {row}.vendor_id), '')"
+INSERT_ROW_SQL = (
+    f'INSERT INTO {FTS_TABLE}(rowid, subject, from_header, snippet, vendor_name) '
+    'VALUES (new.id, new.subject, new.from_header, new.snippet, '
+    f"{VENDOR_NAME_SQL.format(row='new')});"
+)
+
+CREATE_FTS_SQL = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "subject, from_header, snippet, vendor_name, tokenize = 'unicode61 remove_diacritics 2')",
+    f'INSERT INTO {FTS_TABLE}(rowid, subject, from_header, snippet, vendor_name) '
+    'SELECT id, subject, from_header, snippet, '
+    f"{VENDOR_NAME_SQL.format(row='invoices_emailmessagecache')} "
+    'FROM invoices_emailmessagecache',
+    f'CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON invoices_emailmessagecache '
+    f'BEGIN {INSERT_ROW_SQL} END',
+    f'CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON invoices_emailmessagecache BEGIN '
+    f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END',
+    f'CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF subject, from_header, snippet, vendor_id '
+    f'ON invoices_emailmessagecache BEGIN DELETE FROM {FTS_TABLE} WHERE rowid = old.id; '
+    f'{INSERT_ROW_SQL} END',
+    f'CREATE TRIGGER {FTS_TABLE}_vendor_au AFTER UPDATE OF name ON invoices_vendor BEGIN '
+    f'UPDATE {FTS_TABLE} SET vendor_name = new.name '
+    'WHERE rowid IN (SELECT id FROM invoices_emailmessagecache WHERE vendor_id = new.id); END',
+]
+
+DROP_FTS_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_vendor_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def backfill_received_at(apps, schema_editor):
+    EmailMessageCache = apps.get_model('invoices', 'EmailMessageCache')
+    for cache in EmailMessageCache.objects.only('id', 'date_header', 'created_at').iterator():
+        try:
+            received_at = parsedate_to_datetime(cache.date_header)
+        except (TypeError, ValueError, IndexError):
+            received_at = None
+        if received_at is not None and received_at.tzinfo is None:
+            received_at = received_at.replace(tzinfo=django.utils.timezone.get_current_timezone())
+        EmailMessageCache.objects.filter(pk=cache.pk).update(
+            received_at=received_at or cache.created_at,
+        )
+
+
+def create_inbox_fts(apps, schema_editor):
+    # SQLite builds without FTS5 (and other databases) fall back to LIKE search in inbox_search.py.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(CREATE_FTS_SQL[0])
+        except OperationalError:
+            return
+        for statement in CREATE_FTS_SQL[1:]:
+            cursor.execute(statement)
+
+
+def drop_inbox_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_FTS_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0023_storedattachment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailmessagecache',
+            name='received_at',
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                help_text=(
+                    "Gmail's internal date for the message; "
+                    'orders the local inbox (see inbox_search.py).'
+                ),
+            ),
+        ),
+        migrations.RunPython(backfill_received_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='emailmessagecache',
+            index=models.Index(fields=['-received_at', '-id'], name='email_cache_received_idx'),
+        ),
+        migrations.RunPython(create_inbox_fts, drop_inbox_fts),
+    ]
@@ -0,0 +1,133 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+INVOICE_FTS = 'invoices_invoice_fts'
+LINE_ITEM_FTS = 'invoices_lineitem_fts'
+
+INVOICE_COLUMNS = (
+    'invoice_number, source_email_subject, source_email_from, vendor_name, contact_name'
+)
+INVOICE_VALUES = (
+    '{row}.invoice_number, {row}.source_email_subject, {row}.source_email_from, '
+    "COALESCE((SELECT name FROM invoices_vendor WHERE id = {row}.vendor_id), ''), "
+    "COALESCE((SELECT name FROM invoices_contact WHERE id = {row}.contact_id), '')"
+)
+LINE_ITEM_COLUMNS = 'name, description, item_id, invoice_number, item_type_name, job_name, job_code'
+LINE_ITEM_VALUES = (
+    '{row}.name, {row}.description, {row}.item_id, '
+    "COALESCE((SELECT invoice_number FROM invoices_invoice WHERE id = {row}.invoice_id), ''), "
+    "COALESCE((SELECT name FROM invoices_itemtype WHERE id = {row}.item_type_id), ''), "
+    "COALESCE((SELECT name FROM invoices_job WHERE id = {row}.job_id), ''), "
+    "COALESCE((SELECT job_id FROM invoices_job WHERE id = {row}.job_id), '')"
+)
+
+
+def _index_sql(fts_table, source_table, columns, values, watched):
+    """Create, fill and trigger-maintain ``fts_table`` mirroring ``source_table``."""
+    insert_row = (
+        f'INSERT INTO {fts_table}(rowid, {columns}) '
+        f"VALUES (new.id, {values.format(row='new')});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({columns}, tokenize = 'trigram')",
+        f'INSERT INTO {fts_table}(rowid, {columns}) '
+        f'SELECT id, {values.format(row=source_table)} FROM {source_table}',
+        f'CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {source_table} BEGIN {insert_row} END',
+        f'CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {source_table} BEGIN '
+        f'DELETE FROM {fts_table} WHERE rowid = old.id; END',
+        f'CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {watched} ON {source_table} BEGIN '
+        f'DELETE FROM {fts_table} WHERE rowid = old.id; {insert_row} END',
+    ]
+
+
+def _related_sql(fts_table, trigger, related_table, watched, assignments, rows):
+    """Copy edits of a related row's name into every indexed row that shows it."""
+    return (
+        f'CREATE TRIGGER {fts_table}_{trigger} AFTER UPDATE OF {watched} ON {related_table} BEGIN '
+        f'UPDATE {fts_table} SET {assignments} WHERE rowid IN ({rows}); END'
+    )
+
+
+CREATE_FTS_SQL = [
+    *_index_sql(
+        INVOICE_FTS,
+        'invoices_invoice',
+        INVOICE_COLUMNS,
+        INVOICE_VALUES,
+        'invoice_number, source_email_subject, source_email_from, vendor_id, contact_id',
+    ),
+    _related_sql(
+        INVOICE_FTS, 'vendor_au', 'invoices_vendor', 'name', 'vendor_name = new.name',
+        'SELECT id FROM invoices_invoice WHERE vendor_id = new.id',
+    ),
+    _related_sql(
+        INVOICE_FTS, 'contact_au', 'invoices_contact', 'name', 'contact_name = new.name',
+        'SELECT id FROM invoices_invoice WHERE contact_id = new.id',
+    ),
+    *_index_sql(
+        LINE_ITEM_FTS,
+        'invoices_lineitem',
+        LINE_ITEM_COLUMNS,
+        LINE_ITEM_VALUES,
+        'name, description, item_id, invoice_id, item_type_id, job_id',
+    ),
+    _related_sql(
+        LINE_ITEM_FTS, 'invoice_au', 'invoices_invoice', 'invoice_number',
+        "invoice_number = COALESCE(new.invoice_number, '')",
+        'SELECT id FROM invoices_lineitem WHERE invoice_id = new.id',
+    ),
+    _related_sql(
+        LINE_ITEM_FTS, 'itemtype_au', 'invoices_itemtype', 'name', 'item_type_name = new.name',
+        'SELECT id FROM invoices_lineitem WHERE item_type_id = new.id',
+    ),
+    _related_sql(
+        LINE_ITEM_FTS, 'job_au', 'invoices_job', 'name, job_id',
+        'job_name = new.name, job_code = new.job_id',
+        'SELECT id FROM invoices_lineitem WHERE job_id = new.id',
+    ),
+]
+
+DROP_FTS_SQL = [
+    *(
+        f'DROP TRIGGER IF EXISTS {LINE_ITEM_FTS}_{suffix}'
+        for suffix in ('job_au', 'itemtype_au', 'invoice_au', 'au', 'ad', 'ai')
+    ),
+    f'DROP TABLE IF EXISTS {LINE_ITEM_FTS}',
+    *(
+        f'DROP TRIGGER IF EXISTS {INVOICE_FTS}_{suffix}'
+        for suffix in ('contact_au', 'vendor_au', 'au', 'ad', 'ai')
+    ),
+    f'DROP TABLE IF EXISTS {INVOICE_FTS}',
+]
+
+
+def create_record_fts(apps, schema_editor):
+    # SQLite builds without FTS5 (and other databases) fall back to LIKE search in record_search.py.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(CREATE_FTS_SQL[0])
+        except OperationalError:
+            return
+        for statement in CREATE_FTS_SQL[1:]:
+            cursor.execute(statement)
+
+
+def drop_record_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in DROP_FTS_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0024_emailmessagecache_received_at_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_record_fts, drop_record_fts),
+    ]
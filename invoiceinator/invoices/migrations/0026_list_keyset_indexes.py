@@ -0,0 +1,25 @@
+# Generated by Django 5.2.10 on 2026-10-17 05:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0025_invoice_lineitem_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['name', 'item_key', 'id'], name='inventory_item_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-received_at', '-processed_at', '-id'], name='invoice_received_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lineitem',
+            index=models.Index(fields=['-created_at', '-id'], name='line_item_created_idx'),
+        ),
+    ]
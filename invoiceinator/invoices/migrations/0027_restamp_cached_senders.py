@@ -0,0 +1,38 @@
+import re
+
+from django.db import migrations
+
+
+def extract_sender_email(from_header):
+    # Frozen copy of invoices.email_metadata.extract_sender_email as of this migration.
+    if not from_header:
+        return None
+    email_match = re.search(r'<(.+?)>|([^<\s]+@[^>\s]+)', from_header)
+    if not email_match:
+        return None
+    return email_match.group(1) or email_match.group(2)
+
+
+def restamp_cached_senders(apps, schema_editor):
+    """Give cached messages the vendor of a ``VendorEmail`` added after they were fetched."""
+    EmailMessageCache = apps.get_model('invoices', 'EmailMessageCache')
+    VendorEmail = apps.get_model('invoices', 'VendorEmail')
+    vendor_ids = dict(VendorEmail.objects.values_list('email', 'vendor_id'))
+    if not vendor_ids:
+        return
+    rows = EmailMessageCache.objects.filter(vendor__isnull=True).values_list('id', 'from_header')
+    for pk, from_header in rows.iterator():
+        vendor_id = vendor_ids.get(extract_sender_email(from_header))
+        if vendor_id:
+            EmailMessageCache.objects.filter(pk=pk).update(vendor_id=vendor_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0026_list_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(restamp_cached_senders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.10 on 2026-10-17 06:24
+
+from django.db import migrations, models
+
+
+def backfill_attachment_sha256(apps, schema_editor):
+    """Copy each cached attachment's blob digest from the ``StoredAttachment`` it names."""
+    EmailMessageCache = apps.get_model('invoices', 'EmailMessageCache')
+    StoredAttachment = apps.get_model('invoices', 'StoredAttachment')
+    digests = dict(StoredAttachment.objects.values_list('filename', 'sha256'))
+    rows = EmailMessageCache.objects.exclude(attachment_filename='')
+    for pk, filename in rows.values_list('id', 'attachment_filename').iterator():
+        if filename in digests:
+            EmailMessageCache.objects.filter(pk=pk).update(attachment_sha256=digests[filename])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0027_restamp_cached_senders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailmessagecache',
+            name='attachment_sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_attachment_sha256, migrations.RunPython.noop),
+    ]
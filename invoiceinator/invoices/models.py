@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.db.models import Q
+from django.utils import timezone
 
 STATUS_CHOICES = [
     ('pending', 'Pending'),
@@ -35,7 +36,12 @@ class Vendor(models.Model):
     email = models.EmailField(blank=True, default='')
     website = models.URLField(blank=True, default='')
     invoice_type = models.CharField(max_length=255, choices=INVOICE_TYPE_CHOICES)
-    parser = models.CharField(max_length=255, null=True, blank=True, help_text="Parser method to use for extracting invoice data")
+    parser = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        help_text="Parser method to use for extracting invoice data",
+    )
 
     def __str__(self):
         return self.name
@@ -118,7 +124,9 @@ class Job(models.Model):
 
 
 class Contact(models.Model):
-    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='contacts', null=True, blank=True)
+    vendor = models.ForeignKey(
+        Vendor, on_delete=models.CASCADE, related_name='contacts', null=True, blank=True
+    )
     name = models.CharField(max_length=255)
     email = models.EmailField(blank=True, default='')
     phone = models.CharField(max_length=64, blank=True, default='')
@@ -154,6 +162,12 @@ class InvoiceAutomationSettings(models.Model):
         help_text="How often the background worker checks for new invoices.",
     )
     last_processed_at = models.DateTimeField(null=True, blank=True)
+    gmail_history_id = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        help_text="Gmail mailbox historyId at the last complete sync; empty forces a full resync.",
+    )
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
@@ -190,6 +204,13 @@ class Invoice(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['-received_at', '-processed_at', '-id'], name='invoice_received_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.invoice_number or self.source_email_id
 
@@ -212,6 +233,9 @@ class InventoryItem(models.Model):
 
     class Meta:
         unique_together = ['vendor', 'item_key']
+        indexes = [
+            models.Index(fields=['name', 'item_key', 'id'], name='inventory_item_name_idx'),
+        ]
 
     def __str__(self):
         return self.name or self.item_key
@@ -250,6 +274,11 @@ class LineItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='line_item_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.item_id or self.name or 'Line Item'}"
 
@@ -261,6 +290,14 @@ class ProcessedEmail(models.Model):
     data = models.JSONField(default=dict, help_text="Data extracted from the email")
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, null=True, blank=True)
     invoice = models.ForeignKey(Invoice, on_delete=models.SET_NULL, null=True, blank=True)
+    timings = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text=(
+            "Seconds per ingest stage, parser method and generic candidate count "
+            "(see ingest_timing.py)"
+        ),
+    )
 
     def __str__(self):
         return self.email_id
@@ -277,19 +314,51 @@ class EmailMessageCache(models.Model):
     attachment_filename = models.CharField(max_length=512, blank=True, default='')
     attachment_original_filename = models.CharField(max_length=512, blank=True, default='')
     attachment_mime_type = models.CharField(max_length=255, blank=True, default='')
+    # Nullable without a default so SQLite adds the column in place; rebuilding the
+    # table would drop the search index triggers from migration 0024.
+    attachment_sha256 = models.CharField(max_length=64, null=True, blank=True)
     vendor = models.ForeignKey(Vendor, on_delete=models.SET_NULL, null=True, blank=True)
     raw_headers = models.JSONField(default=dict, blank=True)
+    received_at = models.DateTimeField(
+        default=timezone.now,
+        help_text=(
+            "Gmail's internal date for the message; orders the local inbox (see inbox_search.py)."
+        ),
+    )
     last_seen_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-last_seen_at', '-updated_at']
+        indexes = [
+            models.Index(fields=['-received_at', '-id'], name='email_cache_received_idx'),
+        ]
 
     def __str__(self):
         return self.email_id
 
 
+class StoredAttachment(models.Model):
+    """
+    A per-message attachment filename mapped to its content-addressed blob.
+
+    See attachment_store.py.
+    """
+
+    filename = models.CharField(max_length=512, unique=True)
+    email_id = models.CharField(max_length=255, db_index=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    original_filename = models.CharField(max_length=512, blank=True, default='')
+    mime_type = models.CharField(max_length=255, blank=True, default='')
+    size = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.filename
+
+
 class VendorEmail(models.Model):
     vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='emails')
     email = models.EmailField(unique=True)
@@ -300,3 +369,30 @@ class VendorEmail(models.Model):
 
     class Meta:
         unique_together = ['vendor', 'email']
+
+
+class ParseResultCache(models.Model):
+    """Normalized parser output keyed by PDF content hash and parser code version."""
+
+    pdf_sha256 = models.CharField(max_length=64)
+    parser_method = models.CharField(max_length=255)
+    parser_version = models.CharField(max_length=64)
+    result = models.JSONField(default=dict, blank=True)
+    result_bytes = models.PositiveIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    last_used_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['pdf_sha256', 'parser_method', 'parser_version'],
+                name='unique_parse_result_cache_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['last_used_at'], name='parse_cache_last_used_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.parser_method} {self.pdf_sha256[:12]}"
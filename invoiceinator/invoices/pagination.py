@@ -1,7 +1,217 @@
+"""Pagination for the CRUD list endpoints.
+
+Page numbers (``?page=3``) stay the default. Two opt-ins keep deep lists cheap:
+
+* ``?cursor=`` (empty for the first page) switches to keyset pagination. Rows
+  are fetched with ``WHERE (ordering columns) < (last row's values)`` instead
+  of an ``OFFSET``, so every page costs the same as the first. The view's
+  ordering (``?ordering=`` included) is used with the primary key appended as a
+  tie-breaker, and ``next`` carries an opaque token for the following page.
+* ``?count=false`` skips the ``COUNT(*)``; the response then has no ``count``
+  and ``next`` is found by fetching one extra row.
+
+Keyset comparisons assume NULL sorts before every value, as it does on SQLite.
+"""
+
+import base64
+from datetime import date, datetime, time
+from decimal import Decimal
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+_FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def keyset_ordering(queryset):
+    """
+    The ordering of ``queryset`` as field names, ending with the primary key so
+    rows have a total order.
+    """
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    if any(not isinstance(term, str) or term == '?' for term in ordering):
+        raise ValueError('Keyset pagination needs an ordering made of field names.')
+    pk_names = {'pk', queryset.model._meta.pk.name}
+    if not any(term.lstrip('-') in pk_names for term in ordering):
+        ordering.append('-pk' if ordering and ordering[-1].startswith('-') else 'pk')
+    return ordering
+
+
+def _nullable(model, name):
+    if name == 'pk':
+        return False
+    try:
+        return model._meta.get_field(name).null
+    except FieldDoesNotExist:
+        # Related paths and annotations.
+        return True
+
+
+def _after(model, term, value):
+    """Rows that sort strictly after ``value`` on one ordering ``term``."""
+    name = term.lstrip('-')
+    if term.startswith('-'):
+        if value is None:
+            return models.Q(pk__in=[])
+        condition = models.Q(**{f'{name}__lt': value})
+        if _nullable(model, name):
+            condition |= models.Q(**{f'{name}__isnull': True})
+        return condition
+    if value is None:
+        return models.Q(**{f'{name}__isnull': False})
+    return models.Q(**{f'{name}__gt': value})
+
+
+def _equal(term, value):
+    name = term.lstrip('-')
+    if value is None:
+        return models.Q(**{f'{name}__isnull': True})
+    return models.Q(**{name: value})
+
+
+def keyset_after(model, ordering, values):
+    """Rows that sort after the row whose ``ordering`` values are ``values``."""
+    condition = models.Q(pk__in=[])
+    prefix = models.Q()
+    for term, value in zip(ordering, values):
+        condition |= prefix & _after(model, term, value)
+        prefix &= _equal(term, value)
+    return condition
+
+
+def ordering_value(row, term):
+    """The value ``row`` sorts by for an ordering ``term`` such as ``-vendor__name``."""
+    value = row
+    for attribute in term.lstrip('-').split('__'):
+        if value is None:
+            return None
+        value = value.pk if attribute == 'pk' else getattr(value, attribute)
+    return value.pk if isinstance(value, models.Model) else value
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'Cannot put {type(value).__name__} in a page cursor')
+
+
+def encode_cursor(ordering, values):
+    payload = json.dumps(
+        {'o': ordering, 'v': values}, default=_json_value, separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, ordering):
+    """
+    Ordering values from a token made by ``encode_cursor`` for the same
+    ``ordering``, else ``None``.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if payload['o'] != ordering or len(payload['v']) != len(ordering):
+            return None
+        return payload['v']
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError):
+        return None
 
 
 class DefaultPageNumberPagination(PageNumberPagination):
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 200
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page = None
+        self.total = None
+        self.include_count = (
+            request.query_params.get(self.count_query_param, '').lower() not in _FALSE_VALUES
+        )
+        if self.cursor_query_param in request.query_params:
+            return self._paginate_by_cursor(queryset, request)
+        if self.include_count:
+            return super().paginate_queryset(queryset, request, view)
+        return self._paginate_without_count(queryset, request)
+
+    def _paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        try:
+            number = int(request.query_params.get(self.page_query_param) or 1)
+        except ValueError:
+            number = 0
+        if number < 1:
+            raise NotFound(self.invalid_page_message)
+        start = (number - 1) * page_size
+        rows = list(queryset[start:start + page_size + 1])
+        if not rows and number > 1:
+            raise NotFound(self.invalid_page_message)
+
+        url = request.build_absolute_uri()
+        self._next_link = None
+        if len(rows) > page_size:
+            self._next_link = replace_query_param(url, self.page_query_param, number + 1)
+        if number == 1:
+            self._previous_link = None
+        elif number == 2:
+            self._previous_link = remove_query_param(url, self.page_query_param)
+        else:
+            self._previous_link = replace_query_param(url, self.page_query_param, number - 1)
+        return rows[:page_size]
+
+    def _paginate_by_cursor(self, queryset, request):
+        page_size = self.get_page_size(request)
+        ordering = keyset_ordering(queryset)
+        queryset = queryset.order_by(*ordering)
+        if self.include_count:
+            self.total = queryset.count()
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            values = decode_cursor(token, ordering)
+            if values is None:
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(keyset_after(queryset.model, ordering, values))
+
+        rows = list(queryset[:page_size + 1])
+        self._previous_link = None
+        self._next_link = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            cursor = encode_cursor(ordering, [ordering_value(rows[-1], term) for term in ordering])
+            self._next_link = replace_query_param(
+                request.build_absolute_uri(), self.cursor_query_param, cursor,
+            )
+        return rows
+
+    def get_next_link(self):
+        if self.page is not None:
+            return super().get_next_link()
+        return self._next_link
+
+    def get_previous_link(self):
+        if self.page is not None:
+            return super().get_previous_link()
+        return self._previous_link
+
+    def get_paginated_response(self, data):
+        if self.page is not None:
+            return super().get_paginated_response(data)
+        payload = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.include_count:
+            payload = {'count': self.total, **payload}
+        return Response(payload)
@@ -0,0 +1,178 @@
+"""Content-addressed cache of normalized parser output.
+
+Entries are keyed by the SHA-256 of the PDF bytes, the parser method name, and
+a hash of the ``invoices.parsers`` package source, so editing any parser module
+invalidates every cached result automatically. Only parsers that live in the
+parsers package are cached; ad-hoc callables always run.
+
+The size limits are enforced every ``PARSE_CACHE_EVICT_EVERY`` stores (and on
+the first store after the parser code changes) rather than after each one, so
+the table may briefly run that many rows over ``PARSE_CACHE_MAX_ENTRIES``.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import parsers as parser_module
+from .models import ParseResultCache
+from .parsers import normalize_parser_output
+from .parsers.service import run_parser
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_EVICT_EVERY = 100
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+_eviction_lock = threading.Lock()
+_stores_since_eviction = 0
+_evicted_version = None
+
+
+def file_sha256(file_path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def parser_code_version() -> str:
+    """SHA-256 over every ``.py`` file in the parsers package."""
+    package_dir = os.path.dirname(os.path.abspath(parser_module.__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(package_dir)):
+        if not name.endswith('.py'):
+            continue
+        digest.update(name.encode('utf-8'))
+        with open(os.path.join(package_dir, name), 'rb') as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()
+
+
+def _cache_enabled() -> bool:
+    return getattr(settings, 'PARSE_CACHE_ENABLED', True)
+
+
+def _is_cacheable(parser) -> bool:
+    module = getattr(parser, '__module__', '') or ''
+    return module.startswith(f'{parser_module.__name__}.') and bool(getattr(parser, '__name__', ''))
+
+
+def evict_parse_cache():
+    """Drop entries from older parser versions, then least-recently-used rows over the limits."""
+    ParseResultCache.objects.exclude(parser_version=parser_code_version()).delete()
+
+    max_entries = getattr(settings, 'PARSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+    max_bytes = getattr(settings, 'PARSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+    kept = 0
+    kept_bytes = 0
+    stale_ids = []
+    rows = ParseResultCache.objects.order_by('-last_used_at', '-id').values_list('id', 'result_bytes')
+    for row_id, result_bytes in rows.iterator():
+        if kept >= max_entries or kept_bytes + result_bytes > max_bytes:
+            stale_ids.append(row_id)
+            continue
+        kept += 1
+        kept_bytes += result_bytes
+    if stale_ids:
+        ParseResultCache.objects.filter(id__in=stale_ids).delete()
+
+
+def _eviction_due() -> bool:
+    """Count a store; True every ``PARSE_CACHE_EVICT_EVERY`` stores or after a parser change."""
+    global _stores_since_eviction, _evicted_version
+    every = max(1, getattr(settings, 'PARSE_CACHE_EVICT_EVERY', DEFAULT_EVICT_EVERY))
+    version = parser_code_version()
+    with _eviction_lock:
+        _stores_since_eviction += 1
+        if _stores_since_eviction < every and _evicted_version == version:
+            return False
+        _stores_since_eviction = 0
+        _evicted_version = version
+        return True
+
+
+def clear_parse_cache() -> int:
+    deleted, _ = ParseResultCache.objects.all().delete()
+    return deleted
+
+
+def parse_cache_key(parser, file_path, pdf_sha256=None):
+    """
+    Lookup key for ``parser`` on ``file_path``, or ``None`` when the result should not be cached.
+
+    Pass ``pdf_sha256`` when the digest is already known (e.g. hashed while the
+    attachment was written) to skip reading the file again.
+    """
+    if not _cache_enabled() or not _is_cacheable(parser):
+        return None
+    return {
+        'pdf_sha256': pdf_sha256 or file_sha256(file_path),
+        'parser_method': parser.__name__,
+        'parser_version': parser_code_version(),
+    }
+
+
+def cached_parse_result(key, vendor_name=None):
+    """Return the cached envelope for ``key`` (recording the hit), or ``None`` on a miss."""
+    if key is None:
+        return None
+    cached = ParseResultCache.objects.filter(**key).only('id', 'result').first()
+    if cached is None:
+        return None
+    ParseResultCache.objects.filter(pk=cached.pk).update(
+        hit_count=F('hit_count') + 1,
+        last_used_at=timezone.now(),
+    )
+    return normalize_parser_output(cached.result, vendor_name=vendor_name)
+
+
+def store_parse_result(key, parsed):
+    if key is None:
+        return
+    try:
+        with transaction.atomic():
+            ParseResultCache.objects.create(
+                **key,
+                result=parsed,
+                result_bytes=len(json.dumps(parsed, default=str)),
+                last_used_at=timezone.now(),
+            )
+    except IntegrityError:
+        pass
+    except (TypeError, ValueError):
+        logger.warning('Parser output for %s is not JSON-serializable; not cached', key['parser_method'])
+    else:
+        if _eviction_due():
+            evict_parse_cache()
+
+
+def parse_with_cache(parser, file_path, vendor_name=None, pdf_sha256=None):
+    """
+    Run ``parser`` on ``file_path`` and return the ``normalize_parser_output`` envelope,
+    reusing a cached envelope when the same PDF bytes were parsed by the same parser code.
+    Registered parsers run on the parse service (see ``parsers/service.py``).
+    """
+    vendor_name = getattr(parser, 'name', None) or vendor_name
+    key = parse_cache_key(parser, file_path, pdf_sha256)
+    cached = cached_parse_result(key, vendor_name=vendor_name)
+    if cached is not None:
+        return cached
+
+    parsed = run_parser(parser, file_path, vendor_name=vendor_name)
+    store_parse_result(key, parsed)
+    return parsed
@@ -1,9 +1,9 @@
 """
 Vendor-specific PDF invoice parsers.
 
-Each ``parse_*_invoice(pdf_path)`` returns a single invoice dict (or, for Wurth,
-``{"vendor_name", "invoices": [...]}``). The API normalizes all parser output via
-``normalize_parser_output()`` to:
+Each ``parse_*_invoice(pdf_path)`` accepts a path or a ``ParsedDocument`` and returns a
+single invoice dict (or, for Wurth, ``{"vendor_name", "invoices": [...]}``). The API
+normalizes all parser output via ``normalize_parser_output()`` to:
 
     {"vendor_name": "...", "invoices": [<invoice dict>, ...]}
 
@@ -12,24 +12,12 @@ invoice_due_date, cust_po, line_items.
 
 Each line item: id, name, description, qty, unit, unit_price, total_price,
 width, length, height.
+
+Parser modules are imported on first use through ``registry.PARSER_MODULES``,
+so importing this package stays cheap (no pymupdf or camelot until a parser runs).
 """
 
-from .advanced_machinery import parse_advanced_machinery_invoice
-from .allmoxy import parse_allmoxy_invoice
-from .american_saw import parse_american_saw_invoice
-from .bitdefender import parse_bitdefender_invoice
-from .crexendo import parse_crexendo_invoice
-from .edgebanding_services import parse_edgebanding_services_invoice
-from .element_designs import parse_element_designs_invoice
-from .generic import parse_generic_invoice
-from .hafele import parse_hafele_invoice
-from .high_mountain import parse_high_mountain_invoice
-from .mcmaster_carr import parse_mcmaster_carr_invoice
-from .industrial_tool_supply import parse_industrial_tool_supply_invoice
-from .intermountain import parse_intermountain_invoice
-from .ipaco import parse_ipaco_invoice
-from .rugby import parse_rugby_invoice
-from .weinig import parse_weinig_invoice
+from .registry import PARSER_MODULES, load_parser
 from .schema import (
     INVOICE_FIELDS,
     LINE_ITEM_ALIASES,
@@ -44,14 +32,10 @@ from .schema import (
     normalize_quantity,
     to_float,
 )
-from .sierra import parse_sierra_invoice
-from .sherwin import parse_sherwin_invoice
-from .wi_fiber import parse_wi_fiber_invoice
-from .wurth import parse_wurth_invoice
-from .yates_mouldings import parse_yates_mouldings_invoice
 
 __all__ = [
     "INVOICE_FIELDS",
+    "ParsedDocument",
     "LINE_ITEM_ALIASES",
     "PARSER_OUTPUT_FIELDS",
     "empty_invoice",
@@ -87,41 +71,17 @@ __all__ = [
     "parse_yates_mouldings_invoice",
 ]
 
-_PARSER_FUNCTIONS = [
-    parse_advanced_machinery_invoice,
-    parse_allmoxy_invoice,
-    parse_american_saw_invoice,
-    parse_bitdefender_invoice,
-    parse_crexendo_invoice,
-    parse_edgebanding_services_invoice,
-    parse_element_designs_invoice,
-    parse_generic_invoice,
-    parse_hafele_invoice,
-    parse_high_mountain_invoice,
-    parse_mcmaster_carr_invoice,
-    parse_industrial_tool_supply_invoice,
-    parse_intermountain_invoice,
-    parse_ipaco_invoice,
-    parse_rugby_invoice,
-    parse_weinig_invoice,
-    parse_sierra_invoice,
-    parse_sherwin_invoice,
-    parse_wi_fiber_invoice,
-    parse_wurth_invoice,
-    parse_yates_mouldings_invoice,
-]
-
 
 def list_invoice_parsers():
     """
     Return vendor parser callables exposed to the API.
 
     Only functions named parse_* with a display ``.name`` attribute are included.
+    Listing imports every parser module; heavy extraction libraries stay deferred.
     """
     parsers = []
-    for func in _PARSER_FUNCTIONS:
-        if not func.__name__.startswith("parse_"):
-            continue
+    for method in PARSER_MODULES:
+        func = load_parser(method)
         display_name = getattr(func, "name", None)
         if not display_name or not isinstance(display_name, str):
             continue
@@ -129,6 +89,17 @@ def list_invoice_parsers():
     return sorted(parsers, key=lambda entry: entry["name"].lower())
 
 
-# Register parse_* exports dynamically for getattr(parsers, "parse_*")
-for _func in _PARSER_FUNCTIONS:
-    globals()[_func.__name__] = _func
+def __getattr__(name):
+    # Resolve parse_* exports (getattr(parsers, "parse_*"), Vendor.parser) on first use.
+    if name in PARSER_MODULES:
+        value = load_parser(name)
+    elif name == "ParsedDocument":
+        from .pdf import ParsedDocument as value
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -196,3 +196,8 @@ def parse_advanced_machinery_invoice(pdf_path):
 
 
 parse_advanced_machinery_invoice.name = "Advanced Machinery"
+parse_advanced_machinery_invoice.fingerprints = (
+    "advanced-machinery.com",
+    "advanced machinery",
+    "kays drive",
+)
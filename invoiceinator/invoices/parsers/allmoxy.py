@@ -1,7 +1,7 @@
 """Allmoxy invoice parser."""
 
 from .allmoxy_common import _allmoxy_fill_invoice_metadata, _parse_allmoxy_style_line_items
-from .pdf import pdf_lines, pdf_text
+from .pdf import open_document, pdf_lines, pdf_text
 from .schema import empty_invoice, normalize_invoice
 
 
@@ -13,12 +13,19 @@ def parse_allmoxy_invoice(pdf_path):
     optional Cab # and extra columns (Panels Wide, Hinge, etc.), qty-only rows,
     split multi-line headers, Folder or product-type section titles, and $0.00 lines.
     """
-    lines = pdf_lines(pdf_path)
-    full_text = pdf_text(pdf_path)
-    result = empty_invoice("Allmoxy")  # fallback when PDF has no seller block
-    _allmoxy_fill_invoice_metadata(result, lines, full_text)
-    result["line_items"] = _parse_allmoxy_style_line_items(lines)
-    return normalize_invoice(result)
+    with open_document(pdf_path) as document:
+        lines = pdf_lines(document)
+        full_text = pdf_text(document)
+        result = empty_invoice("Allmoxy")  # fallback when PDF has no seller block
+        _allmoxy_fill_invoice_metadata(result, lines, full_text)
+        result["line_items"] = _parse_allmoxy_style_line_items(lines)
+        return normalize_invoice(result)
 
 
 parse_allmoxy_invoice.name = "Allmoxy"
+parse_allmoxy_invoice.fingerprints = (
+    "order name:",
+    "order status:",
+    "order totals",
+    "tracking number",
+)
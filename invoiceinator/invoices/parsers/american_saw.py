@@ -51,3 +51,4 @@ def parse_american_saw_invoice(pdf_path):
 
 
 parse_american_saw_invoice.name = "American Saw & Hammering"
+parse_american_saw_invoice.fingerprints = ("american saw", "hammering inc")
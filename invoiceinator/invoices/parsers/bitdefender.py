@@ -85,3 +85,4 @@ def parse_bitdefender_invoice(pdf_path):
 
 
 parse_bitdefender_invoice.name = "Bitdefender"
+parse_bitdefender_invoice.fingerprints = ("bitdefender", "2checkout", "avangate")
@@ -1,66 +1,190 @@
-"""Camelot table extraction for code-based invoice tables."""
+"""Camelot table extraction for code-based invoice tables.
 
+Camelot is slow (lattice renders each page through Ghostscript/OpenCV), so it is
+aimed rather than sprayed: pymupdf text finds the pages with a "Code" header row,
+``lattice`` reads only those pages, and ``stream`` (run only when lattice finds
+no code table) reads only the region from the header down. Both share a soft
+wall-clock budget (``CAMELOT_TIME_BUDGET`` seconds): it is checked before each
+page, so a page already being read is allowed to finish.
+"""
+
+import logging
+import os
 import re
+import time
 
-import camelot
+from .pdf import open_document
 
-def _parse_camelot_code_tables(pdf_path):
-    """Extract line items from tables whose header row contains 'code'."""
-    line_items = []
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAMELOT_TIME_BUDGET = 20.0
+# Points above the header row included in the stream table area.
+_REGION_MARGIN = 4.0
+_HEADER_COMPANION_RE = re.compile(r"\b(?:description|ordered|shipped|qty|quantity|unit|price)\b", re.IGNORECASE)
+_CODE_RE = re.compile(r"\bcode\b", re.IGNORECASE)
+
+
+def camelot_time_budget():
+    """Seconds camelot may spend on one PDF across both flavors."""
+    try:
+        value = float(os.environ.get("CAMELOT_TIME_BUDGET", DEFAULT_CAMELOT_TIME_BUDGET))
+    except ValueError:
+        return DEFAULT_CAMELOT_TIME_BUDGET
+    return value if value > 0 else DEFAULT_CAMELOT_TIME_BUDGET
+
+
+def _code_table_line_items(rows):
+    """Line items from a table grid (list of rows of cells) whose first row is the code header."""
+    header_row = rows[0]
+    header_map = {}
+    for idx, col in enumerate(header_row):
+        col_lower = str(col).strip().lower()
+        if "code" in col_lower:
+            header_map["id"] = idx
+        if "description" in col_lower:
+            header_map["description"] = idx
+        if re.search(r"\bordered\b", col_lower) or re.search(r"\bshipped\b", col_lower):
+            header_map["qty"] = idx
+        if "unit price" in col_lower:
+            header_map["unit_price"] = idx
+        if (("ext" in col_lower) or ("total price" in col_lower)) and not col_lower.startswith("total"):
+            header_map["total_price"] = idx
+        if "unit" in col_lower and "price" not in col_lower:
+            header_map["unit"] = idx
+
+    items = []
+    for i in range(1, len(rows)):
+        row = rows[i]
+        first_cell = str(row[0]).strip().lower()
+        if first_cell.startswith("total"):
+            break
+        row_text = " ".join(str(cell) for cell in row if cell)
+        if not re.search(r"\d", row_text):
+            continue
+
+        item = {}
+        for key, col_idx in header_map.items():
+            cell_val = str(row[col_idx]).strip() if col_idx < len(row) else ""
+            parts = [s.strip() for s in re.split(r"[\n\r]+", cell_val) if s.strip()]
+            item[key] = " ".join(parts)
+
+        if item.get("description"):
+            desc_parts = [p.strip() for p in re.split(r"[\n\r]+", item["description"]) if p.strip()]
+            if not item.get("name"):
+                item["name"] = desc_parts[0] if desc_parts else ""
+            item["description"] = " ".join(desc_parts[1:]) if len(desc_parts) > 1 else ""
+
+        if item.get("id") or item.get("description"):
+            items.append(item)
+    return items
 
-    def dynamic_line_item_parser(df):
-        header_row = df.iloc[0].tolist()
-        header_map = {}
-        for idx, col in enumerate(header_row):
-            col_lower = str(col).strip().lower()
-            if "code" in col_lower:
-                header_map["id"] = idx
-            if "description" in col_lower:
-                header_map["description"] = idx
-            if re.search(r"\bordered\b", col_lower) or re.search(r"\bshipped\b", col_lower):
-                header_map["qty"] = idx
-            if "unit price" in col_lower:
-                header_map["unit_price"] = idx
-            if (("ext" in col_lower) or ("total price" in col_lower)) and not col_lower.startswith("total"):
-                header_map["total_price"] = idx
-            if "unit" in col_lower and "price" not in col_lower:
-                header_map["unit"] = idx
-
-        items = []
-        for i in range(1, len(df)):
-            row = df.iloc[i].tolist()
-            first_cell = str(row[0]).strip().lower()
-            if first_cell.startswith("total"):
-                break
-            row_text = " ".join(str(cell) for cell in row if cell)
-            if not re.search(r"\d", row_text):
-                continue
 
-            item = {}
-            for key, col_idx in header_map.items():
-                cell_val = str(row[col_idx]).strip() if col_idx < len(row) else ""
-                parts = [s.strip() for s in re.split(r"[\n\r]+", cell_val) if s.strip()]
-                item[key] = " ".join(parts)
+def _word_rows(words):
+    """Group pymupdf word tuples into visual rows (by vertical midpoint), each sorted left to right."""
+    rows = []
+    for entry in sorted(words, key=lambda entry: ((entry[1] + entry[3]) / 2, entry[0])):
+        middle = (entry[1] + entry[3]) / 2
+        if rows and abs(middle - rows[-1][0]) <= max(2.0, (entry[3] - entry[1]) / 3):
+            rows[-1][1].append(entry)
+        else:
+            rows.append([middle, [entry]])
+    return [sorted(row_words, key=lambda entry: entry[0]) for _middle, row_words in rows]
 
-            if item.get("description"):
-                desc_parts = [p.strip() for p in re.split(r"[\n\r]+", item["description"]) if p.strip()]
-                if not item.get("name"):
-                    item["name"] = desc_parts[0] if desc_parts else ""
-                item["description"] = " ".join(desc_parts[1:]) if len(desc_parts) > 1 else ""
 
-            if item.get("id") or item.get("description"):
-                items.append(item)
-        return items
+def _row_text(row):
+    return " ".join(entry[4] for entry in row)
 
+
+def _is_code_header(text):
+    return bool(_CODE_RE.search(text)) and bool(_HEADER_COMPANION_RE.search(text))
+
+
+def code_table_regions(document):
+    """
+    ``[(page_number, "x1,y1,x2,y2"), ...]`` for pages whose text has a code header row.
+
+    Page numbers are 1-based; areas are camelot ``table_areas`` in PDF points
+    (origin bottom-left), spanning the page width from just above the first
+    header row to the bottom of the page.
+    """
+    regions = []
+    for page_index in range(document.page_count):
+        header_tops = [
+            min(entry[1] for entry in row)
+            for row in _word_rows(document.page_words(page_index))
+            if _is_code_header(_row_text(row))
+        ]
+        if not header_tops:
+            continue
+        rect = document.page(page_index).rect
+        top = rect.height - max(0.0, min(header_tops) - _REGION_MARGIN)
+        regions.append((page_index + 1, f"0,{top:.1f},{rect.width:.1f},0"))
+    return regions
+
+
+def extract_code_tables(pdf_path, budget=None):
+    """
+    Camelot tables whose header row contains "code", read only from targeted pages and regions.
+
+    Returns ``(tables, timings)``; ``timings`` maps each flavor that ran to the
+    seconds it took. ``stream`` is skipped once ``lattice`` finds a code table, and
+    no further pages are read once ``budget`` (default ``camelot_time_budget()``)
+    is spent. The budget is soft: camelot cannot be interrupted mid-page, so one
+    slow ``read_pdf`` call can run past it.
+    """
+    budget = camelot_time_budget() if budget is None else budget
+    with open_document(pdf_path) as document:
+        regions = code_table_regions(document)
+    timings = {}
+    if not regions:
+        return [], timings
+
+    # camelot pulls in pandas/OpenCV; import it only when a table is actually read.
+    import camelot
+
+    deadline = time.perf_counter() + budget
     tables = []
     for flavor in ("lattice", "stream"):
-        try:
-            tables.extend(camelot.read_pdf(pdf_path, pages="all", flavor=flavor))
-        except Exception:
-            pass
+        started = time.perf_counter()
+        for page_number, area in regions:
+            if time.perf_counter() >= deadline:
+                logger.info(
+                    "camelot budget of %.1fs spent on %s; skipping the rest", budget, document.path
+                )
+                break
+            # Lattice finds ruled tables by their lines and mangles them when clipped to an
+            # area, so it reads the whole page; stream reads only the region under the header.
+            options = {"table_areas": [area]} if flavor == "stream" else {}
+            try:
+                found = camelot.read_pdf(
+                    document.path, pages=str(page_number), flavor=flavor, **options
+                )
+            except Exception:
+                logger.debug(
+                    "camelot %s failed on %s page %s",
+                    flavor, document.path, page_number, exc_info=True,
+                )
+                continue
+            tables.extend(
+                table for table in found
+                if "code" in " ".join(str(cell) for cell in table.df.iloc[0].tolist()).lower()
+            )
+        timings[flavor] = time.perf_counter() - started
+        if tables or time.perf_counter() >= deadline:
+            break
+    return tables, timings
+
 
+def _parse_camelot_code_tables(pdf_path):
+    """Extract line items from tables whose header row contains 'code'."""
+    tables, timings = extract_code_tables(pdf_path)
+    if timings:
+        logger.info(
+            "camelot on %s: %s",
+            pdf_path,
+            ", ".join(f"{flavor} {seconds:.2f}s" for flavor, seconds in timings.items()),
+        )
+    line_items = []
     for table in tables:
-        header_row_text = " ".join(str(x) for x in table.df.iloc[0].tolist()).lower()
-        if "code" in header_row_text:
-            line_items.extend(dynamic_line_item_parser(table.df))
+        line_items.extend(_code_table_line_items(table.df.values.tolist()))
     return line_items
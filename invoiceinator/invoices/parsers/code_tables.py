@@ -0,0 +1,56 @@
+"""Per-vendor choice of code-table backend.
+
+``pymupdf`` rebuilds tables from page words (``word_tables``; no rendering),
+``camelot`` runs the targeted camelot engine (``camelot_tables``), and ``auto``
+tries pymupdf first and falls back to camelot when it yields no line items.
+Defaults live in ``VENDOR_TABLE_BACKENDS``. Override them with
+``CODE_TABLE_BACKENDS``, e.g. ``CODE_TABLE_BACKENDS=sierra=camelot``. Vendors
+without an entry use camelot.
+"""
+
+import logging
+import os
+
+from .camelot_tables import _code_table_line_items, _parse_camelot_code_tables
+from .word_tables import word_code_tables
+
+logger = logging.getLogger(__name__)
+
+TABLE_BACKENDS = ("auto", "camelot", "pymupdf")
+DEFAULT_TABLE_BACKEND = "camelot"
+VENDOR_TABLE_BACKENDS = {
+    "sierra": "auto",
+}
+
+
+def table_backend(vendor):
+    """Backend for ``vendor``: ``CODE_TABLE_BACKENDS`` entry, else the built-in default."""
+    overrides = {}
+    for entry in os.environ.get("CODE_TABLE_BACKENDS", "").split(","):
+        key, _sep, backend = entry.partition("=")
+        key, backend = key.strip().lower(), backend.strip().lower()
+        if not key:
+            continue
+        if backend not in TABLE_BACKENDS:
+            logger.warning("Ignoring CODE_TABLE_BACKENDS entry %r: backend must be one of %s", entry, TABLE_BACKENDS)
+            continue
+        overrides[key] = backend
+    return overrides.get(vendor, VENDOR_TABLE_BACKENDS.get(vendor, DEFAULT_TABLE_BACKEND))
+
+
+def _parse_word_code_tables(pdf_path):
+    line_items = []
+    for grid in word_code_tables(pdf_path):
+        line_items.extend(_code_table_line_items(grid))
+    return line_items
+
+
+def parse_code_tables(pdf_path, vendor):
+    """Line items from the PDF's "Code" header tables, using ``vendor``'s backend."""
+    backend = table_backend(vendor)
+    if backend == "camelot":
+        return _parse_camelot_code_tables(pdf_path)
+    line_items = _parse_word_code_tables(pdf_path)
+    if line_items or backend == "pymupdf":
+        return line_items
+    return _parse_camelot_code_tables(pdf_path)
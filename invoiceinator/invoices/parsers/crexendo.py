@@ -68,3 +68,4 @@ def parse_crexendo_invoice(pdf_path):
 
 
 parse_crexendo_invoice.name = "Crexendo Business Solutions"
+parse_crexendo_invoice.fingerprints = ("crexendo", "billcenter.net")
@@ -2,9 +2,7 @@
 
 import re
 
-import pymupdf as fitz
-
-from .pdf import pdf_lines, pdf_text
+from .pdf import open_document, pdf_lines, pdf_text
 from .schema import empty_invoice, make_line_item, normalize_invoice, to_float
 
 _VENDOR = "Edgebanding Services"
@@ -29,9 +27,10 @@ _PRICE_X_MAX = 520
 
 
 def _eb_spans(pdf_path):
-    page = fitz.open(pdf_path)[0]
     spans = []
-    for block in page.get_text("dict")["blocks"]:
+    with open_document(pdf_path) as document:
+        blocks = document.page_dict(0)["blocks"]
+    for block in blocks:
         if "lines" not in block:
             continue
         for line in block["lines"]:
@@ -198,12 +197,18 @@ def _eb_parse_line_items(spans):
 
 def parse_edgebanding_services_invoice(pdf_path):
     """Edgebanding Services Inc (ESI-Utah) invoices with multi-line descriptions."""
-    lines = pdf_lines(pdf_path)
-    text = pdf_text(pdf_path)
-    result = empty_invoice(_VENDOR)
-    _eb_fill_metadata(result, lines, text)
-    result["line_items"] = _eb_parse_line_items(_eb_spans(pdf_path))
-    return normalize_invoice(result)
+    with open_document(pdf_path) as document:
+        lines = pdf_lines(document)
+        text = pdf_text(document)
+        result = empty_invoice(_VENDOR)
+        _eb_fill_metadata(result, lines, text)
+        result["line_items"] = _eb_parse_line_items(_eb_spans(document))
+        return normalize_invoice(result)
 
 
 parse_edgebanding_services_invoice.name = "Edgebanding Services"
+parse_edgebanding_services_invoice.fingerprints = (
+    "edgebanding-services.com",
+    "edgebanding services",
+    "esi-utah",
+)
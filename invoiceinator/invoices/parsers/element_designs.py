@@ -273,3 +273,8 @@ def parse_element_designs_invoice(pdf_path):
 
 
 parse_element_designs_invoice.name = "Element Designs"
+parse_element_designs_invoice.fingerprints = (
+    "element designs",
+    "element-designs.com",
+    "logistics lane",
+)
@@ -0,0 +1,49 @@
+"""Cheap text fingerprints for routing a PDF to its vendor parser.
+
+Vendor parsers declare signatures next to their display name::
+
+    parse_foo_invoice.fingerprints = ("foo-supply.com", "foo supply", re.compile(r"\\bFS\\d{6}\\b"))
+
+Plain strings match case-insensitively anywhere in the PDF text (company
+names, domains, header labels); compiled patterns are searched as given.
+``build_fingerprint_index`` compiles every parser's signatures once, and
+``rank_parsers`` scores a document by how many distinct signatures hit.
+"""
+
+import re
+
+from .pdf import pdf_text
+
+
+def _compile_signature(signature):
+    if isinstance(signature, re.Pattern):
+        return signature
+    return re.compile(re.escape(str(signature)), re.IGNORECASE)
+
+
+def build_fingerprint_index(parsers):
+    """Return ``((parser, (pattern, ...)), ...)`` for parsers that declare fingerprints."""
+    index = []
+    for parser in parsers:
+        signatures = getattr(parser, "fingerprints", None) or ()
+        patterns = tuple(_compile_signature(signature) for signature in signatures)
+        if patterns:
+            index.append((parser, patterns))
+    return tuple(index)
+
+
+def rank_parsers(index, pdf_path):
+    """
+    Parsers whose fingerprints appear in the PDF text, best match first.
+
+    Returns ``[(parser, hits), ...]`` with ``hits > 0``, ordered by hit count and
+    then by the fraction of the parser's signatures that matched.
+    """
+    text = pdf_text(pdf_path)
+    ranked = []
+    for parser, patterns in index:
+        hits = sum(1 for pattern in patterns if pattern.search(text))
+        if hits:
+            ranked.append((parser, hits, hits / len(patterns)))
+    ranked.sort(key=lambda entry: (-entry[1], -entry[2], entry[0].__name__))
+    return [(parser, hits) for parser, hits, _ in ranked]
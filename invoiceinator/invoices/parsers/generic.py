@@ -1,8 +1,10 @@
 """Generic invoice parser fallback.
 
-The generic parser first tries known vendor-specific parsers using text cues,
-then falls back to a layout-agnostic parser that handles common invoice table
-shapes like QuickBooks exports and simple line-item summaries.
+The generic parser first routes the PDF to vendor-specific parsers whose
+``fingerprints`` match the text, sweeps every known parser only when no
+fingerprinted match scores well, then falls back to a layout-agnostic parser
+that handles common invoice table shapes like QuickBooks exports and simple
+line-item summaries.
 """
 
 from __future__ import annotations
@@ -10,51 +12,21 @@ from __future__ import annotations
 import os
 import re
 
-from .advanced_machinery import parse_advanced_machinery_invoice
-from .allmoxy import parse_allmoxy_invoice
-from .american_saw import parse_american_saw_invoice
-from .bitdefender import parse_bitdefender_invoice
-from .crexendo import parse_crexendo_invoice
-from .edgebanding_services import parse_edgebanding_services_invoice
-from .element_designs import parse_element_designs_invoice
-from .hafele import parse_hafele_invoice
-from .high_mountain import parse_high_mountain_invoice
-from .mcmaster_carr import parse_mcmaster_carr_invoice
-from .industrial_tool_supply import parse_industrial_tool_supply_invoice
-from .intermountain import parse_intermountain_invoice
-from .ipaco import parse_ipaco_invoice
-from .pdf import pdf_lines, pdf_text
-from .rugby import parse_rugby_invoice
-from .weinig import parse_weinig_invoice
+from .fingerprints import build_fingerprint_index, rank_parsers
+from .parallel import evaluate_parsers, parallel_workers
+from .pdf import open_document, pdf_lines, pdf_text
+from .registry import vendor_parsers
 from .schema import empty_invoice, make_line_item, normalize_invoice, normalize_parser_output, to_float
-from .sierra import parse_sierra_invoice
-from .sherwin import parse_sherwin_invoice
-from .wi_fiber import parse_wi_fiber_invoice
-from .wurth import parse_wurth_invoice
-from .yates_mouldings import parse_yates_mouldings_invoice
-
-_PARSER_CANDIDATES = (
-    parse_advanced_machinery_invoice,
-    parse_allmoxy_invoice,
-    parse_american_saw_invoice,
-    parse_bitdefender_invoice,
-    parse_crexendo_invoice,
-    parse_edgebanding_services_invoice,
-    parse_element_designs_invoice,
-    parse_hafele_invoice,
-    parse_high_mountain_invoice,
-    parse_mcmaster_carr_invoice,
-    parse_industrial_tool_supply_invoice,
-    parse_intermountain_invoice,
-    parse_ipaco_invoice,
-    parse_rugby_invoice,
-    parse_weinig_invoice,
-    parse_sierra_invoice,
-    parse_sherwin_invoice,
-    parse_wi_fiber_invoice,
-    parse_wurth_invoice,
-    parse_yates_mouldings_invoice,
-)
+
+_PARSER_CANDIDATES = vendor_parsers()
+_FINGERPRINT_INDEX = build_fingerprint_index(_PARSER_CANDIDATES)
+# Fingerprint matches to try before considering a full sweep.
+_FINGERPRINT_CANDIDATES = 2
+# Under _score_result one invoice reaches 8 with a line item plus its number and
+# vendor name, two items plus a number or total, or three items alone; without
+# line items it never does. Below this a fingerprinted match is not trusted and
+# every candidate parser is tried.
+_CONFIDENT_SCORE = 8
 
 _COMPANY_SUFFIX_RE = re.compile(
     r"\b(?:inc\.?|llc|l\.l\.c\.|co\.?|company|corp\.?|corporation|ltd\.?|limited)\b",
@@ -369,68 +341,69 @@ def _parse_block(block, item_index):
 
 
 def _generic_fallback_parse(pdf_path):
-    lines = pdf_lines(pdf_path)
-    text = pdf_text(pdf_path)
-    vendor_name = _extract_vendor_name(lines, text)
-    result = empty_invoice(vendor_name or "Generic")
-
-    result["invoice_number"] = _extract_invoice_number(text)
-    result["date_ordered"] = _extract_date_value(
-        text,
-        (
-            r"Invoice date\s*[:.]?\s*([0-9/.-]+)",
-            r"Date ordered\s*[:.]?\s*([0-9/.-]+)",
-            r"\bDATE\s*\n\s*([0-9/.-]+)",
-        ),
-    )
-    result["ship_date"] = _extract_date_value(
-        text,
-        (
-            r"Ship date\s*[:.]?\s*([0-9/.-]+)",
-            r"\bShip\s*\n\s*([0-9/.-]+)",
-        ),
-    )
-    result["invoice_due_date"] = _extract_date_value(
-        text,
-        (
-            r"Due date\s*[:.]?\s*([0-9/.-]+)",
-            r"Payment due\s*[:.]?\s*([0-9/.-]+)",
-        ),
-    )
-    result["cust_po"] = _extract_value_by_pattern(
-        text,
-        (
-            r"P\.?O\.?\s*Number\s*[:.]?\s*([^\n]+)",
-            r"PO\s*Number\s*[:.]?\s*([^\n]+)",
-            r"Project\s*[:.]?\s*([^\n]+)",
-            r"Customer PO\s*[:.]?\s*([^\n]+)",
-        ),
-    )
-    result["invoice_total"] = _extract_total(text)
-
-    table_start = _find_table_start(lines)
-    if table_start >= 0:
-        blocks = _collect_item_blocks(lines, table_start)
-        for idx, block in enumerate(blocks, start=1):
-            parsed = _parse_block(block, idx)
-            if parsed:
-                result["line_items"].append(parsed)
-
-    if not result["line_items"]:
-        money_lines = [line for line in lines if _looks_like_money(line)]
-        if len(money_lines) >= 2:
-            result["line_items"].append(
-                make_line_item(
-                    item_id=_slugify(result.get("invoice_number") or os.path.basename(pdf_path)),
-                    name=result.get("vendor_name") or "Invoice",
-                    description=result.get("cust_po") or "",
-                    qty="1",
-                    unit_price=money_lines[-2],
-                    total_price=money_lines[-1],
+    with open_document(pdf_path) as document:
+        lines = pdf_lines(document)
+        text = pdf_text(document)
+        vendor_name = _extract_vendor_name(lines, text)
+        result = empty_invoice(vendor_name or "Generic")
+
+        result["invoice_number"] = _extract_invoice_number(text)
+        result["date_ordered"] = _extract_date_value(
+            text,
+            (
+                r"Invoice date\s*[:.]?\s*([0-9/.-]+)",
+                r"Date ordered\s*[:.]?\s*([0-9/.-]+)",
+                r"\bDATE\s*\n\s*([0-9/.-]+)",
+            ),
+        )
+        result["ship_date"] = _extract_date_value(
+            text,
+            (
+                r"Ship date\s*[:.]?\s*([0-9/.-]+)",
+                r"\bShip\s*\n\s*([0-9/.-]+)",
+            ),
+        )
+        result["invoice_due_date"] = _extract_date_value(
+            text,
+            (
+                r"Due date\s*[:.]?\s*([0-9/.-]+)",
+                r"Payment due\s*[:.]?\s*([0-9/.-]+)",
+            ),
+        )
+        result["cust_po"] = _extract_value_by_pattern(
+            text,
+            (
+                r"P\.?O\.?\s*Number\s*[:.]?\s*([^\n]+)",
+                r"PO\s*Number\s*[:.]?\s*([^\n]+)",
+                r"Project\s*[:.]?\s*([^\n]+)",
+                r"Customer PO\s*[:.]?\s*([^\n]+)",
+            ),
+        )
+        result["invoice_total"] = _extract_total(text)
+
+        table_start = _find_table_start(lines)
+        if table_start >= 0:
+            blocks = _collect_item_blocks(lines, table_start)
+            for idx, block in enumerate(blocks, start=1):
+                parsed = _parse_block(block, idx)
+                if parsed:
+                    result["line_items"].append(parsed)
+
+        if not result["line_items"]:
+            money_lines = [line for line in lines if _looks_like_money(line)]
+            if len(money_lines) >= 2:
+                result["line_items"].append(
+                    make_line_item(
+                        item_id=_slugify(result.get("invoice_number") or os.path.basename(document.path)),
+                        name=result.get("vendor_name") or "Invoice",
+                        description=result.get("cust_po") or "",
+                        qty="1",
+                        unit_price=money_lines[-2],
+                        total_price=money_lines[-1],
+                    )
                 )
-            )
 
-    return normalize_invoice(result)
+        return normalize_invoice(result)
 
 
 def _candidate_sort_key(parser, text_lower):
@@ -440,13 +413,22 @@ def _candidate_sort_key(parser, text_lower):
     return (-score, name.lower(), parser.__name__)
 
 
-def _score_result(result):
+def _result_invoices(result):
     if isinstance(result, dict) and "invoices" in result:
-        invoices = result.get("invoices") or []
-    elif isinstance(result, dict):
-        invoices = [result]
-    else:
-        invoices = []
+        return result.get("invoices") or []
+    if isinstance(result, dict):
+        return [result]
+    return []
+
+
+def _line_items_match_total(invoice, line_items):
+    total = to_float(invoice.get("invoice_total"))
+    line_sum = sum(to_float(item.get("total_price")) for item in line_items)
+    return bool(total) and abs(line_sum - total) <= max(0.05, abs(total) * 0.05)
+
+
+def _score_result(result):
+    invoices = _result_invoices(result)
     if not invoices:
         return -999
 
@@ -462,31 +444,41 @@ def _score_result(result):
         if line_items:
             score += min(len(line_items), 8) * 2
             score += 2
-            total = to_float(invoice.get("invoice_total"))
-            line_sum = sum(to_float(item.get("total_price")) for item in line_items)
-            if total and abs(line_sum - total) <= max(0.05, abs(total) * 0.05):
+            if _line_items_match_total(invoice, line_items):
                 score += 3
         else:
             score -= 6
     return score
 
 
-def parse_generic_invoice(pdf_path):
-    """
-    Try the best available parser for ``pdf_path`` and fall back to a generic
-    table/text parser when no vendor-specific parser fits.
-    """
-    text = pdf_text(pdf_path)
-    text_lower = text.lower()
+def _is_good_enough(result):
+    """Every invoice has a number and line items that sum to its total."""
+    invoices = _result_invoices(result)
+    return bool(invoices) and all(
+        invoice.get("invoice_number")
+        and invoice.get("line_items")
+        and _line_items_match_total(invoice, invoice["line_items"])
+        for invoice in invoices
+    )
 
-    ordered_parsers = sorted(_PARSER_CANDIDATES, key=lambda parser: _candidate_sort_key(parser, text_lower))
 
-    best_result = None
-    best_score = -999
-
-    for parser in ordered_parsers:
+def _best_parser_result(document, parsers, best_result=None, best_score=-999):
+    workers = parallel_workers()
+    if workers > 1 and len(parsers) > 1:
+        result, score = evaluate_parsers(
+            document.path,
+            parsers,
+            workers=workers,
+            scorer=_score_result,
+            good_enough=_is_good_enough,
+        )
+        if result is not None and score > best_score:
+            return result, score
+        return best_result, best_score
+
+    for parser in parsers:
         try:
-            raw = parser(pdf_path)
+            raw = parser(document)
             result = normalize_parser_output(raw, vendor_name=getattr(parser, "name", None))
             score = _score_result(result)
             if score > best_score:
@@ -494,8 +486,26 @@ def parse_generic_invoice(pdf_path):
                 best_result = result
         except Exception:
             continue
-
-    generic_result = _generic_fallback_parse(pdf_path)
+    return best_result, best_score
+
+
+def _parse_generic_document(document):
+    matched = [
+        parser for parser, _hits in rank_parsers(_FINGERPRINT_INDEX, document)
+    ][:_FINGERPRINT_CANDIDATES]
+    best_result, best_score = _best_parser_result(document, matched)
+    candidates_tried = len(matched)
+
+    if best_score < _CONFIDENT_SCORE:
+        text_lower = pdf_text(document).lower()
+        remaining = sorted(
+            (parser for parser in _PARSER_CANDIDATES if parser not in matched),
+            key=lambda parser: _candidate_sort_key(parser, text_lower),
+        )
+        best_result, best_score = _best_parser_result(document, remaining, best_result, best_score)
+        candidates_tried += len(remaining)
+
+    generic_result = _generic_fallback_parse(document)
     generic_result_bundle = normalize_parser_output(
         generic_result,
         vendor_name=generic_result.get("vendor_name") or None,
@@ -503,8 +513,23 @@ def parse_generic_invoice(pdf_path):
     generic_score = _score_result(generic_result_bundle)
 
     if generic_score >= best_score or best_result is None:
-        return generic_result_bundle
-    return best_result
+        return {**generic_result_bundle, "candidates_tried": candidates_tried}
+    return {**best_result, "candidates_tried": candidates_tried}
+
+
+def parse_generic_invoice(pdf_path):
+    """
+    Try the best available parser for ``pdf_path`` and fall back to a generic
+    table/text parser when no vendor-specific parser fits.
+
+    The PDF is opened once and the same ``ParsedDocument`` is handed to every
+    candidate, so page text is extracted a single time per call. With
+    ``INVOICE_PARSER_WORKERS`` set, candidates run on a process pool instead
+    (see ``parsers.parallel``). The envelope's ``candidates_tried`` counts the
+    vendor parsers run before choosing.
+    """
+    with open_document(pdf_path) as document:
+        return _parse_generic_document(document)
 
 
 parse_generic_invoice.name = "Generic"
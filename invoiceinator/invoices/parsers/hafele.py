@@ -2,7 +2,7 @@
 
 import re
 
-from .pdf import pdf_lines, pdf_text
+from .pdf import open_document, pdf_lines, pdf_text
 from .schema import empty_invoice, make_line_item, normalize_invoice, to_float
 
 _ARTICLE_RE = re.compile(r"^\d{3}\.\d{2}\.\d{3}$")
@@ -98,63 +98,68 @@ def _collect_description(lines, start):
 
 def parse_hafele_invoice(pdf_path):
     """Hafele America Co. — multi-page POS/quantity/article invoices."""
-    lines = pdf_lines(pdf_path)
-    result = empty_invoice("Hafele America Co.")
-
-    for i, line in enumerate(lines):
-        if not result["invoice_number"] and line == "Invoice-No":
-            for j in range(i + 1, min(i + 6, len(lines))):
-                if re.match(r"^\d{6,}$", lines[j]):
-                    result["invoice_number"] = lines[j]
-                    break
-        if not result["date_ordered"] and line == "Date" and i > 0 and lines[i - 1] == "Invoice-No":
-            for j in range(i + 1, min(i + 5, len(lines))):
-                if re.search(r"[A-Za-z]{3,}.*\d{4}", lines[j]):
-                    result["date_ordered"] = lines[j]
-                    break
-
-    result["cust_po"] = _cust_po_from_lines(lines)
-
-    m = re.search(r"USD\s*\n\s*([\d,]+\.\d{2})", pdf_text(pdf_path))
-    if m:
-        result["invoice_total"] = m.group(1).replace(",", "")
-
-    seen_pos = set()
-    for i in range(len(lines)):
-        if not _is_line_item_start(lines, i):
-            continue
-
-        pos = lines[i]
-        if pos in seen_pos:
-            continue
-        seen_pos.add(pos)
-
-        article_no = lines[i + 3]
-
-        qty = lines[i + 1]
-        unit = lines[i + 2]
-        unit_price = _parse_unit_price(lines[i + 7])
-        amount = lines[i + 8]
-        if not _AMOUNT_RE.match(amount) and not (amount.replace(",", "").replace(".", "").isdigit()):
-            continue
-
-        desc = _collect_description(lines, i + 9)
-        job_id, job_name = _job_above_line_item(lines, i)
-        result["line_items"].append(
-            make_line_item(
-                item_id=article_no,
-                name=desc.split(",")[0] if desc else article_no,
-                description=desc,
-                job_id=job_id,
-                job=job_name,
-                qty=qty,
-                unit=unit,
-                unit_price=unit_price,
-                total_price=amount,
+    with open_document(pdf_path) as document:
+        lines = pdf_lines(document)
+        result = empty_invoice("Hafele America Co.")
+
+        for i, line in enumerate(lines):
+            if not result["invoice_number"] and line == "Invoice-No":
+                for j in range(i + 1, min(i + 6, len(lines))):
+                    if re.match(r"^\d{6,}$", lines[j]):
+                        result["invoice_number"] = lines[j]
+                        break
+            if (
+                not result["date_ordered"] and line == "Date" and i > 0
+                and lines[i - 1] == "Invoice-No"
+            ):
+                for j in range(i + 1, min(i + 5, len(lines))):
+                    if re.search(r"[A-Za-z]{3,}.*\d{4}", lines[j]):
+                        result["date_ordered"] = lines[j]
+                        break
+
+        result["cust_po"] = _cust_po_from_lines(lines)
+
+        m = re.search(r"USD\s*\n\s*([\d,]+\.\d{2})", pdf_text(document))
+        if m:
+            result["invoice_total"] = m.group(1).replace(",", "")
+
+        seen_pos = set()
+        for i in range(len(lines)):
+            if not _is_line_item_start(lines, i):
+                continue
+
+            pos = lines[i]
+            if pos in seen_pos:
+                continue
+            seen_pos.add(pos)
+
+            article_no = lines[i + 3]
+
+            qty = lines[i + 1]
+            unit = lines[i + 2]
+            unit_price = _parse_unit_price(lines[i + 7])
+            amount = lines[i + 8]
+            if not _AMOUNT_RE.match(amount) and not amount.replace(",", "").replace(".", "").isdigit():
+                continue
+
+            desc = _collect_description(lines, i + 9)
+            job_id, job_name = _job_above_line_item(lines, i)
+            result["line_items"].append(
+                make_line_item(
+                    item_id=article_no,
+                    name=desc.split(",")[0] if desc else article_no,
+                    description=desc,
+                    job_id=job_id,
+                    job=job_name,
+                    qty=qty,
+                    unit=unit,
+                    unit_price=unit_price,
+                    total_price=amount,
+                )
             )
-        )
 
-    return normalize_invoice(result)
+        return normalize_invoice(result)
 
 
 parse_hafele_invoice.name = "Hafele America Co."
+parse_hafele_invoice.fingerprints = ("hafele america", "häfele", "hafele.com")
@@ -73,3 +73,7 @@ def parse_industrial_tool_supply_invoice(pdf_path):
 
 
 parse_industrial_tool_supply_invoice.name = "Industrial Tool and Supply"
+parse_industrial_tool_supply_invoice.fingerprints = (
+    "industrial tool",
+    "industrialtoolandsupply.com",
+)
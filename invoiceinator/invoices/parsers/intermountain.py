@@ -150,3 +150,4 @@ def parse_intermountain_invoice(pdf_path):
 
 
 parse_intermountain_invoice.name = "Intermountain Wood Products"
+parse_intermountain_invoice.fingerprints = ("intermountain",)
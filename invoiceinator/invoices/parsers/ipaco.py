@@ -4,8 +4,8 @@ from __future__ import annotations
 
 import re
 
-import pymupdf as fitz
-
+from .pages import map_pages
+from .pdf import open_document
 from .schema import empty_invoice, invoice_bundle, make_line_item, normalize_invoice, to_float
 
 _VENDOR_NAME = "IPACO Inc."
@@ -19,15 +19,14 @@ _STATEMENT_ROW_RE = re.compile(
 )
 
 
+def _page_lines(document, page_index):
+    return document.page_lines(page_index)
+
+
 def _pages(pdf_path):
-    doc = fitz.open(pdf_path)
-    try:
-        return [
-            [line.strip() for line in page.get_text().splitlines() if line.strip()]
-            for page in doc
-        ]
-    finally:
-        doc.close()
+    """Per-page lines; long PDFs are extracted page-parallel (see ``parsers.pages``)."""
+    with open_document(pdf_path) as document:
+        return map_pages(document, _page_lines)
 
 
 def _is_statement(pages):
@@ -283,3 +282,4 @@ def parse_ipaco_invoice(pdf_path):
 
 
 parse_ipaco_invoice.name = _VENDOR_NAME
+parse_ipaco_invoice.fingerprints = ("ipaco", re.compile(r"\b(?:PS|BL)\d{5,6}\b"))
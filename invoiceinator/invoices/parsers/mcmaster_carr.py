@@ -195,3 +195,4 @@ def parse_mcmaster_carr_invoice(pdf_path):
 
 
 parse_mcmaster_carr_invoice.name = _VENDOR_NAME
+parse_mcmaster_carr_invoice.fingerprints = ("mcmaster-carr", "mcmaster.com")
@@ -0,0 +1,88 @@
+"""Opt-in page-parallel parsing for long multi-invoice PDFs.
+
+Bundle parsers (Wurth, Weinig, Rugby, IPACO) handle each page on its own and
+merge the results. ``map_pages`` runs that per-page step in page order; with
+``INVOICE_PAGE_WORKERS`` set to 2 or more and a document of at least
+``INVOICE_PAGE_PARALLEL_MIN_PAGES`` pages, it splits the pages into one
+contiguous chunk per worker process instead. Each worker opens the PDF once for
+its whole chunk, and the page lines it extracts are handed back to the caller's
+``ParsedDocument`` so later steps (and other parsers sharing it) do not extract
+them again. Inside a daemonic pool worker (``INVOICE_PARSER_WORKERS``) pages
+always run sequentially.
+"""
+
+import multiprocessing
+import os
+
+from .pdf import ParsedDocument
+
+DEFAULT_MIN_PAGES = 16
+
+
+def page_workers():
+    """Worker processes for per-page parsing; 0 or 1 keeps it sequential."""
+    try:
+        return max(0, int(os.environ.get("INVOICE_PAGE_WORKERS", "0")))
+    except ValueError:
+        return 0
+
+
+def page_parallel_min_pages():
+    """Shortest document worth the process start-up cost."""
+    try:
+        return max(1, int(os.environ.get("INVOICE_PAGE_PARALLEL_MIN_PAGES", DEFAULT_MIN_PAGES)))
+    except ValueError:
+        return DEFAULT_MIN_PAGES
+
+
+def _page_chunks(page_count, workers):
+    size, extra = divmod(page_count, workers)
+    chunks = []
+    start = 0
+    for index in range(workers):
+        end = start + size + (1 if index < extra else 0)
+        if end > start:
+            chunks.append(range(start, end))
+        start = end
+    return chunks
+
+
+def _map_chunk(page_func, pdf_path, page_indices):
+    """Run ``page_func`` over one chunk in a worker; ``[(page_lines or None, result), ...]``."""
+    with ParsedDocument(pdf_path) as document:
+        results = [page_func(document, page_index) for page_index in page_indices]
+        return [
+            (document.page_lines(page_index) if document.has_page_lines(page_index) else None, result)
+            for page_index, result in zip(page_indices, results)
+        ]
+
+
+def map_pages(document, page_func, workers=None):
+    """
+    ``[page_func(document, page_index) for every page]``, in page order.
+
+    ``page_func`` must be a module-level function so it pickles. Runs inline
+    unless page-parallel mode is on, the document is long enough, and its page
+    text has not already been extracted. It also runs inline inside daemonic
+    processes, such as the candidate pool of ``parallel.py``, which may not
+    start children.
+    """
+    workers = page_workers() if workers is None else workers
+    if multiprocessing.current_process().daemon:
+        workers = 0
+    page_count = document.page_count
+    extracted = all(document.has_page_lines(page_index) for page_index in range(page_count))
+    if workers < 2 or page_count < page_parallel_min_pages() or extracted:
+        return [page_func(document, page_index) for page_index in range(page_count)]
+
+    chunks = _page_chunks(page_count, min(workers, page_count))
+    with multiprocessing.Pool(processes=len(chunks)) as pool:
+        chunk_results = pool.starmap(_map_chunk, [(page_func, document.path, chunk) for chunk in chunks])
+
+    results = []
+    for chunk, chunk_result in zip(chunks, chunk_results):
+        for page_index, (lines, result) in zip(chunk, chunk_result):
+            if lines is not None:
+                document.set_page_lines(page_index, lines)
+            results.append(result)
+    return results
@@ -0,0 +1,122 @@
+"""Opt-in process-pool evaluation of candidate parsers.
+
+``parse_generic_invoice`` normally tries candidate parsers one after another.
+Set ``INVOICE_PARSER_WORKERS`` to 2 or more to run them on a bounded process
+pool instead: each candidate gets ``INVOICE_PARSER_TIMEOUT`` seconds of wall
+time, and the remaining work is cancelled as soon as one result is good enough.
+"""
+
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+from .schema import normalize_parser_output
+
+DEFAULT_PARSER_TIMEOUT = 60.0
+# Extra seconds the parent waits beyond the per-parser budget before giving up.
+_DEADLINE_SLACK = 5.0
+
+
+class ParserTimeout(BaseException):
+    """
+    Raised inside a worker when a parser exceeds its time budget.
+
+    Derives from ``BaseException`` so parser-level ``except Exception`` blocks
+    (e.g. around camelot) cannot swallow it.
+    """
+
+
+def parallel_workers():
+    """Worker processes for candidate evaluation; 0 or 1 keeps parsing sequential."""
+    try:
+        return max(0, int(os.environ.get("INVOICE_PARSER_WORKERS", "0")))
+    except ValueError:
+        return 0
+
+
+def parser_timeout():
+    """Per-parser wall-clock budget in seconds."""
+    try:
+        value = float(os.environ.get("INVOICE_PARSER_TIMEOUT", DEFAULT_PARSER_TIMEOUT))
+    except ValueError:
+        return DEFAULT_PARSER_TIMEOUT
+    return value if value > 0 else DEFAULT_PARSER_TIMEOUT
+
+
+def _raise_timeout(signum, frame):
+    raise ParserTimeout()
+
+
+def _evaluate_candidate(parser, pdf_path, timeout, scorer):
+    """Run one parser in a pool worker; ``(None, None)`` on error or timeout."""
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        raw = parser(pdf_path)
+        result = normalize_parser_output(raw, vendor_name=getattr(parser, "name", None))
+        return result, scorer(result)
+    except (Exception, ParserTimeout):
+        return None, None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def evaluate_parsers(pdf_path, parsers, *, workers, scorer, good_enough, timeout=None):
+    """
+    Run ``parsers`` against ``pdf_path`` on a process pool.
+
+    Returns ``(result, score)`` for the first result ``good_enough`` accepts, else
+    the highest-scoring result (earlier parsers win ties), else ``(None, None)``.
+    ``parsers`` and ``scorer`` must be module-level callables so they pickle.
+    """
+    parsers = list(parsers)
+    if not parsers:
+        return None, None
+    timeout = timeout or parser_timeout()
+    processes = max(1, min(workers, len(parsers)))
+    deadline = (
+        time.monotonic()
+        + timeout * math.ceil(len(parsers) / processes)
+        + _DEADLINE_SLACK
+    )
+
+    finished = queue.Queue()
+    outcomes = [None] * len(parsers)
+    pool = multiprocessing.Pool(processes=processes)
+    try:
+        for index, parser in enumerate(parsers):
+            pool.apply_async(
+                _evaluate_candidate,
+                (parser, os.fspath(pdf_path), timeout, scorer),
+                callback=lambda outcome, index=index: finished.put((index, outcome)),
+                error_callback=lambda exc, index=index: finished.put((index, (None, None))),
+            )
+
+        for _ in parsers:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                index, outcome = finished.get(timeout=remaining)
+            except queue.Empty:
+                break
+            outcomes[index] = outcome
+            result, score = outcome
+            if result is not None and good_enough(result):
+                return result, score
+    finally:
+        pool.terminate()
+        pool.join()
+
+    best_result, best_score = None, None
+    for outcome in outcomes:
+        if not outcome or outcome[0] is None:
+            continue
+        result, score = outcome
+        if best_score is None or score > best_score:
+            best_result, best_score = result, score
+    return best_result, best_score
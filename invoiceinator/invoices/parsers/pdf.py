@@ -1,19 +1,136 @@
 """PDF text extraction via pymupdf."""
 
+from contextlib import contextmanager
+import os
 import re
 
 import pymupdf as fitz
 
 
-def pdf_lines(pdf_path):
-    doc = fitz.open(pdf_path)
-    text = "\n".join(page.get_text() for page in doc)
+def _clean_lines(text):
     return [line.strip() for line in text.splitlines() if line.strip()]
 
 
+class ParsedDocument:
+    """
+    One open PDF with lazily extracted, memoized text.
+
+    Parsers accept either a path or a ``ParsedDocument``; pass the same
+    document to several parsers (as ``parse_generic_invoice`` does) and the
+    file is opened and each page's text is extracted only once.
+    """
+
+    def __init__(self, pdf_path):
+        self.path = os.fspath(pdf_path)
+        self._doc = None
+        self._page_text = {}
+        self._page_lines = {}
+        self._page_words = {}
+        self._page_dict = {}
+        self._text = None
+        self._lines = None
+
+    def __fspath__(self):
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def doc(self):
+        """The underlying pymupdf document, opened on first access."""
+        if self._doc is None:
+            self._doc = fitz.open(self.path)
+        return self._doc
+
+    @property
+    def page_count(self):
+        return len(self.doc)
+
+    def page(self, page_index):
+        return self.doc[page_index]
+
+    def page_text(self, page_index):
+        if page_index not in self._page_text:
+            self._page_text[page_index] = self.doc[page_index].get_text()
+        return self._page_text[page_index]
+
+    def page_lines(self, page_index):
+        """Stripped, non-empty text lines of one page (``[]`` past the last page)."""
+        if page_index >= self.page_count:
+            return []
+        if page_index not in self._page_lines:
+            self._page_lines[page_index] = _clean_lines(self.page_text(page_index))
+        return self._page_lines[page_index]
+
+    def has_page_lines(self, page_index):
+        return page_index in self._page_lines
+
+    def set_page_lines(self, page_index, lines):
+        """Adopt lines extracted elsewhere (e.g. by a page-parallel worker) for one page."""
+        self._page_lines[page_index] = list(lines)
+
+    def page_words(self, page_index):
+        """``page.get_text("words")`` tuples for one page."""
+        if page_index not in self._page_words:
+            self._page_words[page_index] = self.doc[page_index].get_text("words")
+        return self._page_words[page_index]
+
+    def page_dict(self, page_index):
+        """``page.get_text("dict")`` span structure for one page."""
+        if page_index not in self._page_dict:
+            self._page_dict[page_index] = self.doc[page_index].get_text("dict")
+        return self._page_dict[page_index]
+
+    @property
+    def pages(self):
+        """Per-page line lists."""
+        return [self.page_lines(index) for index in range(self.page_count)]
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = "\n".join(self.page_text(index) for index in range(self.page_count))
+        return self._text
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = _clean_lines(self.text)
+        return self._lines
+
+    def close(self):
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+
+@contextmanager
+def open_document(source):
+    """
+    Yield ``source`` as a ``ParsedDocument``.
+
+    A path is opened here and closed on exit; a document the caller passed in
+    is left open for the caller (and the next parser) to keep using.
+    """
+    if isinstance(source, ParsedDocument):
+        yield source
+        return
+    with ParsedDocument(source) as document:
+        yield document
+
+
+def pdf_lines(pdf_path):
+    with open_document(pdf_path) as document:
+        return list(document.lines)
+
+
 def pdf_text(pdf_path):
-    doc = fitz.open(pdf_path)
-    return "\n".join(page.get_text() for page in doc)
+    with open_document(pdf_path) as document:
+        return document.text
 
 
 def value_after(lines, label):
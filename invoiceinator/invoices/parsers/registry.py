@@ -0,0 +1,46 @@
+"""Name-based registry of the vendor parsers.
+
+Maps each ``parse_*`` export to the module that defines it, so the package can
+resolve ``Vendor.parser`` names without importing every parser module up front.
+A parser's module (and whatever it imports) is loaded on first lookup.
+"""
+
+from importlib import import_module
+
+# Exported parser name -> defining module, in listing / generic sweep order.
+PARSER_MODULES = {
+    "parse_advanced_machinery_invoice": "advanced_machinery",
+    "parse_allmoxy_invoice": "allmoxy",
+    "parse_american_saw_invoice": "american_saw",
+    "parse_bitdefender_invoice": "bitdefender",
+    "parse_crexendo_invoice": "crexendo",
+    "parse_edgebanding_services_invoice": "edgebanding_services",
+    "parse_element_designs_invoice": "element_designs",
+    "parse_generic_invoice": "generic",
+    "parse_hafele_invoice": "hafele",
+    "parse_high_mountain_invoice": "high_mountain",
+    "parse_mcmaster_carr_invoice": "mcmaster_carr",
+    "parse_industrial_tool_supply_invoice": "industrial_tool_supply",
+    "parse_intermountain_invoice": "intermountain",
+    "parse_ipaco_invoice": "ipaco",
+    "parse_rugby_invoice": "rugby",
+    "parse_weinig_invoice": "weinig",
+    "parse_sierra_invoice": "sierra",
+    "parse_sherwin_invoice": "sherwin",
+    "parse_wi_fiber_invoice": "wi_fiber",
+    "parse_wurth_invoice": "wurth",
+    "parse_yates_mouldings_invoice": "yates_mouldings",
+}
+
+GENERIC_PARSER = "parse_generic_invoice"
+
+
+def load_parser(method):
+    """Import and return the parser registered as ``method``; ``KeyError`` if unknown."""
+    module = import_module(f"{__package__}.{PARSER_MODULES[method]}")
+    return getattr(module, method)
+
+
+def vendor_parsers():
+    """Every registered parser except the generic fallback, in registry order."""
+    return tuple(load_parser(method) for method in PARSER_MODULES if method != GENERIC_PARSER)
@@ -4,8 +4,8 @@ from __future__ import annotations
 
 import re
 
-import pymupdf as fitz
-
+from .pages import map_pages
+from .pdf import open_document
 from .schema import empty_invoice, invoice_bundle, make_line_item, normalize_invoice, to_float
 
 _VENDOR_NAME = "Rugby ABP - Salt Lake City"
@@ -34,21 +34,8 @@ _FOOTER_STOP_PHRASES = (
 
 
 def _page_lines(pdf_path, page_index):
-    doc = fitz.open(pdf_path)
-    try:
-        if page_index >= len(doc):
-            return []
-        return [line.strip() for line in doc[page_index].get_text().splitlines() if line.strip()]
-    finally:
-        doc.close()
-
-
-def _page_count(pdf_path):
-    doc = fitz.open(pdf_path)
-    try:
-        return len(doc)
-    finally:
-        doc.close()
+    with open_document(pdf_path) as document:
+        return document.page_lines(page_index)
 
 
 def _is_footer_line(line):
@@ -287,40 +274,44 @@ def _parse_page(lines):
     return invoice
 
 
+def _parse_page_at(document, page_index):
+    return _parse_page(_page_lines(document, page_index))
+
+
 def parse_rugby_invoice(pdf_path):
-    """Rugby ABP invoice and credit memo parser."""
-    grouped = []
-    current = None
-
-    for page_index in range(_page_count(pdf_path)):
-        lines = _page_lines(pdf_path, page_index)
-        parsed = _parse_page(lines)
-        if not parsed:
-            continue
-        if current and current["invoice_number"] == parsed["invoice_number"]:
-            current["pages"].append(parsed)
-        else:
-            current = {
-                "invoice_number": parsed["invoice_number"],
-                "pages": [parsed],
-            }
-            grouped.append(current)
-
-    invoices = []
-    for group in grouped:
-        merged = empty_invoice(_VENDOR_NAME)
-        merged["invoice_number"] = group["invoice_number"]
-        for page_invoice in group["pages"]:
-            for field in ("ship_date", "date_ordered", "invoice_due_date", "cust_po", "invoice_total"):
-                if not merged.get(field) and page_invoice.get(field):
-                    merged[field] = page_invoice[field]
-            if not merged.get("vendor_name") and page_invoice.get("vendor_name"):
-                merged["vendor_name"] = page_invoice["vendor_name"]
-            merged["line_items"].extend(page_invoice.get("line_items") or [])
-
-        invoices.append(normalize_invoice(merged))
-
-    return invoice_bundle(_VENDOR_NAME, invoices)
+    """Rugby ABP invoice and credit memo parser; long PDFs can run page-parallel (``parsers.pages``)."""
+    with open_document(pdf_path) as document:
+        grouped = []
+        current = None
+
+        for parsed in map_pages(document, _parse_page_at):
+            if not parsed:
+                continue
+            if current and current["invoice_number"] == parsed["invoice_number"]:
+                current["pages"].append(parsed)
+            else:
+                current = {
+                    "invoice_number": parsed["invoice_number"],
+                    "pages": [parsed],
+                }
+                grouped.append(current)
+
+        invoices = []
+        for group in grouped:
+            merged = empty_invoice(_VENDOR_NAME)
+            merged["invoice_number"] = group["invoice_number"]
+            for page_invoice in group["pages"]:
+                for field in ("ship_date", "date_ordered", "invoice_due_date", "cust_po", "invoice_total"):
+                    if not merged.get(field) and page_invoice.get(field):
+                        merged[field] = page_invoice[field]
+                if not merged.get("vendor_name") and page_invoice.get("vendor_name"):
+                    merged["vendor_name"] = page_invoice["vendor_name"]
+                merged["line_items"].extend(page_invoice.get("line_items") or [])
+
+            invoices.append(normalize_invoice(merged))
+
+        return invoice_bundle(_VENDOR_NAME, invoices)
 
 
 parse_rugby_invoice.name = _VENDOR_NAME
+parse_rugby_invoice.fingerprints = ("rugby abp", "shinnoki")
@@ -415,7 +415,8 @@ def normalize_parser_output(data, vendor_name=None):
 
     ``{"vendor_name": "...", "invoices": [<invoice>, ...]}``
 
-    Single-invoice PDFs always produce a one-element ``invoices`` list.
+    Single-invoice PDFs always produce a one-element ``invoices`` list. An
+    envelope's ``candidates_tried`` (set by ``parse_generic_invoice``) is kept.
     """
     if isinstance(data, list):
         invoices = [
@@ -435,4 +436,7 @@ def normalize_parser_output(data, vendor_name=None):
     if not bundle_vendor and invoices:
         bundle_vendor = invoices[0].get("vendor_name") or ""
 
-    return invoice_bundle(bundle_vendor, invoices)
+    bundle = invoice_bundle(bundle_vendor, invoices)
+    if isinstance(data, dict) and data.get("candidates_tried") is not None:
+        bundle["candidates_tried"] = data["candidates_tried"]
+    return bundle
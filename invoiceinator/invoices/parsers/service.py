@@ -0,0 +1,398 @@
+"""Parse service: a pool of pre-warmed worker processes with per-job limits.
+
+Each worker imports every registered parser, pymupdf and (when installed)
+camelot before it reports ready, so a job pays only for the parse itself. Jobs
+name a parser from the registry rather than carrying a callable, and the parent
+enforces the limits from the outside: a worker still busy after
+``PARSE_SERVICE_TIMEOUT`` seconds, or whose resident memory passes
+``PARSE_SERVICE_MAX_MEMORY_MB``, is killed and replaced and its job fails.
+Workers are retired after ``PARSE_SERVICE_MAX_JOBS`` jobs so slow leaks in
+pymupdf or camelot never accumulate.
+
+The service is opt-in: ``PARSE_SERVICE_WORKERS`` defaults to 0, which parses
+inline in the calling thread. Set it to start that many workers on first use.
+"""
+
+import atexit
+import collections
+from concurrent.futures import Future
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import threading
+import time
+import weakref
+
+from .registry import PARSER_MODULES, load_parser
+from .schema import normalize_parser_output
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVICE_WORKERS = 0
+DEFAULT_JOB_TIMEOUT = 120.0
+DEFAULT_MAX_MEMORY_MB = 1024
+DEFAULT_MAX_JOBS_PER_WORKER = 50
+# Seconds between resident-memory checks of busy workers.
+_MEMORY_POLL_INTERVAL = 0.25
+# Seconds a worker waits for a job before checking that its parent is still alive.
+_PARENT_POLL_INTERVAL = 1.0
+
+_service = None
+_service_lock = threading.Lock()
+# Services still running, shut down at exit: their workers are not daemonic.
+_live_services = weakref.WeakSet()
+
+
+class ParseJobError(Exception):
+    """A parse-service job failed for a reason other than the parser raising."""
+
+
+class ParseJobTimeout(ParseJobError):
+    pass
+
+
+class ParseJobMemoryExceeded(ParseJobError):
+    pass
+
+
+class ParseWorkerDied(ParseJobError):
+    pass
+
+
+def _env_number(name, default, cast):
+    try:
+        value = cast(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def parse_service_workers():
+    """Worker processes in the parse service; 0 runs parsers inline."""
+    return _env_number("PARSE_SERVICE_WORKERS", DEFAULT_SERVICE_WORKERS, int)
+
+
+def parse_job_timeout():
+    """Wall-clock seconds one job may run before its worker is killed."""
+    return _env_number("PARSE_SERVICE_TIMEOUT", DEFAULT_JOB_TIMEOUT, float) or DEFAULT_JOB_TIMEOUT
+
+
+def parse_job_max_memory_mb():
+    """Resident-memory ceiling per worker in MiB; 0 disables the check."""
+    return _env_number("PARSE_SERVICE_MAX_MEMORY_MB", DEFAULT_MAX_MEMORY_MB, int)
+
+
+def parse_worker_max_jobs():
+    """Jobs a worker runs before it is replaced; 0 keeps workers for good."""
+    return _env_number("PARSE_SERVICE_MAX_JOBS", DEFAULT_MAX_JOBS_PER_WORKER, int)
+
+
+def registered_method(parser):
+    """The registry name of ``parser``, or ``None`` for ad-hoc callables."""
+    name = getattr(parser, "__name__", None)
+    module = PARSER_MODULES.get(name)
+    if module is None or getattr(parser, "__module__", None) != f"{__package__}.{module}":
+        return None
+    return name
+
+
+def _warm_imports():
+    for method in PARSER_MODULES:
+        load_parser(method)
+    import pymupdf  # noqa: F401
+    try:
+        import camelot  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _resident_bytes(pid):
+    """Resident set size of ``pid`` from ``/proc``; ``None`` where that is unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _worker_main(conn, parent_pid):
+    """
+    Worker loop: warm up, report ready, then run ``(method, pdf_path, vendor_name)``
+    jobs until told to stop.
+    """
+    _warm_imports()
+    conn.send(("ready", None))
+    while True:
+        while not conn.poll(_PARENT_POLL_INTERVAL):
+            if os.getppid() != parent_pid:
+                return
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        method, pdf_path, vendor_name = job
+        try:
+            raw = load_parser(method)(pdf_path)
+            outcome = ("ok", normalize_parser_output(raw, vendor_name=vendor_name))
+        except Exception as exc:
+            outcome = ("error", exc)
+        try:
+            conn.send(outcome)
+        except Exception as exc:
+            # Unpicklable results or exceptions come back as a plain error message.
+            conn.send(("error", ParseJobError(f"{method} on {pdf_path}: {outcome[1]!r} ({exc})")))
+
+
+class _Worker:
+    def __init__(self, context, index):
+        self.conn, child_conn = context.Pipe()
+        # Not daemonic: the generic parser may start its own candidate pool.
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, os.getpid()),
+            name=f"invoiceinator-parse-{index}",
+            daemon=False,
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.future = None
+        self.deadline = None
+        self.jobs_done = 0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class ParseService:
+    """
+    Run registered parsers on warm worker processes.
+
+    ``submit`` returns a ``concurrent.futures.Future`` for the normalized
+    envelope; ``parse`` blocks for it. Jobs run in submission order. A job that
+    times out, outgrows the memory limit or kills its worker fails with a
+    ``ParseJobError`` subclass; a parser that raises fails with its exception.
+    """
+
+    def __init__(self, workers=None, timeout=None, max_memory_mb=None, max_jobs_per_worker=None):
+        self.workers = max(1, workers or parse_service_workers() or 1)
+        self.timeout = timeout or parse_job_timeout()
+        if max_memory_mb is None:
+            max_memory_mb = parse_job_max_memory_mb()
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        if max_jobs_per_worker is None:
+            max_jobs_per_worker = parse_worker_max_jobs()
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.pid = os.getpid()
+        self._context = multiprocessing.get_context()
+        self._jobs = collections.deque()
+        self._lock = threading.Lock()
+        self._wake_reader, self._wake_writer = multiprocessing.Pipe(duplex=False)
+        self._closed = False
+        # True while a wake-up sits unread in the pipe, so submitters never fill it.
+        self._wake_pending = False
+        self._started = 0
+        self._pool = [self._start_worker() for _ in range(self.workers)]
+        self._thread = threading.Thread(
+            target=self._dispatch, name="invoiceinator-parse-service", daemon=True,
+        )
+        self._thread.start()
+        _live_services.add(self)
+
+    def submit(self, method, pdf_path, vendor_name=None):
+        if method not in PARSER_MODULES:
+            raise KeyError(method)
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("parse service is shut down")
+            self._jobs.append((future, (method, os.fspath(pdf_path), vendor_name)))
+            self._wake()
+        return future
+
+    def parse(self, method, pdf_path, vendor_name=None):
+        return self.submit(method, pdf_path, vendor_name).result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake()
+        self._thread.join()
+
+    def _wake(self):
+        if not self._wake_pending:
+            self._wake_pending = True
+            self._wake_writer.send(None)
+
+    def _start_worker(self):
+        self._started += 1
+        return _Worker(self._context, self._started)
+
+    def _replace(self, worker, kill):
+        self._pool.remove(worker)
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        self._pool.append(self._start_worker())
+
+    def _fail(self, worker, exc):
+        future = worker.future
+        worker.future = None
+        self._replace(worker, kill=True)
+        if future is not None:
+            future.set_exception(exc)
+
+    def _assign(self):
+        for worker in self._pool:
+            if not worker.ready or worker.future is not None:
+                continue
+            with self._lock:
+                if not self._jobs:
+                    return
+                future, job = self._jobs.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            worker.conn.send(job)
+            worker.future = future
+            worker.deadline = time.monotonic() + self.timeout
+
+    def _receive(self, worker):
+        try:
+            message = worker.conn.recv()
+        except (EOFError, OSError):
+            code = worker.process.exitcode
+            self._fail(worker, ParseWorkerDied(f"parse worker exited with code {code}"))
+            return
+        kind, value = message
+        if kind == "ready":
+            worker.ready = True
+            return
+        future = worker.future
+        worker.future = None
+        worker.jobs_done += 1
+        if self.max_jobs_per_worker and worker.jobs_done >= self.max_jobs_per_worker:
+            self._replace(worker, kill=False)
+        if kind == "ok":
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+
+    def _enforce_limits(self):
+        now = time.monotonic()
+        for worker in list(self._pool):
+            if worker.future is None:
+                continue
+            if now >= worker.deadline:
+                logger.warning(
+                    "parse job exceeded %gs; killing worker %s", self.timeout, worker.process.pid,
+                )
+                self._fail(worker, ParseJobTimeout(f"parse job exceeded {self.timeout:g}s"))
+                continue
+            if not self.max_memory_bytes:
+                continue
+            resident = _resident_bytes(worker.process.pid)
+            if resident is not None and resident > self.max_memory_bytes:
+                logger.warning(
+                    "parse worker %s grew to %d bytes; killing it", worker.process.pid, resident,
+                )
+                self._fail(worker, ParseJobMemoryExceeded(
+                    f"parse job used more than {self.max_memory_bytes} bytes"
+                ))
+
+    def _poll_timeout(self):
+        deadlines = [worker.deadline for worker in self._pool if worker.future is not None]
+        if not deadlines:
+            return None
+        remaining = max(0.0, min(deadlines) - time.monotonic())
+        return min(remaining, _MEMORY_POLL_INTERVAL) if self.max_memory_bytes else remaining
+
+    def _dispatch(self):
+        try:
+            while True:
+                with self._lock:
+                    closed = self._closed
+                if closed:
+                    break
+                self._assign()
+                conns = [self._wake_reader] + [worker.conn for worker in self._pool]
+                ready = wait(conns, self._poll_timeout())
+                for conn in ready:
+                    if conn is self._wake_reader:
+                        with self._lock:
+                            self._wake_reader.recv()
+                            self._wake_pending = False
+                        continue
+                    worker = next((worker for worker in self._pool if worker.conn is conn), None)
+                    if worker is not None:
+                        self._receive(worker)
+                self._enforce_limits()
+        finally:
+            for worker in list(self._pool):
+                if worker.future is None:
+                    worker.stop()
+                    continue
+                worker.kill()
+                worker.future.set_exception(ParseJobError("parse service shut down"))
+            with self._lock:
+                pending, self._jobs = list(self._jobs), collections.deque()
+            for future, _job in pending:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(ParseJobError("parse service shut down"))
+
+
+def parse_service():
+    """The process-wide ``ParseService``, started on first use (and again after a fork)."""
+    global _service
+    with _service_lock:
+        if _service is None or _service.pid != os.getpid():
+            _service = ParseService()
+        return _service
+
+
+@atexit.register
+def _shutdown_live_services():
+    for service in list(_live_services):
+        if service.pid == os.getpid():
+            service.shutdown()
+
+
+def submit_parser(parser, pdf_path, vendor_name=None):
+    """
+    Future for ``normalize_parser_output(parser(pdf_path))``.
+
+    Registered parsers run on the parse service; ad-hoc callables, and every
+    parser when ``PARSE_SERVICE_WORKERS`` is 0, run inline and return a done future.
+    """
+    method = registered_method(parser)
+    if method is not None and parse_service_workers():
+        return parse_service().submit(method, pdf_path, vendor_name)
+    future = Future()
+    try:
+        future.set_result(normalize_parser_output(parser(pdf_path), vendor_name=vendor_name))
+    except Exception as exc:
+        future.set_exception(exc)
+    return future
+
+
+def run_parser(parser, pdf_path, vendor_name=None):
+    """``submit_parser(...).result()``."""
+    return submit_parser(parser, pdf_path, vendor_name).result()
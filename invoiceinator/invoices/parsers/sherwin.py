@@ -4,8 +4,7 @@ from __future__ import annotations
 
 import re
 
-import pymupdf as fitz
-
+from .pdf import open_document
 from .schema import empty_invoice, make_line_item, normalize_invoice
 
 _VENDOR_NAME = "The Sherwin-Williams Co."
@@ -30,19 +29,13 @@ _DISCOUNT_RE = re.compile(r"^DISCOUNT\s+\(%\s+[\d.]+\)\s+(-?[\d,]+\.\d{2})$", re
 
 
 def _pages(pdf_path):
-    doc = fitz.open(pdf_path)
-    try:
-        return [
-            [line.strip() for line in page.get_text().splitlines() if line.strip()]
-            for page in doc
-        ]
-    finally:
-        doc.close()
+    with open_document(pdf_path) as document:
+        return document.pages
 
 
-def _page_rows(page, y_min=280, y_max=360):
+def _page_rows(words, y_min=280, y_max=360):
     rows = {}
-    for x0, y0, x1, y1, text, block, line, word in page.get_text("words"):
+    for x0, y0, x1, y1, text, block, line, word in words:
         if not text or text == "-" or set(text) == {"-"}:
             continue
         if y0 < y_min or y0 > y_max:
@@ -110,9 +103,9 @@ def _extract_account(lines):
     return None
 
 
-def _extract_item_lines(page):
+def _extract_item_lines(words):
     items = []
-    for line in _page_rows(page):
+    for line in _page_rows(words):
         if not line:
             continue
         if line.upper().startswith("DISCOUNT"):
@@ -157,14 +150,8 @@ def _extract_item_lines(page):
 
 def parse_sherwin_invoice(pdf_path):
     """Sherwin-Williams invoice parser."""
-    doc = fitz.open(pdf_path)
-    try:
-        pages = [
-            [line.strip() for line in page.get_text().splitlines() if line.strip()]
-            for page in doc
-        ]
-        lines = [line for page in pages for line in page]
-        page = doc[0]
+    with open_document(pdf_path) as document:
+        lines = [line for page in _pages(document) for line in page]
 
         invoice = empty_invoice(_VENDOR_NAME)
         invoice_number = _extract_invoice_number(lines)
@@ -174,15 +161,14 @@ def parse_sherwin_invoice(pdf_path):
         invoice["ship_date"] = invoice["invoice_due_date"]
         invoice["cust_po"] = _extract_account(lines) or invoice_number
         invoice["invoice_total"] = _extract_charge(lines)
-        invoice["line_items"] = _extract_item_lines(page)
+        invoice["line_items"] = _extract_item_lines(document.page_words(0))
 
         subtotal = _extract_subtotal(lines)
         if subtotal and not invoice["invoice_total"]:
             invoice["invoice_total"] = subtotal
 
         return normalize_invoice(invoice)
-    finally:
-        doc.close()
 
 
 parse_sherwin_invoice.name = _VENDOR_NAME
+parse_sherwin_invoice.fingerprints = ("sherwin-williams",)
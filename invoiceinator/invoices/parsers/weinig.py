@@ -4,8 +4,8 @@ from __future__ import annotations
 
 import re
 
-import pymupdf as fitz
-
+from .pages import map_pages
+from .pdf import open_document
 from .schema import empty_invoice, invoice_bundle, make_line_item, normalize_invoice, to_float
 
 _VENDOR_NAME = "Weinig Holz-Her USA, Inc."
@@ -20,17 +20,6 @@ _STATEMENT_ROW_RE = re.compile(
 )
 
 
-def _pages(pdf_path):
-    doc = fitz.open(pdf_path)
-    try:
-        return [
-            [line.strip() for line in page.get_text().splitlines() if line.strip()]
-            for page in doc
-        ]
-    finally:
-        doc.close()
-
-
 def _is_statement(pages):
     return any("STATEMENT OF ACCOUNT" in line for page in pages for line in page)
 
@@ -241,38 +230,47 @@ def _parse_statement(pages):
     return invoice_bundle(_VENDOR_NAME, invoices)
 
 
-def parse_weinig_invoice(pdf_path):
-    """Weinig invoice and statement parser."""
-    pages = _pages(pdf_path)
-    if _is_statement(pages):
-        return _parse_statement(pages)
-
-    grouped = []
-    current = None
-    for page in pages:
-        parsed = _parse_invoice_page(page)
-        if not parsed:
-            continue
-        invoice_number = parsed["invoice_number"]
-        if current and current["invoice_number"] == invoice_number:
-            current["pages"].append(parsed)
-        else:
-            current = {"invoice_number": invoice_number, "pages": [parsed]}
-            grouped.append(current)
+def _parse_invoice_page_at(document, page_index):
+    lines = document.page_lines(page_index)
+    if _is_statement([lines]):
+        return None
+    return _parse_invoice_page(lines)
 
-    invoices = []
-    vendor_name = _vendor_name_from_pages(pages)
-    for group in grouped:
-        merged = empty_invoice(vendor_name)
-        merged["invoice_number"] = group["invoice_number"]
-        for page_invoice in group["pages"]:
-            for field in ("date_ordered", "ship_date", "invoice_due_date", "cust_po", "invoice_total"):
-                if not merged.get(field) and page_invoice.get(field):
-                    merged[field] = page_invoice[field]
-            merged["line_items"].extend(page_invoice.get("line_items") or [])
-        invoices.append(normalize_invoice(merged))
 
-    return invoice_bundle(vendor_name, invoices)
+def parse_weinig_invoice(pdf_path):
+    """Weinig invoice and statement parser; long PDFs can run page-parallel (``parsers.pages``)."""
+    with open_document(pdf_path) as document:
+        page_invoices = map_pages(document, _parse_invoice_page_at)
+        pages = document.pages
+        if _is_statement(pages):
+            return _parse_statement(pages)
+
+        grouped = []
+        current = None
+        for parsed in page_invoices:
+            if not parsed:
+                continue
+            invoice_number = parsed["invoice_number"]
+            if current and current["invoice_number"] == invoice_number:
+                current["pages"].append(parsed)
+            else:
+                current = {"invoice_number": invoice_number, "pages": [parsed]}
+                grouped.append(current)
+
+        invoices = []
+        vendor_name = _vendor_name_from_pages(pages)
+        for group in grouped:
+            merged = empty_invoice(vendor_name)
+            merged["invoice_number"] = group["invoice_number"]
+            for page_invoice in group["pages"]:
+                for field in ("date_ordered", "ship_date", "invoice_due_date", "cust_po", "invoice_total"):
+                    if not merged.get(field) and page_invoice.get(field):
+                        merged[field] = page_invoice[field]
+                merged["line_items"].extend(page_invoice.get("line_items") or [])
+            invoices.append(normalize_invoice(merged))
+
+        return invoice_bundle(vendor_name, invoices)
 
 
 parse_weinig_invoice.name = _VENDOR_NAME
+parse_weinig_invoice.fingerprints = ("weinig", "holz-her")
@@ -2,18 +2,16 @@
 
 import re
 
-import pymupdf as fitz
-
-from .pdf import value_after
+from .pdf import open_document, value_after
 from .schema import empty_invoice, make_line_item, normalize_invoice, to_float
 
 
 def parse_wi_fiber_invoice(pdf_path):
     """Wi-Fiber, Inc. recurring service statements."""
-    doc = fitz.open(pdf_path)
-    pages = [p.get_text().splitlines() for p in doc]
-    all_lines = [ln.strip() for page in pages for ln in page if ln.strip()]
-    page2_lines = [ln.strip() for ln in pages[1] if ln.strip()] if len(pages) > 1 else []
+    with open_document(pdf_path) as document:
+        pages = document.pages
+    all_lines = [ln for page in pages for ln in page]
+    page2_lines = pages[1] if len(pages) > 1 else []
 
     result = empty_invoice("Wi-Fiber, Inc.")
     date_re = r"[A-Z][a-z]+\s+\d{1,2}\s+\d{4}"
@@ -99,3 +97,4 @@ def parse_wi_fiber_invoice(pdf_path):
 
 
 parse_wi_fiber_invoice.name = "Wi-Fiber"
+parse_wi_fiber_invoice.fingerprints = ("wi-fiber",)
@@ -0,0 +1,83 @@
+"""Code-table grids rebuilt from pymupdf words, without camelot.
+
+Handles the same "Code" header tables as ``camelot_tables``. Words are grouped
+into rows by vertical midpoint and split into cells at wide horizontal gaps.
+Header cells define the columns, and each body cell goes to the header it
+overlaps most (or the nearest one). A row with a single cell outside the first
+column continues the row above (as a ruled cell would). The table ends before
+a "Total" row, a large vertical gap, or the next header. The result is the
+list-of-rows grid ``_code_table_line_items`` consumes, at the cost of a text
+extraction instead of a page render.
+"""
+
+import re
+
+from .camelot_tables import _is_code_header, _row_text, _word_rows
+from .pdf import open_document
+
+# A gap wider than this many header heights between rows ends the table.
+_MAX_ROW_GAP = 3.0
+# Words further apart than this fraction of the header height start a new cell.
+_SEGMENT_GAP = 0.45
+_TOTAL_RE = re.compile(r"^\s*(?:sub)?total\b", re.IGNORECASE)
+
+
+def _row_segments(row, gap):
+    """Split a row's words into ``[[x0, x1, text], ...]`` runs wherever the gap exceeds ``gap``."""
+    segments = []
+    for x0, _y0, x1, _y1, word, *_rest in row:
+        if segments and x0 - segments[-1][1] <= gap:
+            segments[-1][1] = x1
+            segments[-1][2] += f" {word}"
+        else:
+            segments.append([x0, x1, word])
+    return segments
+
+
+def _column_for(columns, x0, x1):
+    """Header column overlapping ``[x0, x1]`` the most, else the nearest one."""
+    def score(column):
+        overlap = min(x1, column[1]) - max(x0, column[0])
+        return overlap if overlap > 0 else overlap - 1e6
+    return max(range(len(columns)), key=lambda index: score(columns[index]))
+
+
+def _table_grid(header_row, body_rows):
+    header_height = max(entry[3] for entry in header_row) - min(entry[1] for entry in header_row)
+    columns = _row_segments(header_row, header_height * _SEGMENT_GAP)
+    grid = [[text for _x0, _x1, text in columns]]
+    previous_bottom = max(entry[3] for entry in header_row)
+    for row in body_rows:
+        top = min(entry[1] for entry in row)
+        text = _row_text(row)
+        if (
+            top - previous_bottom > _MAX_ROW_GAP * header_height
+            or _is_code_header(text)
+            or _TOTAL_RE.match(text)
+        ):
+            break
+        cells = [[] for _column in columns]
+        for x0, x1, text in _row_segments(row, header_height * _SEGMENT_GAP):
+            cells[_column_for(columns, x0, x1)].append(text)
+        cells = [" ".join(texts) for texts in cells]
+        filled = [index for index, cell in enumerate(cells) if cell]
+        if len(grid) > 1 and len(filled) == 1 and filled[0] != 0:
+            index = filled[0]
+            previous = grid[-1][index]
+            grid[-1][index] = f"{previous}\n{cells[index]}" if previous else cells[index]
+        else:
+            grid.append(cells)
+        previous_bottom = max(entry[3] for entry in row)
+    return grid
+
+
+def word_code_tables(pdf_path):
+    """Grids (lists of rows of cell strings) for every code-header table in the PDF."""
+    grids = []
+    with open_document(pdf_path) as document:
+        for page_index in range(document.page_count):
+            rows = _word_rows(document.page_words(page_index))
+            for index, row in enumerate(rows):
+                if _is_code_header(_row_text(row)):
+                    grids.append(_table_grid(row, rows[index + 1:]))
+    return grids
@@ -2,8 +2,8 @@
 
 import re
 
-import pymupdf as fitz
-
+from .pages import map_pages
+from .pdf import open_document
 from .schema import (
     empty_invoice,
     invoice_bundle,
@@ -36,15 +36,8 @@ _DISCLAIMER_PHRASES = (
 
 
 def _wurth_page_lines(pdf_path, page_index=0):
-    doc = fitz.open(pdf_path)
-    if page_index >= len(doc):
-        return []
-    return [line.strip() for line in doc[page_index].get_text().splitlines() if line.strip()]
-
-
-def _wurth_page_count(pdf_path):
-    doc = fitz.open(pdf_path)
-    return len(doc)
+    with open_document(pdf_path) as document:
+        return document.page_lines(page_index)
 
 
 def _wurth_page_is_invoice(lines):
@@ -143,11 +136,11 @@ def _wurth_is_meta_description_line(line):
     return any(phrase in upper for phrase in _DISCLAIMER_PHRASES)
 
 
-def _wurth_y_positions(page, texts):
+def _wurth_y_positions(page_dict, texts):
     """Map exact line text to vertical position on the page."""
     wanted = set(texts)
     positions = {}
-    for block in page.get_text("dict")["blocks"]:
+    for block in page_dict["blocks"]:
         if "lines" not in block:
             continue
         for line in block["lines"]:
@@ -160,7 +153,7 @@ def _wurth_y_positions(page, texts):
 _ROW_Y_TOLERANCE = 2.0
 
 
-def _wurth_align_descriptions_by_row(page, part_numbers, product_desc_lines):
+def _wurth_align_descriptions_by_row(page_dict, part_numbers, product_desc_lines):
     """
     Match each part number to the description on the same PDF row (shared Y coordinate).
 
@@ -169,8 +162,8 @@ def _wurth_align_descriptions_by_row(page, part_numbers, product_desc_lines):
     if not product_desc_lines:
         return []
 
-    part_ys = _wurth_y_positions(page, part_numbers)
-    desc_ys = _wurth_y_positions(page, product_desc_lines)
+    part_ys = _wurth_y_positions(page_dict, part_numbers)
+    desc_ys = _wurth_y_positions(page_dict, product_desc_lines)
     used = set()
     aligned = []
 
@@ -220,13 +213,9 @@ def _wurth_product_descriptions(lines, part_numbers, pdf_path=None, page_index=0
         return product
 
     if pdf_path and part_numbers:
-        doc = fitz.open(pdf_path)
-        try:
-            product = _wurth_align_descriptions_by_row(
-                doc[page_index], part_numbers, product
-            )
-        finally:
-            doc.close()
+        with open_document(pdf_path) as document:
+            page_dict = document.page_dict(page_index)
+        product = _wurth_align_descriptions_by_row(page_dict, part_numbers, product)
     elif raw and _wurth_is_meta_description_line(raw[0]):
         product = list(reversed(product))
 
@@ -329,23 +318,32 @@ def parse_wurth_page(lines, pdf_path=None, page_index=0):
     return normalize_invoice(result)
 
 
+def _wurth_page_invoice(document, page_index):
+    """The invoice on one page, or ``None`` for a non-invoice page."""
+    lines = _wurth_page_lines(document, page_index)
+    if not _wurth_page_is_invoice(lines):
+        return None
+    return parse_wurth_page(lines, document, page_index)
+
+
 def parse_wurth_invoice(pdf_path):
     """
     Wurth Louis and Company (wurthlac.com) columnar invoices.
 
     PDF text is extracted in columns (all qtys, then all part numbers, etc.).
     Multi-page PDFs bundle one invoice per page; returns ``{"invoices": [...]}``.
+    Long bundles can be parsed page-parallel (see ``parsers.pages``).
     """
-    invoices = []
-    for page_index in range(_wurth_page_count(pdf_path)):
-        lines = _wurth_page_lines(pdf_path, page_index)
-        if not _wurth_page_is_invoice(lines):
-            continue
-        invoices.append(parse_wurth_page(lines, pdf_path, page_index))
-    if not invoices:
-        lines = _wurth_page_lines(pdf_path, 0)
-        invoices = [parse_wurth_page(lines, pdf_path, 0)]
-    return invoice_bundle(_WURTH_VENDOR, invoices)
+    with open_document(pdf_path) as document:
+        invoices = [
+            invoice for invoice in map_pages(document, _wurth_page_invoice)
+            if invoice is not None
+        ]
+        if not invoices:
+            lines = _wurth_page_lines(document, 0)
+            invoices = [parse_wurth_page(lines, document, 0)]
+        return invoice_bundle(_WURTH_VENDOR, invoices)
 
 
 parse_wurth_invoice.name = "Wurth Louis and Company"
+parse_wurth_invoice.fingerprints = ("wurthlac.com", "wurth louis")
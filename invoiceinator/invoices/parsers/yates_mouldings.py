@@ -166,3 +166,4 @@ def parse_yates_mouldings_invoice(pdf_path):
 
 
 parse_yates_mouldings_invoice.name = _VENDOR_NAME
+parse_yates_mouldings_invoice.fingerprints = ("yates moulding", "yatesmouldings@")
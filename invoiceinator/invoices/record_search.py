@@ -0,0 +1,132 @@
+"""Indexed ``?q=`` search for the invoice and line item APIs.
+
+Both viewsets used to OR ``icontains`` filters across several joined columns,
+which scans every row. On SQLite the searched text now lives in FTS5 tables
+with the ``trigram`` tokenizer (created in migration 0025 and kept current by
+triggers on the records and on the vendor, contact, item type and job names
+they show), so a query keeps the old case-insensitive substring semantics but
+is answered from the index and ranked by bm25. ``invoices_invoice_fts`` holds
+the columns of ``INVOICE_SEARCH_FIELDS`` and ``invoices_lineitem_fts`` those of
+``LINE_ITEM_SEARCH_FIELDS``.
+
+Queries shorter than three characters (trigrams cannot index them) and
+databases without FTS5 fall back to the ``icontains`` filters. As with the
+inbox index, a migration that rebuilds one of the indexed tables on SQLite
+drops its triggers; recreate them there and call ``rebuild_record_search_index``.
+"""
+
+from __future__ import annotations
+
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+INVOICE_FTS_TABLE = 'invoices_invoice_fts'
+LINE_ITEM_FTS_TABLE = 'invoices_lineitem_fts'
+MIN_QUERY_LENGTH = 3
+
+INVOICE_SEARCH_FIELDS = (
+    'invoice_number',
+    'source_email_subject',
+    'source_email_from',
+    'vendor__name',
+    'contact__name',
+)
+LINE_ITEM_SEARCH_FIELDS = (
+    'name',
+    'description',
+    'item_id',
+    'invoice__invoice_number',
+    'item_type__name',
+    'job__name',
+    'job__job_id',
+)
+
+_REBUILD_SQL = {
+    INVOICE_FTS_TABLE: (
+        'INSERT INTO invoices_invoice_fts'
+        '(rowid, invoice_number, source_email_subject, source_email_from, vendor_name, '
+        'contact_name) '
+        'SELECT invoice.id, invoice.invoice_number, invoice.source_email_subject, '
+        'invoice.source_email_from, '
+        "COALESCE(vendor.name, ''), COALESCE(contact.name, '') FROM invoices_invoice invoice "
+        'LEFT JOIN invoices_vendor vendor ON vendor.id = invoice.vendor_id '
+        'LEFT JOIN invoices_contact contact ON contact.id = invoice.contact_id'
+    ),
+    LINE_ITEM_FTS_TABLE: (
+        'INSERT INTO invoices_lineitem_fts'
+        '(rowid, name, description, item_id, invoice_number, item_type_name, job_name, job_code) '
+        'SELECT item.id, item.name, item.description, item.item_id, '
+        "COALESCE(invoice.invoice_number, ''), COALESCE(item_type.name, ''), "
+        "COALESCE(job.name, ''), COALESCE(job.job_id, '') FROM invoices_lineitem item "
+        'LEFT JOIN invoices_invoice invoice ON invoice.id = item.invoice_id '
+        'LEFT JOIN invoices_itemtype item_type ON item_type.id = item.item_type_id '
+        'LEFT JOIN invoices_job job ON job.id = item.job_id'
+    ),
+}
+
+_fts_tables = {}
+
+
+def fts_table_available(table):
+    """True when the default database has FTS table ``table`` (checked once per database)."""
+    name = str(connection.settings_dict['NAME'])
+    if name not in _fts_tables:
+        _fts_tables[name] = (
+            set(connection.introspection.table_names()) & set(_REBUILD_SQL)
+            if connection.vendor == 'sqlite' else set()
+        )
+    return table in _fts_tables[name]
+
+
+def trigram_query(search):
+    """An FTS5 phrase matching ``search`` as a substring, or ``None`` when too short to index."""
+    search = (search or '').strip()
+    if len(search) < MIN_QUERY_LENGTH:
+        return None
+    return '"{}"'.format(search.replace('"', '""'))
+
+
+def _search(queryset, search, table, fields):
+    """
+    ``queryset`` narrowed to rows matching ``search``, annotated with ``search_rank``.
+
+    Lower ranks are better matches; the ``icontains`` fallback ranks every row 0.
+    """
+    expression = trigram_query(search) if fts_table_available(table) else None
+    if expression is None:
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': search})
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField()),
+        )
+    # Join the FTS table rather than looking the rank up per row, so MATCH runs
+    # once per query and the index drives the join by rowid.
+    row_id = f'"{queryset.model._meta.db_table}"."id"'
+    return queryset.extra(
+        tables=[table],
+        where=[f'"{table}" MATCH %s', f'"{table}".rowid = {row_id}'],
+        params=[expression],
+    ).annotate(search_rank=RawSQL(f'"{table}".rank', [], output_field=FloatField()))
+
+
+def search_invoices(queryset, search):
+    return _search(queryset, search, INVOICE_FTS_TABLE, INVOICE_SEARCH_FIELDS)
+
+
+def search_line_items(queryset, search):
+    return _search(queryset, search, LINE_ITEM_FTS_TABLE, LINE_ITEM_SEARCH_FIELDS)
+
+
+def rebuild_record_search_index():
+    """Refill both FTS tables from their source tables; returns ``{table: rows indexed}``."""
+    indexed = {}
+    with connection.cursor() as cursor:
+        for table, insert_sql in _REBUILD_SQL.items():
+            if not fts_table_available(table):
+                continue
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(insert_sql)
+            indexed[table] = cursor.rowcount
+    return indexed
@@ -0,0 +1,52 @@
+"""Scoped memoization of Job, ItemType and Contact lookups.
+
+Persisting an email's invoices resolves the same jobs, item types and sender
+contact again and again. ``resolver_scope()`` opens a ``ResolverContext`` that
+remembers each answer, including "no such row", until the scope ends; nested
+scopes share the outermost one. Open scopes inside the transaction that writes
+the rows so a rollback cannot leave the cache pointing at rows that are gone.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import contextvars
+
+_active_context = contextvars.ContextVar('invoice_resolver_context', default=None)
+
+
+class ResolverContext:
+    """Named lookup caches; ``None`` results are cached like any other."""
+
+    def __init__(self):
+        self._caches = {}
+
+    def cache(self, kind):
+        """The mutable ``{key: value}`` dict for ``kind``, for set-based callers."""
+        return self._caches.setdefault(kind, {})
+
+    def lookup(self, kind, key, resolve):
+        cache = self.cache(kind)
+        if key not in cache:
+            cache[key] = resolve()
+        return cache[key]
+
+
+@contextmanager
+def resolver_scope():
+    """Yield the active ``ResolverContext``, opening one if none is active."""
+    context = _active_context.get()
+    if context is not None:
+        yield context
+        return
+    context = ResolverContext()
+    token = _active_context.set(context)
+    try:
+        yield context
+    finally:
+        _active_context.reset(token)
+
+
+def current_resolvers():
+    """The active ``ResolverContext``, or a fresh unshared one outside any scope."""
+    return _active_context.get() or ResolverContext()
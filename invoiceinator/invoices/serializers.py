@@ -11,6 +11,20 @@ from .models import (
     ItemType,
     Vendor,
 )
+from .resolvers import current_resolvers
+
+
+def _item_type_path(serializer, item_type_id, get_item_type):
+    """
+    Full path of an item type, walked once per type for the whole serialization.
+
+    The resolver context is kept in the root serializer's context, so every row
+    of a list (and every nested serializer) shares it.
+    """
+    if not item_type_id:
+        return ''
+    resolvers = serializer.context.setdefault('resolvers', current_resolvers())
+    return resolvers.lookup('item_type_path', item_type_id, lambda: get_item_type().get_full_path())
 
 
 class VendorSerializer(serializers.ModelSerializer):
@@ -43,7 +57,7 @@ class ItemTypeSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_full_path(self, obj):
-        return obj.get_full_path()
+        return _item_type_path(self, obj.pk, lambda: obj)
 
     def validate_parent(self, value):
         instance = getattr(self, 'instance', None)
@@ -74,7 +88,7 @@ class InvoiceAutomationSettingsSerializer(serializers.ModelSerializer):
     class Meta:
         model = InvoiceAutomationSettings
         fields = '__all__'
-        read_only_fields = ('last_processed_at', 'updated_at')
+        read_only_fields = ('last_processed_at', 'gmail_history_id', 'updated_at')
 
 
 class JobSerializer(serializers.ModelSerializer):
@@ -90,9 +104,7 @@ class InventoryItemSerializer(serializers.ModelSerializer):
     item_type_name = serializers.SerializerMethodField()
 
     def get_item_type_name(self, obj):
-        if not obj.item_type_id:
-            return ''
-        return obj.item_type.get_full_path()
+        return _item_type_path(self, obj.item_type_id, lambda: obj.item_type)
 
     class Meta:
         model = InventoryItem
@@ -107,9 +119,7 @@ class LineItemSerializer(serializers.ModelSerializer):
     job_number = serializers.CharField(source='job.job_id', read_only=True)
 
     def get_item_type_name(self, obj):
-        if not obj.item_type_id:
-            return ''
-        return obj.item_type.get_full_path()
+        return _item_type_path(self, obj.item_type_id, lambda: obj.item_type)
     job_name = serializers.CharField(source='job.name', read_only=True)
     inventory_item_name = serializers.CharField(source='inventory_item.name', read_only=True)
 
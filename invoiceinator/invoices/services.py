@@ -5,16 +5,19 @@ from decimal import Decimal, InvalidOperation
 from email.utils import parsedate_to_datetime
 from io import BytesIO
 import logging
+from multiprocessing.pool import ThreadPool
 import os
+import queue
 import re
 import threading
 import time
+from urllib.parse import quote
 
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.utils import timezone
-from openpyxl import Workbook
+from googleapiclient.errors import HttpError
 
 from . import parsers as parser_module
 from .models import (
@@ -26,14 +29,23 @@ from .models import (
     Job,
     LineItem,
     ItemType,
+    ParseResultCache,
     ProcessedEmail,
+    StoredAttachment,
     Vendor,
     VendorEmail,
     exclude_ignored_vendor_relations,
 )
+from .attachment_store import blob_path, link_attachment, rename_attachment, write_blob
+from .gmail_batch import execute_batched
+from .ingest_timing import StageTimings
 from .item_types import resolve_item_type
-from .parsers import list_invoice_parsers, normalize_parser_output
-from .utils import get_gmail_service
+from .parse_cache import cached_parse_result, parse_cache_key, parse_with_cache, store_parse_result
+from .parsers import list_invoice_parsers
+from .parsers.service import run_parser, submit_parser
+from .resolvers import ResolverContext, current_resolvers, resolver_scope
+from .utils import get_gmail_service, gmail_service_factory
+from .xlsx_stream import stream_workbook
 
 logger = logging.getLogger(__name__)
 
@@ -42,10 +54,29 @@ _worker_lock = threading.Lock()
 _processing_lock = threading.Lock()
 
 GMAIL_INVOICE_QUERY = 'has:attachment invoice'
+# Base64 characters decoded per write when storing an attachment. A multiple of 4,
+# so each slice decodes on its own; about 768 KiB of PDF per write.
+ATTACHMENT_DECODE_CHUNK = 1024 * 1024
+# Message gets per batch round trip in the ingest pipeline. Attachments are never
+# batched: a batch response holds every part in memory at once, so each attachment
+# is its own request and at most one per fetch worker is in memory.
+GMAIL_INGEST_BATCH_SIZE = 20
+# Failed runs after which an incremental sync stops retrying a message in error.
+MAX_MESSAGE_ATTEMPTS = 5
+# Errors recorded for the message itself, which no retry can change.
+PERMANENT_MESSAGE_ERRORS = ('No PDF attachment found',)
+
+
+def attachment_url(stored_filename, sha256=''):
+    """
+    Relative URL for a saved PDF (works with the Vite /api and /media proxies).
 
-
-def media_url_for_stored_filename(stored_filename):
-    """Relative URL for saved PDFs (works with Vite /api and /media proxies)."""
+    Stored attachments are served by blob digest through the API; a PDF saved
+    before the attachment store only has a ``/media/`` URL, which is served in
+    DEBUG until ``manage.py backfill_attachment_index`` moves it into the store.
+    """
+    if sha256:
+        return f'/api/attachments/{sha256}/{quote(stored_filename)}'
     media_prefix = settings.MEDIA_URL.strip('/')
     return f'/{media_prefix}/{stored_filename}'
 
@@ -57,7 +88,8 @@ def attachment_info_from_cache(cache):
         'filename': cache.attachment_filename,
         'original_filename': cache.attachment_original_filename or cache.attachment_filename,
         'mimeType': cache.attachment_mime_type or 'application/pdf',
-        'url': media_url_for_stored_filename(cache.attachment_filename),
+        'sha256': cache.attachment_sha256 or '',
+        'url': attachment_url(cache.attachment_filename, cache.attachment_sha256),
     }
 
 
@@ -70,6 +102,7 @@ def _update_email_cache_attachment(message_id, attachment_info):
             'attachment_filename': attachment_info.get('filename') or '',
             'attachment_original_filename': attachment_info.get('original_filename') or '',
             'attachment_mime_type': attachment_info.get('mimeType') or 'application/pdf',
+            'attachment_sha256': attachment_info.get('sha256') or None,
             'last_seen_at': timezone.now(),
         },
     )
@@ -85,16 +118,6 @@ def _safe_filename_part(value, fallback='invoice'):
     return text or fallback
 
 
-def _unique_media_filename(media_dir, filename):
-    base, extension = os.path.splitext(filename)
-    candidate = filename
-    index = 2
-    while os.path.exists(os.path.join(media_dir, candidate)):
-        candidate = f'{base}_{index}{extension}'
-        index += 1
-    return candidate
-
-
 def _invoice_job_or_po(invoice):
     line_items = invoice.line_items.select_related('job').all()
     job_values = sorted({
@@ -138,45 +161,39 @@ def _attachment_filename_for_invoices(message_id, vendor, invoices, original_fil
     )
 
 
-def _rename_attachment_for_invoices(file_path, message_id, vendor, invoices, original_filename):
+def _rename_attachment_for_invoices(stored_attachment, message_id, vendor, invoices, original_filename):
     if not invoices:
-        return os.path.basename(file_path)
-    media_dir = os.path.dirname(file_path)
+        return stored_attachment.filename
     target_filename = _attachment_filename_for_invoices(message_id, vendor, invoices, original_filename)
-    target_filename = _unique_media_filename(media_dir, target_filename)
-    target_path = os.path.join(media_dir, target_filename)
-    if os.path.abspath(file_path) != os.path.abspath(target_path):
-        os.replace(file_path, target_path)
-    return target_filename
+    return rename_attachment(stored_attachment, target_filename)
 
 
 def attachment_info_for_message(message_id):
-    """Find a previously saved PDF for this Gmail message id."""
+    """
+    Find a previously saved PDF for this Gmail message id.
+
+    One indexed lookup of the message's ``StoredAttachment``; PDFs saved before
+    the attachment store are found once ``manage.py backfill_attachment_index``
+    has indexed them.
+    """
     cached = attachment_info_from_cache(
         EmailMessageCache.objects.filter(email_id=message_id).first()
     )
     if cached:
         return cached
 
-    media_dir = settings.MEDIA_ROOT
-    if not os.path.isdir(media_dir):
+    stored = StoredAttachment.objects.filter(email_id=message_id).order_by('created_at', 'pk').first()
+    if stored is None:
         return None
-
-    prefix = f'{message_id}_'
-    for name in sorted(os.listdir(media_dir)):
-        if not name.startswith(prefix):
-            continue
-        if not name.lower().endswith('.pdf'):
-            continue
-        attachment_info = {
-            'filename': name,
-            'original_filename': name[len(prefix):],
-            'mimeType': 'application/pdf',
-            'url': media_url_for_stored_filename(name),
-        }
-        _update_email_cache_attachment(message_id, attachment_info)
-        return attachment_info
-    return None
+    attachment_info = {
+        'filename': stored.filename,
+        'original_filename': stored.original_filename or stored.filename,
+        'mimeType': stored.mime_type or 'application/pdf',
+        'sha256': stored.sha256,
+        'url': attachment_url(stored.filename, stored.sha256),
+    }
+    _update_email_cache_attachment(message_id, attachment_info)
+    return attachment_info
 
 
 def _extract_sender_email(from_header):
@@ -427,14 +444,23 @@ def _inventory_item_label(line_item_payload):
 
 
 def _revert_inventory_from_existing_invoice(invoice):
+    """Subtract an invoice's line-item quantities from inventory before it is re-imported."""
+    reverted = {}
     for line_item in invoice.line_items.select_related('inventory_item').all():
-        inventory_item = line_item.inventory_item
-        if not inventory_item:
+        if not line_item.inventory_item_id:
             continue
+        inventory_item = reverted.setdefault(line_item.inventory_item_id, line_item.inventory_item)
         qty = _decimal_12_4(line_item.qty) or Decimal('0')
         inventory_item.current_qty = (inventory_item.current_qty or Decimal('0')) - qty
         inventory_item.last_invoiced_at = invoice.processed_at or inventory_item.last_invoiced_at
-        inventory_item.save(update_fields=['current_qty', 'last_invoiced_at', 'updated_at'])
+    if reverted:
+        now = timezone.now()
+        for inventory_item in reverted.values():
+            inventory_item.updated_at = now
+        InventoryItem.objects.bulk_update(
+            list(reverted.values()),
+            ['current_qty', 'last_invoiced_at', 'updated_at'],
+        )
 
 
 def sync_invoice_receipt_status(invoice):
@@ -458,10 +484,8 @@ def sync_invoice_receipt_status(invoice):
     return invoice
 
 
-def _update_inventory_from_line_item(invoice, line_item, line_item_payload):
-    item_key = _inventory_item_key(line_item_payload)
-    if not item_key:
-        return None
+def _inventory_qty_for_line_item(line_item_payload):
+    """Quantity a line item adds to inventory, or ``None`` when it must not touch inventory."""
     current_qty = _decimal_12_4(line_item_payload.get('qty'))
     if current_qty is None:
         if line_item_payload.get('qty') not in (None, '') and _decimal(line_item_payload.get('qty')) is not None:
@@ -471,40 +495,91 @@ def _update_inventory_from_line_item(invoice, line_item, line_item_payload):
             )
             return None
         current_qty = Decimal('0')
-    inventory_item, _created = InventoryItem.objects.get_or_create(
+    return current_qty
+
+
+def _new_inventory_item(invoice, item_key, item_type, line_item_payload, current_qty):
+    return InventoryItem(
         vendor=invoice.vendor,
         item_key=item_key,
-        defaults={
-            'item_type': line_item.item_type,
-            'item_id': str(line_item_payload.get('id') or ''),
-            'name': _inventory_item_label(line_item_payload),
-            'description': str(line_item_payload.get('description') or ''),
-            'unit': str(line_item_payload.get('unit') or ''),
-            'current_qty': current_qty,
-            'last_unit_price': _decimal_12_4(line_item_payload.get('unit_price')),
-            'last_total_price': _decimal_12_4(line_item_payload.get('total_price')),
-            'last_invoiced_at': invoice.processed_at or timezone.now(),
-            'metadata': {'last_invoice_id': invoice.id},
-        },
+        item_type=item_type,
+        item_id=str(line_item_payload.get('id') or ''),
+        name=_inventory_item_label(line_item_payload),
+        description=str(line_item_payload.get('description') or ''),
+        unit=str(line_item_payload.get('unit') or ''),
+        current_qty=current_qty,
+        last_unit_price=_decimal_12_4(line_item_payload.get('unit_price')),
+        last_total_price=_decimal_12_4(line_item_payload.get('total_price')),
+        last_invoiced_at=invoice.processed_at or timezone.now(),
+        metadata={'last_invoice_id': invoice.id},
     )
-    if not _created:
-        inventory_item.item_type = line_item.item_type or inventory_item.item_type
-        inventory_item.item_id = str(line_item_payload.get('id') or inventory_item.item_id)
-        inventory_item.name = _inventory_item_label(line_item_payload) or inventory_item.name
-        inventory_item.description = str(line_item_payload.get('description') or inventory_item.description)
-        inventory_item.unit = str(line_item_payload.get('unit') or inventory_item.unit)
-        inventory_item.current_qty = (inventory_item.current_qty or Decimal('0')) + current_qty
-        inventory_item.last_unit_price = _decimal_12_4(line_item_payload.get('unit_price'))
-        inventory_item.last_total_price = _decimal_12_4(line_item_payload.get('total_price'))
-        inventory_item.last_invoiced_at = invoice.processed_at or timezone.now()
-        inventory_item.metadata = {**(inventory_item.metadata or {}), 'last_invoice_id': invoice.id}
-        inventory_item.save(update_fields=[
-            'item_type', 'item_id', 'name', 'description', 'unit', 'current_qty',
-            'last_unit_price', 'last_total_price', 'last_invoiced_at', 'metadata', 'updated_at'
-        ])
-    line_item.inventory_item = inventory_item
-    line_item.save(update_fields=['inventory_item', 'updated_at'])
-    return inventory_item
+
+
+def _add_line_item_to_inventory_item(inventory_item, invoice, item_type, line_item_payload, current_qty):
+    inventory_item.item_type = item_type or inventory_item.item_type
+    inventory_item.item_id = str(line_item_payload.get('id') or inventory_item.item_id)
+    inventory_item.name = _inventory_item_label(line_item_payload) or inventory_item.name
+    inventory_item.description = str(line_item_payload.get('description') or inventory_item.description)
+    inventory_item.unit = str(line_item_payload.get('unit') or inventory_item.unit)
+    inventory_item.current_qty = (inventory_item.current_qty or Decimal('0')) + current_qty
+    inventory_item.last_unit_price = _decimal_12_4(line_item_payload.get('unit_price'))
+    inventory_item.last_total_price = _decimal_12_4(line_item_payload.get('total_price'))
+    inventory_item.last_invoiced_at = invoice.processed_at or timezone.now()
+    inventory_item.metadata = {**(inventory_item.metadata or {}), 'last_invoice_id': invoice.id}
+
+
+_INVENTORY_UPDATE_FIELDS = [
+    'item_type', 'item_id', 'name', 'description', 'unit', 'current_qty',
+    'last_unit_price', 'last_total_price', 'last_invoiced_at', 'metadata', 'updated_at',
+]
+
+
+def _apply_line_items_to_inventory(invoice, line_item_payloads, item_types):
+    """
+    Fold every line item into its InventoryItem and write the results in bulk.
+
+    Lines are applied in order, exactly as a per-row ``get_or_create`` would:
+    the first line for a new key creates the item, later lines add their qty and
+    overwrite the descriptive fields. Returns the InventoryItem (or ``None``)
+    for each line.
+    """
+    keys = [_inventory_item_key(payload) for payload in line_item_payloads]
+    existing = {
+        inventory_item.item_key: inventory_item
+        for inventory_item in InventoryItem.objects.filter(
+            vendor=invoice.vendor,
+            item_key__in={key for key in keys if key},
+        )
+    }
+    created = {}
+    updated = {}
+    assigned = []
+    for item_key, item_type, payload in zip(keys, item_types, line_item_payloads):
+        if not item_key:
+            assigned.append(None)
+            continue
+        current_qty = _inventory_qty_for_line_item(payload)
+        if current_qty is None:
+            assigned.append(None)
+            continue
+        inventory_item = created.get(item_key) or existing.get(item_key)
+        if inventory_item is None:
+            inventory_item = _new_inventory_item(invoice, item_key, item_type, payload, current_qty)
+            created[item_key] = inventory_item
+        else:
+            _add_line_item_to_inventory_item(inventory_item, invoice, item_type, payload, current_qty)
+            if inventory_item.pk:
+                updated[item_key] = inventory_item
+        assigned.append(inventory_item)
+
+    if created:
+        InventoryItem.objects.bulk_create(list(created.values()))
+    if updated:
+        now = timezone.now()
+        for inventory_item in updated.values():
+            inventory_item.updated_at = now
+        InventoryItem.objects.bulk_update(list(updated.values()), _INVENTORY_UPDATE_FIELDS)
+    return assigned
 
 
 def _normalize_line_item_key_value(value):
@@ -607,25 +682,126 @@ def _line_item_state_map(invoice):
     return state_map
 
 
-def _create_line_items_for_invoice(invoice, vendor, invoice_payload, existing_state=None):
-    """Create LineItem, Job, ItemType, and InventoryItem rows from parser output."""
-    existing_state = existing_state or {}
-    for line_item_payload in invoice_payload.get('line_items', []) or []:
+def _resolve_jobs(vendor, job_keys, resolvers):
+    """
+    Resolve ``[(job_id, job_name), ...]`` to Job rows (or ``None``) in set-based queries.
+
+    Matches calling ``resolve_job`` for each key in order: rows with a job id take
+    the last name seen for that id, rows without one are found or created by name.
+    Jobs already resolved in ``resolvers`` are not queried again; only jobs whose
+    name changes are written.
+    """
+    vendor_pk = vendor.pk if vendor else None
+    cached_by_job_id = resolvers.cache('job_by_job_id')
+    cached_by_name = resolvers.cache('job_by_name')
+    names_by_job_id = {}
+    plain_names = set()
+    for job_id, job_name in job_keys:
+        if job_id:
+            names_by_job_id[job_id] = job_name
+        elif job_name:
+            plain_names.add(job_name)
+
+    jobs_by_job_id = {}
+    if names_by_job_id:
+        jobs_by_job_id = {
+            job_id: cached_by_job_id[(vendor_pk, job_id)]
+            for job_id in names_by_job_id
+            if (vendor_pk, job_id) in cached_by_job_id
+        }
+        uncached = [job_id for job_id in names_by_job_id if job_id not in jobs_by_job_id]
+        if uncached:
+            jobs_by_job_id.update(
+                (job.job_id, job)
+                for job in Job.objects.filter(vendor=vendor, job_id__in=uncached)
+            )
+        renamed = [job for job in jobs_by_job_id.values() if job.name != names_by_job_id[job.job_id]]
+        if renamed:
+            now = timezone.now()
+            for job in renamed:
+                job.name = names_by_job_id[job.job_id]
+                job.updated_at = now
+            Job.objects.bulk_update(renamed, ['name', 'updated_at'])
+        missing = [
+            Job(vendor=vendor, job_id=job_id, name=job_name)
+            for job_id, job_name in names_by_job_id.items()
+            if job_id not in jobs_by_job_id
+        ]
+        jobs_by_job_id.update({job.job_id: job for job in Job.objects.bulk_create(missing)})
+        cached_by_job_id.update({(vendor_pk, job_id): job for job_id, job in jobs_by_job_id.items()})
+
+    jobs_by_name = {}
+    if plain_names:
+        jobs_by_name = {
+            name: cached_by_name[(vendor_pk, name)]
+            for name in plain_names
+            if (vendor_pk, name) in cached_by_name
+        }
+        uncached = [name for name in plain_names if name not in jobs_by_name]
+        if uncached:
+            jobs_by_name.update(
+                (job.name, job)
+                for job in Job.objects.filter(vendor=vendor, job_id='', name__in=uncached)
+            )
+        missing = [Job(vendor=vendor, job_id='', name=name) for name in plain_names if name not in jobs_by_name]
+        jobs_by_name.update({job.name: job for job in Job.objects.bulk_create(missing)})
+        cached_by_name.update({(vendor_pk, name): job for name, job in jobs_by_name.items()})
+
+    return [
+        jobs_by_job_id[job_id] if job_id else jobs_by_name.get(job_name)
+        for job_id, job_name in job_keys
+    ]
+
+
+def _resolve_item_types(line_item_payloads, resolvers):
+    """ItemType (or ``None``) for each line item, resolving each distinct type name once per scope."""
+    item_types = []
+    for line_item_payload in line_item_payloads:
         item_type_name = str(
             line_item_payload.get('item_type') or line_item_payload.get('type') or ''
         ).strip()
-        item_type = resolve_item_type(item_type_name) if item_type_name else None
+        if not item_type_name:
+            item_types.append(None)
+            continue
+        item_types.append(resolvers.lookup(
+            'item_type',
+            item_type_name,
+            lambda item_type_name=item_type_name: resolve_item_type(item_type_name),
+        ))
+    return item_types
+
+
+def _create_line_items_for_invoice(invoice, vendor, invoice_payload, existing_state=None):
+    """
+    Create LineItem, Job, ItemType, and InventoryItem rows from parser output.
+
+    Jobs, item types and inventory items are resolved up front in set-based
+    queries, so an invoice costs a handful of statements regardless of its size.
+    """
+    existing_state = existing_state or {}
+    line_item_payloads = list(invoice_payload.get('line_items', []) or [])
+    if not line_item_payloads:
+        return []
+    resolvers = current_resolvers()
+    item_types = _resolve_item_types(line_item_payloads, resolvers)
+    jobs = _resolve_jobs(vendor, [
+        (_line_item_job_id(payload), _line_item_job_name(payload))
+        for payload in line_item_payloads
+    ], resolvers)
+    inventory_items = _apply_line_items_to_inventory(invoice, line_item_payloads, item_types)
+
+    line_items = []
+    for line_item_payload, item_type, job, inventory_item in zip(
+        line_item_payloads, item_types, jobs, inventory_items,
+    ):
         state_key = _line_item_state_key(line_item_payload)
         preserved_state = existing_state.get(state_key, [])
         preserved_values = preserved_state.pop(0) if preserved_state else {}
-        line_item = LineItem.objects.create(
+        line_items.append(LineItem(
             invoice=invoice,
+            inventory_item=inventory_item,
             item_type=item_type,
-            job=resolve_job(
-                vendor,
-                _line_item_job_id(line_item_payload),
-                _line_item_job_name(line_item_payload),
-            ),
+            job=job,
             item_id=str(line_item_payload.get('id') or ''),
             name=str(line_item_payload.get('name') or ''),
             description=str(line_item_payload.get('description') or ''),
@@ -639,8 +815,8 @@ def _create_line_items_for_invoice(invoice, vendor, invoice_payload, existing_st
             received=bool(preserved_values.get('received', False)),
             notes=str(preserved_values.get('notes') or ''),
             raw_data=line_item_payload,
-        )
-        _update_inventory_from_line_item(invoice, line_item, line_item_payload)
+        ))
+    return LineItem.objects.bulk_create(line_items)
 
 
 @transaction.atomic
@@ -648,47 +824,57 @@ def upsert_invoice_from_payload(message_id, email_payload, invoice_payload, vend
     """Create or update Invoice and related line items from one parsed invoice dict."""
     email_payload = email_payload or {}
     source_email_date = _parse_datetime(email_payload.get('date'))
-    contact = resolve_contact(vendor, email_payload)
-    if not contact and vendor:
-        contact = vendor.contacts.filter(is_primary=True).first()
-    existing_invoice = (
-        Invoice.objects.filter(source_email_id=message_id)
-        .prefetch_related('line_items__job')
-        .first()
-    )
-    existing_line_item_state = _line_item_state_map(existing_invoice) if existing_invoice else {}
-    existing_received_at = existing_invoice.received_at if existing_invoice else None
+    with resolver_scope() as resolvers:
+        vendor_pk = vendor.pk if vendor else None
+        contact = resolvers.lookup(
+            'contact',
+            (vendor_pk, email_payload.get('from') or ''),
+            lambda: resolve_contact(vendor, email_payload),
+        )
+        if not contact and vendor:
+            contact = resolvers.lookup(
+                'primary_contact',
+                vendor_pk,
+                lambda: vendor.contacts.filter(is_primary=True).first(),
+            )
+        existing_invoice = (
+            Invoice.objects.filter(source_email_id=message_id)
+            .prefetch_related('line_items__job')
+            .first()
+        )
+        existing_line_item_state = _line_item_state_map(existing_invoice) if existing_invoice else {}
+        existing_received_at = existing_invoice.received_at if existing_invoice else None
 
-    defaults = {
-        'vendor': vendor,
-        'contact': contact,
-        'source_email_subject': email_payload.get('subject') or '',
-        'source_email_from': email_payload.get('from') or '',
-        'source_email_date': source_email_date,
-        'received_at': None,
-        'invoice_number': str(invoice_payload.get('invoice_number') or ''),
-        'invoice_date': _parse_date(invoice_payload.get('date_ordered')),
-        'ship_date': _parse_date(invoice_payload.get('ship_date')),
-        'due_date': _parse_date(invoice_payload.get('invoice_due_date')),
-        'customer_po': _invoice_customer_po(invoice_payload),
-        'invoice_total': _decimal_12_2(invoice_payload.get('invoice_total')),
-        'status': 'processed',
-        'processed_at': timezone.now(),
-        'raw_data': invoice_payload,
-    }
-    invoice, created = Invoice.objects.update_or_create(
-        source_email_id=message_id,
-        defaults=defaults,
-    )
-    if not created and existing_received_at != invoice.received_at:
-        invoice.received_at = existing_received_at
-        invoice.save(update_fields=['received_at', 'updated_at'])
-    if not created:
-        _revert_inventory_from_existing_invoice(existing_invoice)
-        invoice.line_items.all().delete()
-    _create_line_items_for_invoice(invoice, vendor, invoice_payload, existing_state=existing_line_item_state)
-    sync_invoice_receipt_status(invoice)
-    return invoice
+        defaults = {
+            'vendor': vendor,
+            'contact': contact,
+            'source_email_subject': email_payload.get('subject') or '',
+            'source_email_from': email_payload.get('from') or '',
+            'source_email_date': source_email_date,
+            'received_at': None,
+            'invoice_number': str(invoice_payload.get('invoice_number') or ''),
+            'invoice_date': _parse_date(invoice_payload.get('date_ordered')),
+            'ship_date': _parse_date(invoice_payload.get('ship_date')),
+            'due_date': _parse_date(invoice_payload.get('invoice_due_date')),
+            'customer_po': _invoice_customer_po(invoice_payload),
+            'invoice_total': _decimal_12_2(invoice_payload.get('invoice_total')),
+            'status': 'processed',
+            'processed_at': timezone.now(),
+            'raw_data': invoice_payload,
+        }
+        invoice, created = Invoice.objects.update_or_create(
+            source_email_id=message_id,
+            defaults=defaults,
+        )
+        if not created and existing_received_at != invoice.received_at:
+            invoice.received_at = existing_received_at
+            invoice.save(update_fields=['received_at', 'updated_at'])
+        if not created:
+            _revert_inventory_from_existing_invoice(existing_invoice)
+            invoice.line_items.all().delete()
+        _create_line_items_for_invoice(invoice, vendor, invoice_payload, existing_state=existing_line_item_state)
+        sync_invoice_receipt_status(invoice)
+        return invoice
 
 
 @transaction.atomic
@@ -710,16 +896,18 @@ def persist_parsed_invoices(vendor, email_payload, parsed_output, message_id_bas
         return []
 
     saved = []
-    for index, invoice_payload in enumerate(invoices_data, start=1):
-        source_id = f'{message_id_base}:{index}'
-        saved.append(
-            upsert_invoice_from_payload(
-                source_id,
-                email_payload,
-                invoice_payload,
-                vendor,
+    # One resolver scope for the whole email: its invoices share jobs, item types and the sender.
+    with resolver_scope():
+        for index, invoice_payload in enumerate(invoices_data, start=1):
+            source_id = f'{message_id_base}:{index}'
+            saved.append(
+                upsert_invoice_from_payload(
+                    source_id,
+                    email_payload,
+                    invoice_payload,
+                    vendor,
+                )
             )
-        )
     return saved
 
 
@@ -888,6 +1076,135 @@ def _list_message_ids(service, query):
             break
 
 
+class GmailHistoryExpired(Exception):
+    """The stored Gmail ``historyId`` is too old for ``users.history.list``."""
+
+
+def _current_history_id(service):
+    return str(service.users().getProfile(userId='me').execute().get('historyId') or '')
+
+
+def _list_history_message_ids(service, start_history_id):
+    """
+    Ids of messages added to the mailbox after ``start_history_id``, oldest first,
+    and the mailbox's latest ``historyId``.
+
+    Raises ``GmailHistoryExpired`` when Gmail no longer keeps that history.
+    """
+    message_ids = []
+    seen = set()
+    latest_history_id = start_history_id
+    page_token = None
+    while True:
+        try:
+            response = service.users().history().list(
+                userId='me',
+                startHistoryId=start_history_id,
+                historyTypes=['messageAdded'],
+                maxResults=500,
+                pageToken=page_token,
+            ).execute()
+        except HttpError as exc:
+            if getattr(exc.resp, 'status', None) == 404:
+                raise GmailHistoryExpired(start_history_id) from exc
+            raise
+        for record in response.get('history', []):
+            for added in record.get('messagesAdded', []):
+                message_id = added.get('message', {}).get('id')
+                if message_id and message_id not in seen:
+                    seen.add(message_id)
+                    message_ids.append(message_id)
+        latest_history_id = str(response.get('historyId') or latest_history_id)
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+    return message_ids, latest_history_id
+
+
+def _new_invoice_message_ids(service, message_ids, cutoff):
+    """
+    Narrow newly added ``message_ids`` to those matching ``GMAIL_INVOICE_QUERY``.
+
+    Gmail search cannot filter by id, so list the query over the window that
+    starts at the oldest new message (never before ``cutoff``) and intersect.
+    Returns ``(message_ids, complete)``; ``complete`` is false when a lookup
+    failed for a message that still exists, so the caller must read the same
+    history again next run.
+    """
+    if not message_ids:
+        return [], True
+    responses, errors = execute_batched(service, {
+        message_id: service.users().messages().get(userId='me', id=message_id, format='minimal')
+        for message_id in message_ids
+    })
+    complete = True
+    for message_id, exc in errors.items():
+        if isinstance(exc, HttpError) and getattr(exc.resp, 'status', None) == 404:
+            # Deleted since it was added; nothing left to process.
+            continue
+        complete = False
+        logger.warning('Could not read new Gmail message %s: %s', message_id, exc)
+    if not responses:
+        return [], complete
+    oldest_ms = min(int(message.get('internalDate') or 0) for message in responses.values())
+    after = max(oldest_ms // 1000 - 1, int(cutoff.timestamp()))
+    matching = set(_list_message_ids(service, f'{GMAIL_INVOICE_QUERY} after:{after}'))
+    return [message_id for message_id in message_ids if message_id in matching], complete
+
+
+def _retry_message_ids(cutoff):
+    """
+    Messages to try again on an incremental run: reset to pending or left in error.
+
+    Only rows last processed inside the ``cutoff`` window are retried, and
+    errors stop being retried once they are permanent or have failed
+    ``MAX_MESSAGE_ATTEMPTS`` times.
+    """
+    retryable_error = (
+        Q(status='error')
+        & (Q(data__attempts__isnull=True) | Q(data__attempts__lt=MAX_MESSAGE_ATTEMPTS))
+        & (Q(data__error__isnull=True) | ~Q(data__error__in=PERMANENT_MESSAGE_ERRORS))
+    )
+    return list(
+        ProcessedEmail.objects.filter(Q(status='pending') | retryable_error)
+        .filter(Q(processed__isnull=True) | Q(processed__gte=cutoff))
+        .order_by('-id')
+        .values_list('email_id', flat=True)
+    )
+
+
+def _pending_message_ids(service, settings_obj, cutoff):
+    """
+    Message ids for this run and the ``historyId`` to store once it completes.
+
+    With a stored ``gmail_history_id`` only messages added since then are
+    considered (plus pending/error retries); otherwise, or when that history
+    has expired, the full query window is listed. The ``historyId`` is ``None``
+    when some new message could not be read, so the stored one is kept.
+    """
+    if settings_obj.gmail_history_id:
+        try:
+            new_ids, history_id = _list_history_message_ids(service, settings_obj.gmail_history_id)
+        except GmailHistoryExpired:
+            logger.info('Gmail history %s expired; running a full resync', settings_obj.gmail_history_id)
+        else:
+            candidates = _retry_message_ids(cutoff)
+            retrying = set(candidates)
+            new_invoice_ids, complete = _new_invoice_message_ids(service, new_ids, cutoff)
+            candidates.extend(
+                message_id for message_id in new_invoice_ids if message_id not in retrying
+            )
+            if not complete:
+                # Keep the stored history id so the unread messages are listed again.
+                history_id = None
+            return candidates, history_id
+
+    # Read the history id before listing so messages arriving mid-run are seen next time.
+    history_id = _current_history_id(service)
+    query = f"{GMAIL_INVOICE_QUERY} after:{cutoff.strftime('%Y/%m/%d')}"
+    return _list_message_ids(service, query), history_id
+
+
 def _select_attachment_part(payload_parts):
     for part in payload_parts or []:
         if part.get('filename') and part.get('mimeType', '').lower() in {'application/pdf', 'application/octet-stream'}:
@@ -895,24 +1212,25 @@ def _select_attachment_part(payload_parts):
     return None
 
 
-def process_gmail_message(service, message_id):
-    existing = ProcessedEmail.objects.filter(email_id=message_id).first()
-    if existing and existing.status in ('processed', 'incorrect_parsing'):
-        return {
-            'status': 'skipped',
-            'reason': f'already {existing.status}',
-            'processed_email': existing,
-        }
+def _header_value(headers, name):
+    return next((header['value'] for header in headers if header['name'].lower() == name), '')
 
-    email = service.users().messages().get(userId='me', id=message_id).execute()
+
+def _begin_gmail_message(message_id, email):
+    """
+    Resolve the sender's vendor and PDF part for a fetched Gmail message.
+
+    Returns ``(context, None)`` when the attachment should be downloaded, or
+    ``(None, result)`` when the message ends here (ignored vendor, no PDF).
+    """
     headers = email.get('payload', {}).get('headers', [])
-    from_header = next((header['value'] for header in headers if header['name'].lower() == 'from'), '')
-    subject = next((header['value'] for header in headers if header['name'].lower() == 'subject'), '')
-    date_header = next((header['value'] for header in headers if header['name'].lower() == 'date'), '')
+    from_header = _header_value(headers, 'from')
+    subject = _header_value(headers, 'subject')
+    date_header = _header_value(headers, 'date')
     sender_email = _extract_sender_email(from_header)
     vendor = _sync_vendor_for_sender(from_header, sender_email) if sender_email else None
     if vendor_is_ignored(vendor):
-        return {'status': 'skipped', 'reason': 'vendor ignored'}
+        return None, {'status': 'skipped', 'reason': 'vendor ignored'}
     payload = email.get('payload', {})
     attachment = _select_attachment_part(payload.get('parts', []))
     if not attachment:
@@ -925,30 +1243,86 @@ def process_gmail_message(service, message_id):
                 'vendor': vendor,
             },
         )
-        return {'status': 'error', 'reason': 'no pdf attachment', 'processed_email': processed_email}
+        return None, {'status': 'error', 'reason': 'no pdf attachment', 'processed_email': processed_email}
+
+    context = {
+        'message_id': message_id,
+        'vendor': vendor,
+        'attachment': attachment,
+        'email_payload': {'from': from_header, 'subject': subject, 'date': date_header},
+        'timings': StageTimings(),
+    }
+    return context, None
 
-    attachment_payload = service.users().messages().attachments().get(
+
+def _gmail_attachment_request(service, message_id, attachment):
+    return service.users().messages().attachments().get(
         userId='me',
         messageId=message_id,
         id=attachment['body']['attachmentId'],
-    ).execute()
+    )
 
+
+def _download_gmail_attachment(service, message_id, attachment, timings):
+    """Fetch an attachment and write it to the blob store; touches no database rows."""
+    with timings.span('fetch'):
+        attachment_payload = _gmail_attachment_request(service, message_id, attachment).execute()
+    return _store_gmail_attachment(message_id, attachment, attachment_payload, timings)
+
+
+def _decode_base64_slices(data):
+    """Decode base64url ``data`` one slice at a time, so no decoded copy of the whole attachment is held."""
     from base64 import urlsafe_b64decode
-    media_dir = settings.MEDIA_ROOT
-    os.makedirs(media_dir, exist_ok=True)
+    for start in range(0, len(data), ATTACHMENT_DECODE_CHUNK):
+        piece = data[start:start + ATTACHMENT_DECODE_CHUNK]
+        yield urlsafe_b64decode(piece + '=' * (-len(piece) % 4))
+
+
+def _store_gmail_attachment(message_id, attachment, attachment_payload, timings):
+    """
+    Write a fetched attachment to the blob store.
+
+    Returns ``(stored_filename, pdf_sha256)``: the name the message's attachment
+    should get (not yet reserved) and the digest of its bytes.
+    """
     safe_filename = re.sub(r'[^a-zA-Z0-9.-]', '_', attachment['filename'])
     stored_filename = f'{message_id}_{safe_filename}'
-    file_path = os.path.join(media_dir, stored_filename)
-    with open(file_path, 'wb') as handle:
-        handle.write(urlsafe_b64decode(attachment_payload['data'].encode('UTF-8')))
+    # Drop the response's reference so the base64 text is freed once it is on disk.
+    data = attachment_payload.pop('data')
+    with timings.span('decode'):
+        pdf_sha256 = write_blob(_decode_base64_slices(data))
+    return stored_filename, pdf_sha256
 
+
+def _attach_downloaded_file(context, stored_filename, pdf_sha256):
+    """
+    Name the stored blob for this message and pick the vendor's parser.
+
+    Returns ``None`` when the message is ready to parse, else the final result.
+    """
+    message_id = context['message_id']
+    vendor = context['vendor']
+    attachment = context['attachment']
+    stored_attachment = link_attachment(
+        message_id,
+        stored_filename,
+        pdf_sha256,
+        original_filename=attachment['filename'],
+        mime_type=attachment.get('mimeType', 'application/pdf'),
+    )
+    stored_filename = stored_attachment.filename
     attachment_info = {
         'filename': stored_filename,
         'original_filename': attachment['filename'],
         'mimeType': attachment.get('mimeType', 'application/pdf'),
-        'url': media_url_for_stored_filename(stored_filename),
+        'sha256': pdf_sha256,
+        'url': attachment_url(stored_filename, pdf_sha256),
     }
     _update_email_cache_attachment(message_id, attachment_info)
+    context['stored_attachment'] = stored_attachment
+    context['file_path'] = blob_path(pdf_sha256)
+    context['pdf_sha256'] = pdf_sha256
+    context['attachment_info'] = attachment_info
 
     parser = _selected_parser_for_vendor(vendor)
     if not parser:
@@ -957,7 +1331,7 @@ def process_gmail_message(service, message_id):
             defaults={
                 'status': 'error',
                 'processed': timezone.now(),
-                'data': {'error': 'No parser configured for vendor', 'subject': subject},
+                'data': {'error': 'No parser configured for vendor', 'subject': context['email_payload']['subject']},
                 'vendor': vendor,
                 'invoice': None,
             },
@@ -968,42 +1342,50 @@ def process_gmail_message(service, message_id):
             'processed_email': processed_email,
             'attachment': attachment_info,
         }
+    context['parser'] = parser
+    context['vendor_name'] = getattr(parser, 'name', None) or (vendor.name if vendor else None)
+    return None
 
-    parsed = normalize_parser_output(
-        parser(file_path),
-        vendor_name=getattr(parser, 'name', None) or (vendor.name if vendor else None),
-    )
-    email_payload = {'from': from_header, 'subject': subject, 'date': date_header}
-    created_invoices = persist_parsed_invoices(
-        vendor,
-        email_payload,
-        parsed,
-        message_id,
-    )
-    stored_filename = _rename_attachment_for_invoices(
-        file_path,
-        message_id,
-        vendor,
-        created_invoices,
-        attachment['filename'],
-    )
+
+def _finish_gmail_message(context, parsed):
+    message_id = context['message_id']
+    vendor = context['vendor']
+    timings = context['timings']
+    timings.note_parse(context['parser'], parsed)
+    with timings.span('persist'):
+        created_invoices = persist_parsed_invoices(
+            vendor,
+            context['email_payload'],
+            parsed,
+            message_id,
+        )
+    with timings.span('rename'):
+        stored_filename = _rename_attachment_for_invoices(
+            context['stored_attachment'],
+            message_id,
+            vendor,
+            created_invoices,
+            context['attachment']['filename'],
+        )
     attachment_info = {
-        **attachment_info,
+        **context['attachment_info'],
         'filename': stored_filename,
-        'url': media_url_for_stored_filename(stored_filename),
+        'url': attachment_url(stored_filename, context['pdf_sha256']),
     }
-    _update_email_cache_attachment(message_id, attachment_info)
-
-    processed_email, _ = ProcessedEmail.objects.update_or_create(
-        email_id=message_id,
-        defaults={
-            'status': 'processed',
-            'processed': timezone.now(),
-            'data': parsed,
-            'vendor': vendor,
-            'invoice': created_invoices[0] if created_invoices else None,
-        },
-    )
+    with timings.span('persist'):
+        _update_email_cache_attachment(message_id, attachment_info)
+        # The row write is the last span; its own time is not included in the timings it stores.
+        processed_email, _ = ProcessedEmail.objects.update_or_create(
+            email_id=message_id,
+            defaults={
+                'status': 'processed',
+                'processed': timezone.now(),
+                'data': parsed,
+                'vendor': vendor,
+                'invoice': created_invoices[0] if created_invoices else None,
+                'timings': timings.as_dict(),
+            },
+        )
     return {
         'status': 'processed',
         'processed_email': processed_email,
@@ -1013,33 +1395,88 @@ def process_gmail_message(service, message_id):
     }
 
 
-def process_pending_gmail_invoices(limit=None):
-    settings_obj = _ensure_invoice_automation_settings()
-    if not settings_obj.auto_process_enabled:
-        return {'status': 'disabled', 'processed': 0}
+def process_gmail_message(service, message_id):
+    existing = ProcessedEmail.objects.filter(email_id=message_id).first()
+    if existing and existing.status in ('processed', 'incorrect_parsing'):
+        return {
+            'status': 'skipped',
+            'reason': f'already {existing.status}',
+            'processed_email': existing,
+        }
 
-    service = get_gmail_service()
-    cutoff = timezone.now() - timedelta(days=settings_obj.max_email_age_days)
-    query = f"{GMAIL_INVOICE_QUERY} after:{cutoff.strftime('%Y/%m/%d')}"
+    fetch_started = time.perf_counter()
+    email = service.users().messages().get(userId='me', id=message_id).execute()
+    fetch_seconds = time.perf_counter() - fetch_started
+    context, result = _begin_gmail_message(message_id, email)
+    if result:
+        return result
+    timings = context['timings']
+    timings.add('fetch', fetch_seconds)
+    stored_filename, pdf_sha256 = _download_gmail_attachment(service, message_id, context['attachment'], timings)
+    result = _attach_downloaded_file(context, stored_filename, pdf_sha256)
+    if result:
+        return result
+
+    with timings.span('parse'):
+        parsed = parse_with_cache(
+            context['parser'],
+            context['file_path'],
+            vendor_name=context['vendor_name'],
+            pdf_sha256=context['pdf_sha256'],
+        )
+    return _finish_gmail_message(context, parsed)
+
+
+def _record_message_error(message_id, exc):
+    logger.error('Error auto-processing message %s', message_id, exc_info=exc)
+    previous = (
+        ProcessedEmail.objects.filter(email_id=message_id, status='error')
+        .values_list('data', flat=True)
+        .first()
+    ) or {}
+    attempts = previous.get('attempts', 0)
+    ProcessedEmail.objects.update_or_create(
+        email_id=message_id,
+        defaults={
+            'status': 'error',
+            'processed': timezone.now(),
+            'data': {'error': str(exc), 'attempts': attempts + 1},
+        },
+    )
 
+
+def _auto_processing_enabled(settings_obj):
+    try:
+        settings_obj.refresh_from_db(fields=['auto_process_enabled', 'last_processed_at'])
+    except InvoiceAutomationSettings.DoesNotExist:
+        return False
+    return settings_obj.auto_process_enabled
+
+
+def _is_already_processed(message_id):
+    return ProcessedEmail.objects.filter(
+        email_id=message_id,
+        status__in=('processed', 'incorrect_parsing'),
+    ).exists()
+
+
+def _ingest_worker_counts():
+    fetch_workers = max(1, int(getattr(settings, 'GMAIL_INGEST_FETCH_WORKERS', 1)))
+    parse_workers = max(0, int(getattr(settings, 'GMAIL_INGEST_PARSE_WORKERS', 0)))
+    return fetch_workers, parse_workers
+
+
+def _process_messages_sequentially(service, message_ids, settings_obj, limit):
     processed = 0
     results = []
     interrupted = False
-    for message_id in _list_message_ids(service, query):
+    for message_id in message_ids:
         if limit is not None and processed >= limit:
             break
-        try:
-            settings_obj.refresh_from_db(fields=['auto_process_enabled', 'last_processed_at'])
-        except InvoiceAutomationSettings.DoesNotExist:
-            interrupted = True
-            break
-        if not settings_obj.auto_process_enabled:
+        if not _auto_processing_enabled(settings_obj):
             interrupted = True
             break
-        if ProcessedEmail.objects.filter(
-            email_id=message_id,
-            status__in=('processed', 'incorrect_parsing'),
-        ).exists():
+        if _is_already_processed(message_id):
             continue
         try:
             result = process_gmail_message(service, message_id)
@@ -1047,19 +1484,201 @@ def process_pending_gmail_invoices(limit=None):
                 processed += 1
             results.append(result)
         except Exception as exc:
-            logger.exception('Error auto-processing message %s', message_id)
-            ProcessedEmail.objects.update_or_create(
-                email_id=message_id,
-                defaults={
-                    'status': 'error',
-                    'processed': timezone.now(),
-                    'data': {'error': str(exc)},
-                },
-            )
+            _record_message_error(message_id, exc)
+    return processed, results, interrupted
+
+
+def _process_messages_pipelined(service_factory, message_ids, settings_obj, limit, fetch_workers, parse_workers):
+    """
+    Staged ingest: Gmail fetches on a thread pool, PDF parsing on the parse
+    service's worker processes, and every database read/write on the calling
+    thread (the single writer).
+
+    Gmail messages are fetched ``GMAIL_INGEST_BATCH_SIZE`` per batch round trip;
+    attachments one request each, so only one attachment per fetch worker is
+    held in memory. Stages report back through one completion queue, and
+    the number of messages in flight is capped, so a large backlog never
+    downloads faster than it can be parsed and saved.
+    """
+    events = queue.Queue()
+    local = threading.local()
+    max_in_flight = 2 * max(fetch_workers + parse_workers, GMAIL_INGEST_BATCH_SIZE)
+
+    def thread_service():
+        # Gmail clients share an httplib2 connection that is not thread-safe.
+        if getattr(local, 'service', None) is None:
+            local.service = service_factory()
+        return local.service
+
+    def fetch_messages(message_ids):
+        service = thread_service()
+        started = time.perf_counter()
+        responses, errors = execute_batched(service, {
+            message_id: service.users().messages().get(userId='me', id=message_id)
+            for message_id in message_ids
+        })
+        # A batched fetch costs each of its messages the whole round trip.
+        elapsed = time.perf_counter() - started
+        fetch_seconds.update((message_id, elapsed) for message_id in message_ids)
+        outcomes = {message_id: (None, exc) for message_id, exc in errors.items()}
+        outcomes.update({message_id: (email, None) for message_id, email in responses.items()})
+        return outcomes
+
+    def submit_batch(stage, message_ids, func, args):
+        def fan_out(outcomes):
+            for message_id in message_ids:
+                value, exc = outcomes.get(message_id, (None, RuntimeError('No response in Gmail batch')))
+                events.put((stage, message_id, value, exc))
+
+        def fail_all(exc):
+            for message_id in message_ids:
+                events.put((stage, message_id, None, exc))
+
+        fetch_pool.apply_async(func, args, callback=fan_out, error_callback=fail_all)
+
+    def fetch_attachment(message_id, attachment, timings):
+        return _download_gmail_attachment(thread_service(), message_id, attachment, timings)
+
+    def submit_download(message_id, context):
+        fetch_pool.apply_async(
+            fetch_attachment,
+            (message_id, context['attachment'], context['timings']),
+            callback=lambda stored: events.put(('attachment', message_id, stored, None)),
+            error_callback=lambda exc: events.put(('attachment', message_id, None, exc)),
+        )
+
+    contexts = {}
+    fetch_seconds = {}
+
+    def parse_stage(message_id, context):
+        context['parse_started'] = time.perf_counter()
+        key = parse_cache_key(context['parser'], context['file_path'], context['pdf_sha256'])
+        cached = cached_parse_result(key, vendor_name=context['vendor_name'])
+        if cached is not None:
+            return persist_stage(context, cached)
+        context['cache_key'] = key
+        args = (context['parser'], context['file_path'], context['vendor_name'])
+        if parse_workers <= 1:
+            return persist_stage(context, run_parser(*args))
+
+        def report(future):
+            error = future.exception()
+            events.put(('parsed', message_id, None if error else future.result(), error))
+
+        submit_parser(*args).add_done_callback(report)
+        return None
+
+    def persist_stage(context, parsed):
+        # Parse time includes the wait for a parse-service worker.
+        context['timings'].add('parse', time.perf_counter() - context['parse_started'])
+        store_parse_result(context.get('cache_key'), parsed)
+        return _finish_gmail_message(context, parsed)
+
+    def handle(stage, message_id, value):
+        if stage == 'message':
+            seconds = fetch_seconds.pop(message_id, 0.0)
+            context, result = _begin_gmail_message(message_id, value)
+            if result:
+                return result
+            context['timings'].add('fetch', seconds)
+            contexts[message_id] = context
+            submit_download(message_id, context)
+            return None
+        context = contexts[message_id]
+        if stage == 'attachment':
+            result = _attach_downloaded_file(context, *value)
+            return result or parse_stage(message_id, context)
+        return persist_stage(context, value)
+
+    processed = 0
+    results = []
+    interrupted = False
+    in_flight = 0
+    pending_ids = iter(message_ids)
+    exhausted = False
+    fetch_pool = ThreadPool(processes=fetch_workers)
+    try:
+        while True:
+            batch = []
+            # Top up a whole batch at a time so message fetches stay batched.
+            can_feed = in_flight == 0 or max_in_flight - in_flight >= GMAIL_INGEST_BATCH_SIZE
+            while can_feed and not (exhausted or interrupted) and in_flight < max_in_flight:
+                if limit is not None and processed + in_flight >= limit:
+                    break
+                message_id = next(pending_ids, None)
+                if message_id is None:
+                    exhausted = True
+                    break
+                if not _auto_processing_enabled(settings_obj):
+                    interrupted = True
+                    break
+                if _is_already_processed(message_id):
+                    continue
+                in_flight += 1
+                batch.append(message_id)
+                if len(batch) >= GMAIL_INGEST_BATCH_SIZE:
+                    submit_batch('message', batch, fetch_messages, (batch,))
+                    batch = []
+            if batch:
+                submit_batch('message', batch, fetch_messages, (batch,))
+            if not in_flight:
+                break
+
+            stage, message_id, value, error = events.get()
+            try:
+                if error is not None:
+                    raise error
+                result = handle(stage, message_id, value)
+            except Exception as exc:
+                _record_message_error(message_id, exc)
+            else:
+                if result is None:
+                    continue
+                if result.get('status') == 'processed':
+                    processed += 1
+                results.append(result)
+            in_flight -= 1
+            contexts.pop(message_id, None)
+    finally:
+        fetch_pool.terminate()
+    return processed, results, interrupted
+
+
+def process_pending_gmail_invoices(limit=None):
+    settings_obj = _ensure_invoice_automation_settings()
+    if not settings_obj.auto_process_enabled:
+        return {'status': 'disabled', 'processed': 0}
+
+    service = get_gmail_service()
+    cutoff = timezone.now() - timedelta(days=settings_obj.max_email_age_days)
+    message_ids, history_id = _pending_message_ids(service, settings_obj, cutoff)
+
+    fetch_workers, parse_workers = _ingest_worker_counts()
+    if fetch_workers > 1 or parse_workers > 1:
+        processed, results, interrupted = _process_messages_pipelined(
+            gmail_service_factory(),
+            message_ids,
+            settings_obj,
+            limit,
+            fetch_workers,
+            parse_workers,
+        )
+    else:
+        processed, results, interrupted = _process_messages_sequentially(
+            service,
+            message_ids,
+            settings_obj,
+            limit,
+        )
 
     if not interrupted:
         settings_obj.last_processed_at = timezone.now()
-        settings_obj.save(update_fields=['last_processed_at', 'updated_at'])
+        update_fields = ['last_processed_at', 'updated_at']
+        # A limited run may stop before every new message was seen; keep the old history id.
+        if limit is None and history_id:
+            settings_obj.gmail_history_id = history_id
+            update_fields.append('gmail_history_id')
+        settings_obj.save(update_fields=update_fields)
     return {'status': 'ok', 'processed': processed, 'results': results}
 
 
@@ -1069,45 +1688,51 @@ def get_automation_settings():
 
 def update_automation_settings(**kwargs):
     settings_obj = _ensure_invoice_automation_settings()
+    previous_max_age = settings_obj.max_email_age_days
     for field in ('auto_process_enabled', 'max_email_age_days', 'poll_interval_seconds'):
         if field in kwargs and kwargs[field] is not None:
             setattr(settings_obj, field, kwargs[field])
+    if settings_obj.max_email_age_days > previous_max_age:
+        # A wider window includes older mail that incremental sync would never see.
+        settings_obj.gmail_history_id = ''
     settings_obj.save()
     return settings_obj
 
 
-def export_invoices_workbook():
-    workbook = Workbook()
-    invoice_sheet = workbook.active
-    invoice_sheet.title = 'Invoices'
-    line_sheet = workbook.create_sheet('Line Items')
-    inventory_sheet = workbook.create_sheet('Inventory')
-
-    invoice_headers = [
-        'Invoice ID', 'Source Email ID', 'Vendor', 'Contact', 'Invoice Number', 'Invoice Date',
-        'Received At', 'Ship Date', 'Due Date', 'Customer PO', 'Invoice Total', 'Status',
-        'Processed At', 'Source Email From', 'Source Email Subject',
-    ]
-    line_headers = [
-        'Invoice ID', 'Invoice Number', 'Item Type', 'Item ID', 'Name', 'Description',
-        'Job ID', 'Job Name',
-        'Qty', 'Unit', 'Unit Price', 'Total Price', 'Width', 'Length', 'Height',
-        'Received', 'Notes',
-    ]
-    inventory_headers = [
-        'Item ID', 'Vendor', 'Item Type', 'Item Key', 'Name', 'Description', 'Unit', 'Current Qty',
-        'Last Unit Price', 'Last Total Price', 'Last Invoiced At',
-    ]
+EXPORT_CHUNK_SIZE = 2000
+
+_INVOICE_EXPORT_HEADERS = [
+    'Invoice ID', 'Source Email ID', 'Vendor', 'Contact', 'Invoice Number', 'Invoice Date',
+    'Received At', 'Ship Date', 'Due Date', 'Customer PO', 'Invoice Total', 'Status',
+    'Processed At', 'Source Email From', 'Source Email Subject',
+]
+_LINE_ITEM_EXPORT_HEADERS = [
+    'Invoice ID', 'Invoice Number', 'Item Type', 'Item ID', 'Name', 'Description',
+    'Job ID', 'Job Name',
+    'Qty', 'Unit', 'Unit Price', 'Total Price', 'Width', 'Length', 'Height',
+    'Received', 'Notes',
+]
+_INVENTORY_EXPORT_HEADERS = [
+    'Item ID', 'Vendor', 'Item Type', 'Item Key', 'Name', 'Description', 'Unit', 'Current Qty',
+    'Last Unit Price', 'Last Total Price', 'Last Invoiced At',
+]
+
 
-    invoice_sheet.append(invoice_headers)
-    line_sheet.append(line_headers)
-    inventory_sheet.append(inventory_headers)
+def _export_item_type_path(resolvers, owner):
+    if not owner.item_type_id:
+        return ''
+    return resolvers.lookup(
+        'item_type_path', owner.item_type_id, lambda: owner.item_type.get_full_path()
+    )
 
+
+def _invoice_export_rows(chunk_size):
+    yield _INVOICE_EXPORT_HEADERS
     invoice_qs = exclude_ignored_vendor_relations(
-        Invoice.objects.select_related('vendor').prefetch_related('line_items')
+        Invoice.objects.select_related('vendor', 'contact')
     ).order_by('-received_at', '-processed_at', '-created_at')
-    for invoice in invoice_qs:
-        invoice_sheet.append([
+    for invoice in invoice_qs.iterator(chunk_size=chunk_size):
+        yield [
             invoice.id,
             invoice.source_email_id,
             invoice.vendor.name if invoice.vendor else '',
@@ -1123,13 +1748,25 @@ def export_invoices_workbook():
             invoice.processed_at.isoformat() if invoice.processed_at else '',
             invoice.source_email_from,
             invoice.source_email_subject,
-        ])
+        ]
 
+
+def _line_item_export_rows(resolvers, chunk_size):
+    yield _LINE_ITEM_EXPORT_HEADERS
+    invoice_qs = exclude_ignored_vendor_relations(
+        Invoice.objects.only('id', 'invoice_number').prefetch_related(
+            Prefetch(
+                'line_items',
+                queryset=LineItem.objects.select_related('job', 'item_type').order_by('id'),
+            )
+        )
+    ).order_by('-received_at', '-processed_at', '-created_at')
+    for invoice in invoice_qs.iterator(chunk_size=chunk_size):
         for line_item in invoice.line_items.all():
-            line_sheet.append([
+            yield [
                 invoice.id,
                 invoice.invoice_number,
-                line_item.item_type.get_full_path() if line_item.item_type else '',
+                _export_item_type_path(resolvers, line_item),
                 line_item.item_id,
                 line_item.name,
                 line_item.description,
@@ -1144,13 +1781,19 @@ def export_invoices_workbook():
                 float(line_item.height) if line_item.height is not None else '',
                 'Yes' if line_item.received else 'No',
                 line_item.notes,
-            ])
+            ]
+
 
-    for item in InventoryItem.objects.select_related('vendor').order_by('name', 'item_key'):
-        inventory_sheet.append([
+def _inventory_export_rows(resolvers, chunk_size):
+    yield _INVENTORY_EXPORT_HEADERS
+    inventory_qs = InventoryItem.objects.select_related('vendor', 'item_type').order_by(
+        'name', 'item_key'
+    )
+    for item in inventory_qs.iterator(chunk_size=chunk_size):
+        yield [
             item.id,
             item.vendor.name if item.vendor else '',
-            item.item_type.get_full_path() if item.item_type else '',
+            _export_item_type_path(resolvers, item),
             item.item_key,
             item.name,
             item.description,
@@ -1159,11 +1802,42 @@ def export_invoices_workbook():
             float(item.last_unit_price) if item.last_unit_price is not None else '',
             float(item.last_total_price) if item.last_total_price is not None else '',
             item.last_invoiced_at.isoformat() if item.last_invoiced_at else '',
-        ])
+        ]
 
+
+def export_invoices_workbook_chunks(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the invoice / line item / inventory export as XLSX bytes while it is built.
+
+    Each sheet is a generator over a ``chunk_size``-batched queryset iterator, and
+    ``stream_workbook`` compresses rows into the zip as they arrive, so the first
+    bytes go out before the later rows are read and memory stays flat however many
+    line items there are. Line items re-walk the invoices (one prefetch per batch)
+    because a sheet has to be finished before the next one starts. Each item
+    type's path is built once.
+    """
+    resolvers = ResolverContext()
+    return stream_workbook([
+        ('Invoices', _invoice_export_rows(chunk_size)),
+        ('Line Items', _line_item_export_rows(resolvers, chunk_size)),
+        ('Inventory', _inventory_export_rows(resolvers, chunk_size)),
+    ])
+
+
+def write_invoices_workbook(target, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write the export to ``target``, a path or binary file."""
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, 'wb') as handle:
+            write_invoices_workbook(handle, chunk_size=chunk_size)
+        return
+    for chunk in export_invoices_workbook_chunks(chunk_size=chunk_size):
+        target.write(chunk)
+
+
+def export_invoices_workbook():
+    """The export as bytes; prefer ``export_invoices_workbook_chunks`` for large exports."""
     buffer = BytesIO()
-    workbook.save(buffer)
-    buffer.seek(0)
+    write_invoices_workbook(buffer)
     return buffer.getvalue()
 
 
@@ -1222,6 +1896,8 @@ def reset_invoice_data(remove_all=False):
         'contacts': Contact.objects.count(),
         'jobs': Job.objects.count(),
         'vendor_emails': VendorEmail.objects.count(),
+        'parse_results': ParseResultCache.objects.count(),
+        'stored_attachments': StoredAttachment.objects.count(),
     }
     if remove_all:
         counts.update({
@@ -1241,11 +1917,16 @@ def reset_invoice_data(remove_all=False):
     Contact.objects.all()._raw_delete(using=db)
     Job.objects.all()._raw_delete(using=db)
     VendorEmail.objects.all()._raw_delete(using=db)
+    ParseResultCache.objects.all()._raw_delete(using=db)
+    StoredAttachment.objects.all()._raw_delete(using=db)
 
     if remove_all:
         Vendor.objects.all()._raw_delete(using=db)
         ItemType.objects.all()._raw_delete(using=db)
         InvoiceAutomationSettings.objects.all()._raw_delete(using=db)
+    else:
+        # Processed-email state is gone, so the next auto-process run must relist the mailbox.
+        InvoiceAutomationSettings.objects.update(gmail_history_id='')
 
     deleted_files = 0
     for file_path in attachment_paths:
@@ -1,10 +1,21 @@
-from django.db.models.signals import pre_delete
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import Invoice
+from .email_metadata import restamp_cached_sender
+from .models import Invoice, VendorEmail
 from .services import reset_processed_email_after_invoice_deleted
 
 
 @receiver(pre_delete, sender=Invoice)
 def reset_email_status_on_invoice_delete(sender, instance, **kwargs):
     reset_processed_email_after_invoice_deleted(instance)
+
+
+@receiver(post_save, sender=VendorEmail)
+def stamp_cached_messages_on_vendor_email_save(sender, instance, **kwargs):
+    restamp_cached_sender(instance.email, instance.vendor_id)
+
+
+@receiver(post_delete, sender=VendorEmail)
+def clear_cached_messages_on_vendor_email_delete(sender, instance, **kwargs):
+    restamp_cached_sender(instance.email, None)
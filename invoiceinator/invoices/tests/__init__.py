@@ -0,0 +1,3231 @@
+import json
+import os
+import base64
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ..models import (
+    Contact,
+    EmailMessageCache,
+    InventoryItem,
+    Invoice,
+    InvoiceAutomationSettings,
+    ItemType,
+    Job,
+    LineItem,
+    ParseResultCache,
+    ProcessedEmail,
+    StoredAttachment,
+    Vendor,
+    VendorEmail,
+)
+from ..attachment_store import (
+    attachment_path,
+    blob_path,
+    link_attachment,
+    rename_attachment,
+    write_blob,
+)
+from ..gmail_batch import execute_batched
+from .gmail_stub import GmailStubTransport
+from ..inbox_sync import MAX_RATE_LIMIT_RETRIES, MetadataPacer, sync_inbox_metadata
+from ..item_types import resolve_item_type
+from ..record_search import rebuild_record_search_index
+from ..serializers import ItemTypeSerializer, LineItemSerializer, VendorSerializer
+from ..services import (
+    MAX_MESSAGE_ATTEMPTS,
+    export_invoices_workbook_chunks,
+    process_pending_gmail_invoices,
+    gmail_message_id_from_source_email_id,
+    process_gmail_message,
+    parsed_envelope_for_process_result,
+    persist_parsed_invoices,
+    reset_invoice_data,
+    reset_processed_email_after_invoice_deleted,
+    update_automation_settings,
+    vendor_is_ignored,
+    write_invoices_workbook,
+    _selected_parser_for_vendor,
+)
+from ..xlsx_stream import stream_workbook
+from ..parsers import (
+    make_line_item,
+    normalize_parser_output,
+    normalize_quantity,
+    parse_generic_invoice,
+    parse_rugby_invoice,
+    parse_wurth_invoice,
+    ParsedDocument,
+)
+from ..parsers import parse_ipaco_invoice
+from ..parsers import parse_mcmaster_carr_invoice
+from ..parsers import parse_sherwin_invoice
+from ..parsers import parse_weinig_invoice
+from ..parsers import parse_yates_mouldings_invoice
+from .. import services
+from ..views import MAX_TIMING_WINDOW_HOURS
+
+
+class ProcessedEmailResetOnInvoiceDeleteTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Test Vendor', invoice_type='pdf')
+        self.message_id = 'gmail-msg-abc123'
+
+    def _create_invoice(self, source_email_id):
+        return Invoice.objects.create(
+            vendor=self.vendor,
+            source_email_id=source_email_id,
+            status='processed',
+            processed_at=timezone.now(),
+        )
+
+    def _create_processed_email(self):
+        return ProcessedEmail.objects.create(
+            email_id=self.message_id,
+            status='processed',
+            processed=timezone.now(),
+            vendor=self.vendor,
+        )
+
+    def test_gmail_message_id_strips_index_suffix(self):
+        self.assertEqual(
+            gmail_message_id_from_source_email_id('gmail-msg-abc123:2'),
+            'gmail-msg-abc123',
+        )
+
+    def test_resets_processed_email_when_last_invoice_deleted(self):
+        processed = self._create_processed_email()
+        invoice = self._create_invoice(f'{self.message_id}:1')
+        processed.invoice = invoice
+        processed.save(update_fields=['invoice'])
+
+        reset_processed_email_after_invoice_deleted(invoice)
+        invoice.delete()
+
+        processed.refresh_from_db()
+        self.assertEqual(processed.status, 'pending')
+        self.assertIsNone(processed.processed)
+        self.assertIsNone(processed.invoice_id)
+
+
+class SelectedParserTests(TestCase):
+    def test_sherwin_vendor_name_defaults_to_sherwin_parser(self):
+        vendor = Vendor.objects.create(name='Sherwin Williams', invoice_type='pdf')
+        parser = _selected_parser_for_vendor(vendor)
+        self.assertIsNotNone(parser)
+        self.assertEqual(getattr(parser, '__name__', ''), 'parse_sherwin_invoice')
+
+
+class ParserRegistryTests(TestCase):
+    def test_importing_parsers_defers_parser_modules_and_pdf_libraries(self):
+        code = (
+            'import sys, invoices.parsers as parsers\n'
+            'loaded = sorted(name for name in ("camelot", "pymupdf", "invoices.parsers.sierra")'
+            ' if name in sys.modules)\n'
+            'parser = parsers.parse_sierra_invoice\n'
+            'print(loaded, parser.__module__, "camelot" in sys.modules)\n'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        self.assertEqual(output, '[] invoices.parsers.sierra False')
+
+    def test_registry_covers_every_parser_module_export(self):
+        from .. import parsers
+        from ..parsers.registry import PARSER_MODULES
+
+        package_dir = os.path.dirname(parsers.__file__)
+        exported = set()
+        for filename in os.listdir(package_dir):
+            if filename.endswith('.py'):
+                with open(os.path.join(package_dir, filename)) as handle:
+                    exported.update(
+                        re.findall(r'^def (parse_\w+_invoice)\(', handle.read(), re.MULTILINE)
+                    )
+        self.assertEqual(exported, set(PARSER_MODULES))
+        for method in PARSER_MODULES:
+            self.assertEqual(getattr(parsers, method).__name__, method)
+        self.assertEqual(len(parsers.list_invoice_parsers()), len(PARSER_MODULES))
+        with self.assertRaises(AttributeError):
+            getattr(parsers, 'parse_missing_invoice')
+
+
+class ParserSchemaTests(TestCase):
+    def test_phone_sized_quantity_values_are_zeroed(self):
+        self.assertEqual(normalize_quantity('15320149005'), '0')
+        self.assertEqual(normalize_quantity('412680060'), '0')
+        self.assertEqual(
+            make_line_item(name='Richelieu suspect', qty='15,320,149,005')['qty'],
+            '0',
+        )
+
+    def test_valid_quantity_values_are_normalized(self):
+        self.assertEqual(normalize_quantity('2.0000'), '2')
+        self.assertEqual(normalize_quantity('1,250.5000'), '1250.5')
+
+
+class NestedItemTypeTests(TestCase):
+    def test_item_type_full_path_for_nested_types(self):
+        hardware = ItemType.objects.create(name='Hardware')
+        screws = ItemType.objects.create(name='Screws', parent=hardware)
+        self.assertEqual(screws.get_full_path(), 'Hardware › Screws')
+        self.assertEqual(hardware.get_full_path(), 'Hardware')
+
+    def test_resolve_item_type_supports_nested_path(self):
+        item_type = resolve_item_type('Hardware > Screws')
+        self.assertEqual(item_type.name, 'Screws')
+        self.assertEqual(item_type.parent.name, 'Hardware')
+
+    def test_line_item_serializer_walks_each_item_type_path_once(self):
+        vendor = Vendor.objects.create(name='Path Vendor', invoice_type='pdf')
+        invoice = Invoice.objects.create(vendor=vendor, source_email_id='path-msg:1')
+        item_type = resolve_item_type('Hardware > Screws > Wood')
+        for index in range(5):
+            LineItem.objects.create(invoice=invoice, item_type=item_type, name=f'Screw {index}')
+
+        with patch.object(
+            ItemType, 'get_full_path', autospec=True, side_effect=ItemType.get_full_path
+        ) as path_mock:
+            data = LineItemSerializer(LineItem.objects.filter(invoice=invoice), many=True).data
+
+        self.assertEqual(path_mock.call_count, 1)
+        self.assertEqual({row['item_type_name'] for row in data}, {'Hardware › Screws › Wood'})
+
+    def test_item_type_parent_cannot_create_cycle(self):
+        root = ItemType.objects.create(name='Root')
+        child = ItemType.objects.create(name='Child', parent=root)
+        serializer = ItemTypeSerializer(
+            instance=root,
+            data={'name': 'Root', 'parent': child.id},
+            partial=True,
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('parent', serializer.errors)
+
+    def test_sibling_names_unique_under_same_parent(self):
+        parent = ItemType.objects.create(name='Parent')
+        ItemType.objects.create(name='Child', parent=parent)
+        serializer = ItemTypeSerializer(data={'name': 'Child', 'parent': parent.id})
+        self.assertFalse(serializer.is_valid())
+        self.assertTrue('name' in serializer.errors or 'non_field_errors' in serializer.errors)
+
+
+class VendorProfileTests(TestCase):
+    def test_vendor_serializer_exposes_profile_fields(self):
+        vendor = Vendor.objects.create(
+            name='Acme Supply',
+            invoice_type='pdf',
+            email='orders@acme.example',
+            phone='555-0100',
+            city='Portland',
+            state='OR',
+            ignore=True,
+        )
+        data = VendorSerializer(vendor).data
+        self.assertTrue(data['ignore'])
+        self.assertEqual(data['email'], 'orders@acme.example')
+        self.assertEqual(data['city'], 'Portland')
+
+    def test_vendor_is_ignored_helper(self):
+        vendor = Vendor.objects.create(name='Ignored Vendor', invoice_type='pdf', ignore=True)
+        self.assertTrue(vendor_is_ignored(vendor))
+        self.assertFalse(vendor_is_ignored(None))
+
+
+class PersistParsedInvoicesTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(
+            name='Hafele America Co.',
+            invoice_type='pdf',
+        )
+
+    def test_vendor_can_have_multiple_blank_email_contacts(self):
+        first = Contact.objects.create(
+            vendor=self.vendor,
+            name='First Contact',
+            email='',
+        )
+        second = Contact.objects.create(
+            vendor=self.vendor,
+            name='Second Contact',
+            email='',
+        )
+
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(Contact.objects.filter(vendor=self.vendor, email='').count(), 2)
+
+    def test_persist_updates_contact_name_without_updated_at_field(self):
+        Contact.objects.create(
+            vendor=self.vendor,
+            name='Old Name',
+            email='orders@homestead.example',
+        )
+
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': '1001',
+                'date_ordered': 'Apr 9, 2026',
+                'invoice_total': '10.00',
+                'line_items': [],
+            }],
+        }
+        email_payload = {
+            'from': 'Homestead Cabinet <orders@homestead.example>',
+            'subject': 'Invoice attached',
+            'date': 'Thu, 9 Apr 2026 12:00:00 +0000',
+        }
+
+        saved = persist_parsed_invoices(
+            self.vendor,
+            email_payload,
+            parsed,
+            'test-msg-contact',
+        )
+
+        self.assertEqual(len(saved), 1)
+        contact = Contact.objects.get(vendor=self.vendor, email='orders@homestead.example')
+        self.assertEqual(contact.name, 'Homestead Cabinet')
+
+    def test_persist_creates_invoice_line_items_job_contact_inventory(self):
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': '513395821',
+                'date_ordered': 'Apr 9, 2026',
+                'cust_po': '25668',
+                'invoice_total': '515.25',
+                'line_items': [{
+                    'id': '546.63.116',
+                    'name': 'Dispensa Tray Set',
+                    'description': 'Dispensa Tray Set',
+                    'job_id': '25668',
+                    'job': 'LOHSS B1',
+                    'qty': '2',
+                    'unit': 'Set',
+                    'unit_price': 257.625,
+                    'total_price': 515.25,
+                }],
+            }],
+        }
+        email_payload = {
+            'from': 'Homestead Cabinet <orders@homestead.example>',
+            'subject': 'Invoice attached',
+            'date': 'Thu, 9 Apr 2026 12:00:00 +0000',
+        }
+        saved = persist_parsed_invoices(
+            self.vendor,
+            email_payload,
+            parsed,
+            'test-msg-001',
+        )
+        self.assertEqual(len(saved), 1)
+        invoice = saved[0]
+        self.assertEqual(invoice.invoice_number, '513395821')
+        self.assertEqual(invoice.customer_po, '25668')
+        self.assertEqual(invoice.line_items.count(), 1)
+
+        contact = Contact.objects.get(vendor=self.vendor, email='orders@homestead.example')
+        self.assertEqual(invoice.contact_id, contact.id)
+
+        job = Job.objects.get(vendor=self.vendor, job_id='25668')
+        self.assertEqual(job.name, 'LOHSS B1')
+        line = LineItem.objects.get(invoice=invoice)
+        self.assertEqual(line.job_id, job.id)
+        self.assertFalse(line.received)
+        self.assertEqual(line.notes, '')
+
+        inventory = InventoryItem.objects.get(vendor=self.vendor, item_key='dispensa tray set')
+        self.assertEqual(inventory.name, 'Dispensa Tray Set')
+        self.assertEqual(inventory.current_qty, 2)
+        self.assertEqual(line.inventory_item_id, inventory.id)
+        self.assertIsNone(invoice.received_at)
+
+    def test_persist_accepts_po_and_job_aliases(self):
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': 'ALIASES-001',
+                'customer_po': 'PO-789',
+                'line_items': [{
+                    'id': 'ALIAS-ITEM',
+                    'name': 'Alias Item',
+                    'job_number': 'JOB-123',
+                    'job_name': 'Alias Job',
+                    'qty': '1',
+                    'unit_price': 10,
+                    'total_price': 10,
+                }],
+            }],
+        }
+
+        saved = persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-aliases')
+        invoice = saved[0]
+
+        self.assertEqual(invoice.customer_po, 'PO-789')
+        job = Job.objects.get(vendor=self.vendor, job_id='JOB-123')
+        self.assertEqual(job.name, 'Alias Job')
+        line = LineItem.objects.get(invoice=invoice)
+        self.assertEqual(line.job_id, job.id)
+
+    def test_persist_combines_inventory_items_by_name_and_sums_qty(self):
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': '513395822',
+                'line_items': [{
+                    'id': 'A-1',
+                    'name': 'Tray',
+                    'qty': '2',
+                    'unit_price': 10,
+                    'total_price': 20,
+                }, {
+                    'id': 'A-2',
+                    'name': 'Tray',
+                    'qty': '3',
+                    'unit_price': 10,
+                    'total_price': 30,
+                }],
+            }],
+        }
+        saved = persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-002a')
+        invoice = saved[0]
+        inventory_items = InventoryItem.objects.filter(vendor=self.vendor, item_key='tray')
+        self.assertEqual(inventory_items.count(), 1)
+        inventory = inventory_items.get()
+        self.assertEqual(inventory.current_qty, 5)
+        self.assertEqual(invoice.line_items.count(), 2)
+        self.assertEqual(
+            set(invoice.line_items.values_list('inventory_item_id', flat=True)),
+            {inventory.id},
+        )
+
+    def test_reimporting_reverts_every_line_sharing_an_inventory_item(self):
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': '513395824',
+                'line_items': [
+                    {'id': 'A-1', 'name': 'Tray', 'qty': '2', 'unit_price': 10, 'total_price': 20},
+                    {'id': 'A-2', 'name': 'Tray', 'qty': '3', 'unit_price': 10, 'total_price': 30},
+                ],
+            }],
+        }
+        persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-reimport')
+        persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-reimport')
+
+        inventory = InventoryItem.objects.get(vendor=self.vendor, item_key='tray')
+        self.assertEqual(inventory.current_qty, 5)
+
+    def test_persist_query_count_does_not_grow_with_line_items(self):
+        def parsed_with_lines(count):
+            return {
+                'vendor_name': 'Hafele America Co.',
+                'invoices': [{
+                    'invoice_number': f'BULK-{count}',
+                    'line_items': [{
+                        'id': f'SKU-{index}',
+                        'name': f'Part {index % 40}',
+                        'job_id': f'{26000 + index % 3}',
+                        'job': f'Job {index % 3}',
+                        'item_type': 'Hardware > Screws' if index % 2 else 'Panels',
+                        'qty': '2',
+                        'unit_price': 1,
+                        'total_price': 2,
+                    } for index in range(count)],
+                }],
+            }
+
+        with CaptureQueriesContext(connection) as small:
+            persist_parsed_invoices(self.vendor, {}, parsed_with_lines(5), 'bulk-small')
+        with CaptureQueriesContext(connection) as large:
+            persist_parsed_invoices(self.vendor, {}, parsed_with_lines(200), 'bulk-large')
+
+        self.assertEqual(
+            LineItem.objects.filter(invoice__source_email_id='bulk-large:1').count(), 200
+        )
+        self.assertEqual(Job.objects.filter(vendor=self.vendor).count(), 3)
+        self.assertEqual(
+            InventoryItem.objects.get(vendor=self.vendor, item_key='part 7').current_qty, 10
+        )
+        self.assertLessEqual(len(large.captured_queries), len(small.captured_queries) + 2)
+
+    def test_invoices_in_one_email_share_resolver_lookups(self):
+        def invoice(number, job_name):
+            return {
+                'invoice_number': number,
+                'line_items': [{
+                    'id': f'{number}-{index}',
+                    'name': f'Part {index}',
+                    'job_id': '26001',
+                    'job': job_name,
+                    'item_type': 'Hardware > Screws' if index % 2 else 'Panels',
+                    'qty': '1',
+                    'unit_price': 1,
+                    'total_price': 1,
+                } for index in range(4)],
+            }
+
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [
+                invoice('INV-1', 'Kitchen'),
+                invoice('INV-2', 'Kitchen'),
+                invoice('INV-3', 'Kitchen Remodel'),
+            ],
+        }
+        email_payload = {'from': 'Billing <billing@hafele.example>'}
+        with patch.object(
+            services, 'resolve_item_type', wraps=resolve_item_type
+        ) as item_type_mock, patch.object(
+            services, 'resolve_contact', wraps=services.resolve_contact
+        ) as contact_mock:
+            saved = persist_parsed_invoices(self.vendor, email_payload, parsed, 'shared-msg')
+
+        self.assertEqual(item_type_mock.call_count, 2)
+        self.assertEqual(contact_mock.call_count, 1)
+        self.assertEqual(len({invoice.contact_id for invoice in saved}), 1)
+        job = Job.objects.get(vendor=self.vendor, job_id='26001')
+        self.assertEqual(job.name, 'Kitchen Remodel')
+        self.assertEqual(LineItem.objects.filter(job=job).count(), 12)
+
+    def test_persist_zeros_phone_sized_line_item_qty_and_skips_inventory(self):
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': 'PHONE-QTY-001',
+                'line_items': [{
+                    'id': 'PHONE-1',
+                    'name': '26430 parker dooher',
+                    'qty': '15320149005',
+                    'unit_price': 1,
+                    'total_price': 1,
+                }, {
+                    'id': 'PHONE-2',
+                    'name': 'net 15 mf',
+                    'qty': '412680060',
+                    'unit_price': 1,
+                    'total_price': 1,
+                }],
+            }],
+        }
+
+        saved = persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-phone-qty')
+        invoice = saved[0]
+
+        self.assertEqual(list(invoice.line_items.values_list('qty', flat=True)), [0, 0])
+        self.assertEqual(InventoryItem.objects.filter(vendor=self.vendor).count(), 0)
+
+    def test_line_items_can_be_filtered_by_inventory_item(self):
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': '513395823',
+                'line_items': [{
+                    'id': 'B-1',
+                    'name': 'Bracket',
+                    'qty': '4',
+                    'unit_price': 5,
+                    'total_price': 20,
+                }],
+            }],
+        }
+        persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-002b')
+        inventory = InventoryItem.objects.get(vendor=self.vendor, item_key='bracket')
+
+        response = self.client.get(f'/api/line-items/?inventory_item={inventory.id}')
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload['count'], 1)
+        self.assertEqual(len(payload['results']), 1)
+        self.assertEqual(payload['results'][0]['name'], 'Bracket')
+
+    def test_persist_updates_existing_invoice_by_source_email_id(self):
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': 'OLD',
+                'line_items': [],
+            }],
+        }
+        persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-002')
+        parsed['invoices'][0]['invoice_number'] = 'NEW'
+        parsed['invoices'][0]['line_items'] = [{
+            'id': '1',
+            'name': 'Widget',
+            'qty': '1',
+            'unit_price': 10,
+            'total_price': 10,
+        }]
+        saved = persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-002')
+        self.assertEqual(Invoice.objects.filter(source_email_id='test-msg-002:1').count(), 1)
+        self.assertEqual(saved[0].invoice_number, 'NEW')
+        self.assertEqual(saved[0].line_items.count(), 1)
+
+    def test_reprocessing_preserves_manual_invoice_and_line_item_state(self):
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': '513395821',
+                'line_items': [{
+                    'id': '546.63.116',
+                    'name': 'Tray',
+                    'qty': '1',
+                    'unit_price': 10,
+                    'total_price': 10,
+                }],
+            }],
+        }
+        saved = persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-003')
+        invoice = saved[0]
+        invoice.received_at = timezone.now()
+        invoice.save(update_fields=['received_at'])
+
+        line = invoice.line_items.get()
+        line.received = True
+        line.notes = 'Checked in at dock'
+        line.save(update_fields=['received', 'notes'])
+
+        parsed['invoices'][0]['invoice_number'] = 'UPDATED'
+        parsed['invoices'][0]['line_items'][0]['name'] = 'Tray'
+        saved_again = persist_parsed_invoices(self.vendor, {}, parsed, 'test-msg-003')
+
+        invoice.refresh_from_db()
+        self.assertIsNotNone(invoice.received_at)
+        self.assertEqual(invoice.invoice_number, 'UPDATED')
+        self.assertEqual(saved_again[0].line_items.count(), 1)
+
+        line = saved_again[0].line_items.get()
+        self.assertTrue(line.received)
+        self.assertEqual(line.notes, 'Checked in at dock')
+        inventory = InventoryItem.objects.get(vendor=self.vendor, item_key='tray')
+        self.assertEqual(inventory.current_qty, 1)
+
+    def test_parsed_envelope_from_saved_invoices_for_dialog(self):
+        parsed = {
+            'vendor_name': 'Hafele America Co.',
+            'invoices': [{
+                'invoice_number': '513395821',
+                'line_items': [{
+                    'id': '546.63.116',
+                    'name': 'Tray',
+                    'job_id': '25668',
+                    'job': 'LOHSS B1',
+                    'qty': '1',
+                    'unit_price': 10,
+                    'total_price': 10,
+                }],
+            }],
+        }
+        saved = persist_parsed_invoices(self.vendor, {}, parsed, 'dialog-msg-001')
+        envelope = parsed_envelope_for_process_result(
+            {'parsed': {}, 'invoices': saved},
+            email_id='dialog-msg-001',
+            vendor=self.vendor,
+        )
+        self.assertEqual(len(envelope['invoices']), 1)
+        self.assertEqual(envelope['invoices'][0]['invoice_number'], '513395821')
+        self.assertEqual(len(envelope['invoices'][0]['line_items']), 1)
+        self.assertEqual(envelope['invoices'][0]['line_items'][0]['job_id'], '25668')
+
+
+class CrudPaginationTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Test Vendor', invoice_type='pdf')
+        for index in range(25):
+            InventoryItem.objects.create(
+                vendor=self.vendor,
+                item_key=f'item-{index}',
+                name=f'Item {index:02d}',
+                current_qty=index,
+            )
+
+    def test_inventory_items_paginate_by_default(self):
+        response = self.client.get('/api/inventory-items/')
+        self.assertEqual(response.status_code, 200)
+
+        payload = response.json()
+        self.assertEqual(payload['count'], 25)
+        self.assertEqual(len(payload['results']), 20)
+
+    def test_inventory_items_respect_requested_page_size(self):
+        response = self.client.get('/api/inventory-items/?page_size=5')
+        self.assertEqual(response.status_code, 200)
+
+        payload = response.json()
+        self.assertEqual(payload['count'], 25)
+        self.assertEqual(len(payload['results']), 5)
+
+    def _walk(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            pages.append(payload)
+            url = payload['next']
+        return pages
+
+    def test_inventory_items_cursor_pages_cover_every_row_once(self):
+        pages = self._walk('/api/inventory-items/?cursor=&page_size=10')
+
+        self.assertEqual([len(page['results']) for page in pages], [10, 10, 5])
+        self.assertEqual(
+            [item['name'] for page in pages for item in page['results']],
+            [f'Item {index:02d}' for index in range(25)],
+        )
+        self.assertEqual(pages[0]['count'], 25)
+
+    def test_cursor_pages_do_not_count_or_offset_when_count_is_off(self):
+        first = self.client.get('/api/inventory-items/?cursor=&count=false&page_size=10').json()
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(first['next']).json()
+
+        self.assertNotIn('count', second)
+        self.assertEqual(second['results'][0]['name'], 'Item 10')
+        sql = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_page_numbers_without_count(self):
+        payload = self.client.get('/api/inventory-items/?count=false&page=3&page_size=10').json()
+
+        self.assertNotIn('count', payload)
+        self.assertEqual(len(payload['results']), 5)
+        self.assertIsNone(payload['next'])
+        self.assertIn('page=2', payload['previous'])
+        response = self.client.get('/api/inventory-items/?count=false&page=4&page_size=10')
+        self.assertEqual(response.status_code, 404)
+
+    def test_invoice_cursor_handles_missing_dates_and_custom_ordering(self):
+        received = timezone.now()
+        for index in range(7):
+            invoice = Invoice.objects.create(
+                vendor=self.vendor,
+                source_email_id=f'cursor-{index}',
+                invoice_number=f'C-{index}',
+                received_at=None if index % 3 == 0 else received - timedelta(hours=index % 2),
+            )
+            for _ in range(index % 3):
+                LineItem.objects.create(invoice=invoice, name=f'Line {index}')
+
+        expected = [
+            invoice['invoice_number']
+            for invoice in self.client.get('/api/invoices/?page_size=50').json()['results']
+        ]
+        pages = self._walk('/api/invoices/?cursor=&page_size=2')
+        self.assertEqual(
+            [invoice['invoice_number'] for page in pages for invoice in page['results']], expected
+        )
+        self.assertEqual(expected[-3:], ['C-6', 'C-3', 'C-0'])
+
+        by_count = self._walk('/api/invoices/?cursor=&page_size=3&ordering=-line_item_count_sort')
+        self.assertEqual(
+            [invoice['invoice_number'] for page in by_count for invoice in page['results']],
+            ['C-5', 'C-2', 'C-4', 'C-1', 'C-6', 'C-3', 'C-0'],
+        )
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/inventory-items/?cursor=bogus').status_code, 404)
+        first_page = self.client.get('/api/inventory-items/?cursor=&page_size=5').json()
+        token = first_page['next'].split('cursor=')[1]
+        response = self.client.get(f'/api/inventory-items/?cursor={token}&ordering=-name')
+        self.assertEqual(response.status_code, 404)
+
+
+class InvoiceEmailListCacheTests(TestCase):
+    class FakeExecute:
+        def __init__(self, payload):
+            self.payload = payload
+
+        def execute(self):
+            return self.payload
+
+    class FakeMessages:
+        def __init__(self, owner):
+            self.owner = owner
+
+        def list(self, **_kwargs):
+            return InvoiceEmailListCacheTests.FakeExecute({
+                'messages': [{'id': message_id} for message_id in self.owner.message_ids],
+            })
+
+        def get(self, **kwargs):
+            self.owner.get_calls.append(kwargs)
+            message_id = kwargs['id']
+            return InvoiceEmailListCacheTests.FakeExecute({
+                'id': message_id,
+                'threadId': f'thread-{message_id}',
+                'snippet': f'Snippet {message_id}',
+                'payload': {
+                    'headers': [
+                        {
+                            'name': 'From',
+                            'value': f'Sender {message_id} <sender-{message_id}@example.com>',
+                        },
+                        {'name': 'Subject', 'value': f'Invoice {message_id}'},
+                        {'name': 'Date', 'value': 'Thu, 9 Apr 2026 12:00:00 +0000'},
+                    ],
+                    'parts': [
+                        {'filename': f'{message_id}.pdf', 'mimeType': 'application/pdf'},
+                    ],
+                },
+            })
+
+    class FakeUsers:
+        def __init__(self, owner):
+            self.owner = owner
+
+        def messages(self):
+            return InvoiceEmailListCacheTests.FakeMessages(self.owner)
+
+    class FakeBatch:
+        def __init__(self, callback):
+            self.callback = callback
+            self.requests = []
+
+        def add(self, request, request_id):
+            self.requests.append((request_id, request))
+
+        def execute(self):
+            for request_id, request in self.requests:
+                self.callback(request_id, request.execute(), None)
+
+    class FakeGmailService:
+        def __init__(self, message_ids=('msg-1', 'msg-2')):
+            self.get_calls = []
+            self.message_ids = list(message_ids)
+
+        def users(self):
+            return InvoiceEmailListCacheTests.FakeUsers(self)
+
+        def new_batch_http_request(self, callback):
+            return InvoiceEmailListCacheTests.FakeBatch(callback)
+
+    def test_list_invoice_emails_caches_metadata(self):
+        service = self.FakeGmailService()
+
+        with patch('invoices.views.get_gmail_service', return_value=service):
+            first_response = self.client.get('/api/emails/?maxResults=2')
+            second_response = self.client.get('/api/emails/?maxResults=2')
+
+        self.assertEqual(first_response.status_code, 200)
+        self.assertEqual(second_response.status_code, 200)
+        self.assertEqual(len(first_response.json()['emails']), 2)
+        self.assertEqual(len(second_response.json()['emails']), 2)
+        self.assertEqual(len(service.get_calls), 2)
+        self.assertEqual(EmailMessageCache.objects.count(), 2)
+        self.assertTrue(all(call.get('format') == 'metadata' for call in service.get_calls))
+        # Without internalDate the Date header orders the local inbox.
+        self.assertEqual(
+            EmailMessageCache.objects.get(email_id='msg-1').received_at.isoformat(),
+            '2026-04-09T12:00:00+00:00',
+        )
+
+    def test_list_invoice_emails_returns_cached_attachment(self):
+        EmailMessageCache.objects.create(
+            email_id='msg-1',
+            snippet='Cached snippet',
+            from_header='Cached Sender <cached@example.com>',
+            date_header='Thu, 9 Apr 2026 12:00:00 +0000',
+            attachment_count=1,
+            attachment_filename='msg-1_Vendor_PO.pdf',
+            attachment_original_filename='invoice.pdf',
+            attachment_mime_type='application/pdf',
+        )
+        service = self.FakeGmailService()
+
+        with patch('invoices.views.get_gmail_service', return_value=service):
+            response = self.client.get('/api/emails/?maxResults=2')
+
+        self.assertEqual(response.status_code, 200)
+        emails = response.json()['emails']
+        cached_email = next(email for email in emails if email['id'] == 'msg-1')
+        self.assertEqual(cached_email['attachment']['filename'], 'msg-1_Vendor_PO.pdf')
+        self.assertEqual(cached_email['attachments'][0]['original_filename'], 'invoice.pdf')
+
+    def test_list_invoice_emails_does_not_create_vendors(self):
+        service = self.FakeGmailService()
+
+        with patch('invoices.views.get_gmail_service', return_value=service):
+            response = self.client.get('/api/emails/?maxResults=2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Vendor.objects.count(), 0)
+        self.assertEqual(response.json()['emails'][0]['vendor_name'], 'Example')
+
+    def test_list_invoice_emails_excludes_ignored_vendor(self):
+        ignored_vendor = Vendor.objects.create(
+            name='Ignored Vendor',
+            invoice_type='pdf',
+            ignore=True,
+        )
+        VendorEmail.objects.create(
+            vendor=ignored_vendor,
+            email='sender-msg-1@example.com',
+            is_primary=True,
+        )
+        EmailMessageCache.objects.create(
+            email_id='msg-1',
+            snippet='Ignored vendor email',
+            from_header='Ignored Vendor <sender-msg-1@example.com>',
+            vendor=ignored_vendor,
+        )
+        service = self.FakeGmailService()
+
+        with patch('invoices.views.get_gmail_service', return_value=service):
+            response = self.client.get('/api/emails/?maxResults=5')
+
+        self.assertEqual(response.status_code, 200)
+        email_ids = [email['id'] for email in response.json()['emails']]
+        self.assertNotIn('msg-1', email_ids)
+        self.assertIn('msg-2', email_ids)
+
+    def _cached_page(self, count):
+        """
+        ``count`` cached messages: known vendors by sender only, an ignored sender,
+        and processed rows.
+        """
+        known, _created = Vendor.objects.get_or_create(
+            name='Known Vendor', defaults={'invoice_type': 'pdf'}
+        )
+        ignored, _created = Vendor.objects.get_or_create(
+            name='Muted Vendor',
+            defaults={'invoice_type': 'pdf', 'ignore': True},
+        )
+        message_ids = []
+        for index in range(count):
+            message_id = f'page-{count}-{index}'
+            sender = f'billing-{count}-{index}@vendor{index % 3}.example'
+            if index % 3 == 0:
+                VendorEmail.objects.create(vendor=known, email=sender)
+            elif index % 3 == 1:
+                VendorEmail.objects.create(vendor=ignored, email=sender)
+            EmailMessageCache.objects.create(
+                email_id=message_id,
+                from_header=f'Billing <{sender}>',
+                attachment_filename=f'{message_id}_invoice.pdf',
+            )
+            if index % 2:
+                ProcessedEmail.objects.create(email_id=message_id, status='processed', vendor=known)
+            message_ids.append(message_id)
+        return message_ids
+
+    def _listing_queries(self, message_ids):
+        service = self.FakeGmailService(message_ids)
+        with patch('invoices.views.get_gmail_service', return_value=service), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/emails/?maxResults={len(message_ids)}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(service.get_calls, [])
+        return response.json()['emails'], len(queries)
+
+    def test_list_invoice_emails_query_count_does_not_grow_with_page_size(self):
+        small_emails, small_queries = self._listing_queries(self._cached_page(3))
+        large_emails, large_queries = self._listing_queries(self._cached_page(30))
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertLessEqual(large_queries, 4)
+        by_id = {email['id']: email for email in large_emails}
+        # Ignored by sender (index 1) unless a processed row names another vendor (odd indexes).
+        self.assertNotIn('page-30-4', by_id)
+        self.assertEqual(by_id['page-30-1']['vendor_name'], 'Known Vendor')
+        self.assertEqual(by_id['page-30-0']['vendor_name'], 'Known Vendor')
+        self.assertEqual(
+            by_id['page-30-0']['vendor_id'], Vendor.objects.get(name='Known Vendor').pk
+        )
+        self.assertEqual(by_id['page-30-2']['vendor_name'], 'Vendor2')
+        self.assertIsNone(by_id['page-30-2']['vendor_id'])
+        self.assertEqual(len(large_emails), 30 - len(range(4, 30, 6)))
+
+
+class LocalInboxSearchTests(TestCase):
+    def setUp(self):
+        self.hardware = Vendor.objects.create(name='Hardware Supply', invoice_type='pdf')
+        self.muted = Vendor.objects.create(name='Muted Vendor', invoice_type='pdf', ignore=True)
+        base = timezone.now() - timedelta(days=1)
+        rows = [
+            (
+                'loc-1', 'Walnut veneer invoice', 'Billing <billing@hardware.example>',
+                self.hardware, 0,
+            ),
+            ('loc-2', 'Hinges order 7731', 'Orders <orders@hardware.example>', self.hardware, 1),
+            ('loc-3', 'Statement', 'Lumber Yard <ar@lumber.example>', None, 2),
+            ('loc-4', 'Walnut slabs', 'Lumber Yard <ar@lumber.example>', None, 3),
+            ('loc-5', 'Walnut newsletter', 'News <news@muted.example>', self.muted, 4),
+        ]
+        for email_id, subject, from_header, vendor, minutes in rows:
+            EmailMessageCache.objects.create(
+                email_id=email_id,
+                subject=subject,
+                from_header=from_header,
+                snippet=f'Snippet for {subject}',
+                vendor=vendor,
+                received_at=base + timedelta(minutes=minutes),
+            )
+        ProcessedEmail.objects.create(email_id='loc-2', status='processed', vendor=self.hardware)
+        ProcessedEmail.objects.create(email_id='loc-3', status='error')
+
+    def _list(self, query=''):
+        with patch(
+            'invoices.views.get_gmail_service', side_effect=AssertionError('Gmail was called')
+        ):
+            response = self.client.get(f'/api/emails/?source=local{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _ids(self, query=''):
+        return [email['id'] for email in self._list(query)['emails']]
+
+    def test_local_listing_filters_in_sql_and_skips_ignored_vendors(self):
+        from ..inbox_search import fts_available
+
+        self.assertTrue(fts_available())
+        self.assertEqual(self._ids(), ['loc-4', 'loc-3', 'loc-2', 'loc-1'])
+        self.assertEqual(self._ids('&search=walnut'), ['loc-4', 'loc-1'])
+        self.assertEqual(self._ids('&search=hardware'), ['loc-2', 'loc-1'])
+        self.assertEqual(self._ids('&search=lumb'), ['loc-4', 'loc-3'])
+        self.assertEqual(self._ids('&status=pending'), ['loc-4', 'loc-1'])
+        self.assertEqual(self._ids('&status=error'), ['loc-3'])
+        self.assertEqual(self._ids(f'&vendorId={self.hardware.pk}'), ['loc-2', 'loc-1'])
+        payload = self._list('&status=processed')
+        self.assertEqual(payload['source'], 'local')
+        self.assertEqual(payload['emails'][0]['status'], 'processed')
+        self.assertEqual(payload['emails'][0]['vendor_name'], 'Hardware Supply')
+
+    def test_index_follows_cache_and_vendor_updates(self):
+        EmailMessageCache.objects.filter(email_id='loc-3').update(subject='Walnut offcuts')
+        self.hardware.name = 'Cabinet Fittings'
+        self.hardware.save()
+        EmailMessageCache.objects.filter(email_id='loc-4').delete()
+
+        self.assertEqual(self._ids('&search=walnut'), ['loc-3', 'loc-1'])
+        self.assertEqual(self._ids('&search=cabinet'), ['loc-2', 'loc-1'])
+
+    def test_vendor_emails_added_after_caching_apply_to_local_filters(self):
+        lumber = Vendor.objects.create(name='Lumber Yard', invoice_type='pdf')
+        VendorEmail.objects.create(vendor=lumber, email='ar@lumber.example')
+
+        self.assertEqual(self._ids(f'&vendorId={lumber.pk}'), ['loc-4', 'loc-3'])
+
+        lumber.ignore = True
+        lumber.save()
+        # loc-3's processed row has no vendor, so the sender's (now ignored) vendor applies.
+        self.assertEqual(self._ids(), ['loc-2', 'loc-1'])
+
+        VendorEmail.objects.filter(email='ar@lumber.example').delete()
+        self.assertEqual(self._ids(), ['loc-4', 'loc-3', 'loc-2', 'loc-1'])
+        self.assertEqual(self._ids(f'&vendorId={lumber.pk}'), [])
+
+    def test_keyset_pages_cover_every_row_once(self):
+        seen = []
+        token = ''
+        while True:
+            payload = self._list(f'&maxResults=3{token}')
+            seen.extend(email['id'] for email in payload['emails'])
+            if not payload['hasMore']:
+                break
+            token = f"&pageToken={payload['nextPageToken']}"
+
+        self.assertEqual(seen, ['loc-4', 'loc-3', 'loc-2', 'loc-1'])
+        response = self.client.get('/api/emails/?source=local&pageToken=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+
+class GmailBatchTests(TestCase):
+    def _transport(self, count):
+        return GmailStubTransport(messages=[
+            {
+                'id': f'msg-{index}',
+                'threadId': f'thread-{index}',
+                'snippet': f'Snippet {index}',
+                'payload': {
+                    'headers': [
+                        {'name': 'From', 'value': f'Sender {index} <sender-{index}@example.com>'},
+                        {'name': 'Subject', 'value': f'Invoice {index}'},
+                    ],
+                    'parts': [{'filename': f'{index}.pdf', 'mimeType': 'application/pdf'}],
+                },
+            }
+            for index in range(count)
+        ])
+
+    def test_execute_batched_splits_at_gmail_limit_and_reports_errors(self):
+        transport = self._transport(150)
+        service = transport.service()
+        requests = {
+            f'msg-{index}': service.users().messages().get(userId='me', id=f'msg-{index}')
+            for index in range(150)
+        }
+        requests['missing'] = service.users().messages().get(userId='me', id='missing')
+
+        responses, errors = execute_batched(service, requests)
+
+        self.assertEqual(transport.round_trips, 2)
+        self.assertEqual(len(responses), 150)
+        self.assertEqual(responses['msg-42']['threadId'], 'thread-42')
+        self.assertEqual(list(errors), ['missing'])
+
+    def test_cold_inbox_page_fetches_metadata_in_one_batch(self):
+        transport = self._transport(25)
+
+        with patch('invoices.views.get_gmail_service', return_value=transport.service()):
+            response = self.client.get('/api/emails/?maxResults=25')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['emails']), 25)
+        # One messages.list call plus one batch carrying all 25 metadata fetches.
+        self.assertEqual(transport.round_trips, 2)
+        self.assertEqual(EmailMessageCache.objects.count(), 25)
+
+
+class InboxMetadataSyncTests(TestCase):
+    def setUp(self):
+        self.messages = [
+            {
+                'id': f'sync-{index}',
+                'threadId': f'thread-{index}',
+                'snippet': f'Snippet {index}',
+                'internalDate': str(1760000000000 + index * 1000),
+                'payload': {
+                    'headers': [
+                        {'name': 'From', 'value': f'Sender {index} <sender-{index}@example.com>'},
+                        {'name': 'Subject', 'value': f'Invoice {index}'},
+                    ],
+                    'parts': [{'filename': f'{index}.pdf', 'mimeType': 'application/pdf'}],
+                },
+            }
+            for index in range(5)
+        ]
+        self.transport = GmailStubTransport(messages=self.messages)
+        self.sleeps = []
+        self.pacer = MetadataPacer(0.5, sleep=self.sleeps.append, clock=lambda: 0.0)
+
+    def test_sync_caches_missing_metadata_and_refreshes_the_rest(self):
+        stale = timezone.now() - timedelta(days=3)
+        EmailMessageCache.objects.create(
+            email_id='sync-0', from_header='Sender 0 <sender-0@example.com>'
+        )
+        EmailMessageCache.objects.filter(email_id='sync-0').update(last_seen_at=stale)
+
+        summary = sync_inbox_metadata(
+            self.transport.service(), window_days=30, batch_size=2, pacer=self.pacer
+        )
+
+        self.assertEqual(
+            summary,
+            {'listed': 5, 'refreshed': 1, 'fetched': 4, 'failed': 0, 'rate_limited': 0},
+        )
+        self.assertEqual(EmailMessageCache.objects.count(), 5)
+        self.assertGreater(EmailMessageCache.objects.get(email_id='sync-0').last_seen_at, stale)
+        cached = EmailMessageCache.objects.get(email_id='sync-3')
+        self.assertEqual(cached.subject, 'Invoice 3')
+        self.assertEqual(cached.attachment_count, 1)
+        # One list call, then two batches paced half a second apart.
+        self.assertEqual(self.transport.round_trips, 3)
+        self.assertEqual(self.sleeps, [0.5])
+        self.assertIn('after:', self.transport.calls[0][2]['q'][0])
+
+    def test_rate_limited_messages_back_off_and_retry(self):
+        self.transport.rate_limit(2)
+
+        summary = sync_inbox_metadata(
+            self.transport.service(), window_days=30, batch_size=5, pacer=self.pacer
+        )
+
+        self.assertEqual(summary['fetched'], 5)
+        self.assertEqual(summary['rate_limited'], 2)
+        self.assertEqual(summary['failed'], 0)
+        self.assertEqual(EmailMessageCache.objects.count(), 5)
+        # The throttled batch doubles the pause before the retry.
+        self.assertEqual(self.sleeps, [1.0])
+        self.assertEqual(self.pacer.delay, 0.5)
+
+    def test_messages_still_rate_limited_after_retries_are_reported(self):
+        transport = GmailStubTransport(messages=self.messages[:1])
+        transport.rate_limit(1 + MAX_RATE_LIMIT_RETRIES)
+
+        summary = sync_inbox_metadata(transport.service(), window_days=30, pacer=self.pacer)
+
+        self.assertEqual(summary['fetched'], 0)
+        self.assertEqual(summary['failed'], 1)
+        self.assertEqual(summary['rate_limited'], 1 + MAX_RATE_LIMIT_RETRIES)
+        self.assertFalse(EmailMessageCache.objects.exists())
+        self.assertEqual(self.sleeps, [1.0, 2.0, 4.0, 8.0, 16.0])
+
+
+class FlagIncorrectParsingTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Flag Vendor', invoice_type='pdf')
+        EmailMessageCache.objects.create(
+            email_id='msg-flag-1',
+            snippet='Bad parse',
+            from_header='Flag Vendor <flag@example.com>',
+            vendor=self.vendor,
+        )
+
+    def test_flag_creates_processed_email_with_incorrect_parsing_status(self):
+        response = self.client.post(
+            '/api/emails/flag-incorrect-parsing/',
+            data={'email_id': 'msg-flag-1'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'incorrect_parsing')
+
+        processed = ProcessedEmail.objects.get(email_id='msg-flag-1')
+        self.assertEqual(processed.status, 'incorrect_parsing')
+        self.assertEqual(processed.vendor_id, self.vendor.id)
+        self.assertTrue(processed.data.get('flagged_incorrect_parsing'))
+
+    def test_flag_updates_existing_processed_email(self):
+        ProcessedEmail.objects.create(
+            email_id='msg-flag-1',
+            status='processed',
+            processed=timezone.now(),
+            data={'invoices': []},
+            vendor=self.vendor,
+        )
+
+        response = self.client.post(
+            '/api/emails/flag-incorrect-parsing/',
+            data={'email_id': 'msg-flag-1'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        processed = ProcessedEmail.objects.get(email_id='msg-flag-1')
+        self.assertEqual(processed.status, 'incorrect_parsing')
+
+    def test_list_emails_filter_by_incorrect_parsing_status(self):
+        ProcessedEmail.objects.create(
+            email_id='msg-1',
+            status='incorrect_parsing',
+            processed=timezone.now(),
+            vendor=self.vendor,
+        )
+        service = InvoiceEmailListCacheTests.FakeGmailService()
+
+        with patch('invoices.views.get_gmail_service', return_value=service):
+            response = self.client.get('/api/emails/?maxResults=5&status=incorrect_parsing')
+
+        self.assertEqual(response.status_code, 200)
+        emails = response.json()['emails']
+        self.assertEqual(len(emails), 1)
+        self.assertEqual(emails[0]['id'], 'msg-1')
+        self.assertEqual(emails[0]['status'], 'incorrect_parsing')
+
+    def test_flag_requires_email_id(self):
+        response = self.client.post(
+            '/api/emails/flag-incorrect-parsing/',
+            data={},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class InvoiceViewSetTests(TestCase):
+    def setUp(self):
+        self.vendor_one = Vendor.objects.create(name='Vendor One', invoice_type='pdf')
+        self.vendor_two = Vendor.objects.create(name='Vendor Two', invoice_type='pdf')
+        self.invoice_one = Invoice.objects.create(
+            vendor=self.vendor_one,
+            source_email_id='vendor-one-invoice-1',
+            invoice_number='V1-001',
+        )
+        self.invoice_two = Invoice.objects.create(
+            vendor=self.vendor_two,
+            source_email_id='vendor-two-invoice-1',
+            invoice_number='V2-001',
+        )
+        LineItem.objects.create(invoice=self.invoice_one, name='First Item')
+        LineItem.objects.create(invoice=self.invoice_one, name='Second Item')
+        LineItem.objects.create(invoice=self.invoice_two, name='Only Item')
+
+    def test_invoices_can_be_filtered_by_vendor_id(self):
+        response = self.client.get(f'/api/invoices/?vendorId={self.vendor_one.id}')
+        self.assertEqual(response.status_code, 200)
+
+        payload = response.json()
+        self.assertEqual(payload['count'], 1)
+        self.assertEqual(len(payload['results']), 1)
+        self.assertEqual(payload['results'][0]['invoice_number'], 'V1-001')
+
+    def test_invoices_exclude_ignored_vendors(self):
+        self.vendor_two.ignore = True
+        self.vendor_two.save(update_fields=['ignore'])
+
+        response = self.client.get('/api/invoices/')
+        self.assertEqual(response.status_code, 200)
+
+        payload = response.json()
+        self.assertEqual(payload['count'], 1)
+        self.assertEqual(payload['results'][0]['invoice_number'], 'V1-001')
+
+    def test_invoices_can_be_ordered_by_vendor_name(self):
+        response = self.client.get('/api/invoices/?ordering=-vendor__name')
+        self.assertEqual(response.status_code, 200)
+
+        payload = response.json()
+        self.assertEqual(
+            [invoice['invoice_number'] for invoice in payload['results']],
+            ['V2-001', 'V1-001'],
+        )
+
+    def test_invoices_can_be_ordered_by_line_item_count(self):
+        response = self.client.get('/api/invoices/?ordering=-line_item_count_sort')
+        self.assertEqual(response.status_code, 200)
+
+        payload = response.json()
+        self.assertEqual(
+            [invoice['invoice_number'] for invoice in payload['results']],
+            ['V1-001', 'V2-001'],
+        )
+
+
+class RecordSearchTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Hafele America', invoice_type='pdf')
+        self.contact = Contact.objects.create(vendor=self.vendor, name='Dana Ortiz')
+        self.invoice = Invoice.objects.create(
+            vendor=self.vendor,
+            contact=self.contact,
+            source_email_id='search-1',
+            invoice_number='HA-778812',
+            source_email_subject='Your order shipped',
+        )
+        self.other_invoice = Invoice.objects.create(
+            vendor=Vendor.objects.create(name='Rugby Building Products', invoice_type='pdf'),
+            source_email_id='search-2',
+            invoice_number='RB-1001',
+        )
+        self.job = Job.objects.create(job_id='J-2044', name='Lakeview Kitchen')
+        self.item_type = ItemType.objects.create(name='Drawer Slides')
+        self.hinge = LineItem.objects.create(
+            invoice=self.invoice,
+            item_id='AB-123456',
+            name='Hinge screw',
+            description='screw pack of screw',
+            job=self.job,
+        )
+        self.bracket = LineItem.objects.create(
+            invoice=self.other_invoice,
+            name='Shelf bracket',
+            description='bracket sold with one screw',
+            item_type=self.item_type,
+        )
+
+    def _search(self, resource, query, field):
+        response = self.client.get(f'/api/{resource}/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [row[field] for row in response.json()['results']]
+
+    def _invoices(self, query):
+        return self._search('invoices', query, 'invoice_number')
+
+    def _line_items(self, query):
+        return self._search('line-items', query, 'name')
+
+    def test_invoice_search_uses_the_index_and_follows_related_renames(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._invoices('afele'), ['HA-778812'])
+        self.assertTrue(
+            any('invoices_invoice_fts' in query['sql'] for query in queries.captured_queries)
+        )
+        self.assertEqual(self._invoices('dana ORT'), ['HA-778812'])
+        self.assertEqual(self._invoices('7788'), ['HA-778812'])
+
+        self.contact.name = 'Robin Park'
+        self.contact.save()
+        self.vendor.name = 'Blum'
+        self.vendor.save()
+
+        self.assertEqual(self._invoices('dana'), [])
+        self.assertEqual(self._invoices('robin'), ['HA-778812'])
+        self.assertEqual(self._invoices('hafele'), [])
+
+    def test_line_item_search_ranks_matches_and_tracks_edits(self):
+        # The bracket is newer, but the hinge mentions "screw" more often.
+        self.assertEqual(self._line_items('screw'), ['Hinge screw', 'Shelf bracket'])
+        self.assertEqual(self._line_items('3456'), ['Hinge screw'])
+        self.assertEqual(self._line_items('j-2044'), ['Hinge screw'])
+        self.assertEqual(self._line_items('drawer'), ['Shelf bracket'])
+        self.assertEqual(self._line_items('RB-10'), ['Shelf bracket'])
+
+        self.job.name = 'Harbor Bath'
+        self.job.save()
+        self.other_invoice.invoice_number = 'RB-2002'
+        self.other_invoice.save()
+        self.hinge.delete()
+
+        self.assertEqual(self._line_items('harbor'), [])
+        self.assertEqual(self._line_items('RB-20'), ['Shelf bracket'])
+        self.assertEqual(self._line_items('screw'), ['Shelf bracket'])
+
+    def test_search_evaluates_match_once_per_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._line_items('screw'), ['Hinge screw', 'Shelf bracket'])
+        searches = [query['sql'] for query in queries.captured_queries if 'MATCH' in query['sql']]
+        self.assertTrue(searches)
+        for sql in searches:
+            # A rank looked up per row would add a correlated MATCH subquery.
+            self.assertEqual(sql.count('MATCH'), 1, sql)
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+            self.assertNotIn('CORRELATED', plan)
+
+    def test_search_results_page_by_cursor_in_rank_order(self):
+        names = []
+        url = '/api/line-items/?q=screw&cursor=&page_size=1'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names.extend(row['name'] for row in response.json()['results'])
+            url = response.json()['next']
+
+        self.assertEqual(names, ['Hinge screw', 'Shelf bracket'])
+
+    def test_short_queries_fall_back_to_substring_filters(self):
+        self.assertEqual(self._line_items('AB'), ['Hinge screw'])
+        self.assertEqual(self._invoices('RB'), ['RB-1001'])
+
+    def test_rebuild_reindexes_every_record(self):
+        self.assertEqual(
+            rebuild_record_search_index(),
+            {'invoices_invoice_fts': 2, 'invoices_lineitem_fts': 2},
+        )
+        self.assertEqual(self._line_items('lakeview'), ['Hinge screw'])
+
+
+class InvoiceExportTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Export Vendor', invoice_type='pdf')
+        self.contact = Contact.objects.create(
+            vendor=self.vendor, name='Billing', email='billing@example.com'
+        )
+        self.item_type = resolve_item_type('Hardware > Screws > Wood')
+        self.job = Job.objects.create(vendor=self.vendor, job_id='26001', name='Kitchen')
+
+    def _add_invoices(self, count, start=0):
+        for index in range(start, start + count):
+            invoice = Invoice.objects.create(
+                vendor=self.vendor,
+                contact=self.contact,
+                source_email_id=f'export-{index}:1',
+                invoice_number=f'EXP-{index}',
+            )
+            for line in range(3):
+                LineItem.objects.create(
+                    invoice=invoice,
+                    item_type=self.item_type,
+                    job=self.job,
+                    name=f'Line {line}',
+                    qty=2,
+                )
+
+    def _workbook_rows(self, response):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(BytesIO(b''.join(response.streaming_content)), read_only=True)
+        return {
+            sheet.title: list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets
+        }
+
+    def test_export_streams_workbook_with_related_names(self):
+        self._add_invoices(2)
+        InventoryItem.objects.create(
+            vendor=self.vendor, item_type=self.item_type, item_key='screw', name='Screw'
+        )
+
+        response = self.client.get('/api/export/xlsx/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('invoiceinator-export.xlsx', response['Content-Disposition'])
+        rows = self._workbook_rows(response)
+        self.assertEqual(list(rows), ['Invoices', 'Line Items', 'Inventory'])
+        self.assertEqual(len(rows['Invoices']), 3)
+        self.assertEqual(rows['Invoices'][1][3], 'Billing')
+        self.assertEqual(len(rows['Line Items']), 7)
+        self.assertEqual(rows['Line Items'][1][2], 'Hardware › Screws › Wood')
+        self.assertEqual(rows['Line Items'][1][6:8], ('26001', 'Kitchen'))
+        self.assertEqual(rows['Line Items'][1][8], 2)
+        self.assertEqual(rows['Inventory'][1][2], 'Hardware › Screws › Wood')
+
+    def test_export_yields_bytes_before_reading_rows(self):
+        self._add_invoices(2)
+        chunks = export_invoices_workbook_chunks(chunk_size=100)
+
+        with CaptureQueriesContext(connection) as first:
+            self.assertTrue(next(chunks))
+        self.assertEqual(first.captured_queries, [])
+
+        read = []
+
+        def rows():
+            for index in range(2000):
+                read.append(index)
+                yield [index, os.urandom(32).hex()]
+
+        stream = stream_workbook([('Sheet', rows())], flush_bytes=1024)
+        next(stream)
+        next(stream)
+        self.assertLess(len(read), 2000)
+
+    def test_export_query_count_does_not_grow_with_rows(self):
+        self._add_invoices(2)
+        with CaptureQueriesContext(connection) as small:
+            write_invoices_workbook(BytesIO(), chunk_size=100)
+        self._add_invoices(20, start=2)
+        with CaptureQueriesContext(connection) as large:
+            write_invoices_workbook(BytesIO(), chunk_size=100)
+
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+
+class ProcessGmailMessageAttachmentTests(TestCase):
+    def _fake_service(self, attachment_data):
+        class FakeAttachmentExecute:
+            def execute(self_inner):
+                return {'data': attachment_data}
+
+        class FakeAttachments:
+            def get(self_inner, **kwargs):
+                return FakeAttachmentExecute()
+
+        class FakeMessages:
+            def get(self_inner, **kwargs):
+                class FakeExecute:
+                    def execute(self):
+                        return {
+                            'payload': {
+                                'headers': [
+                                    {
+                                        'name': 'From',
+                                        'value': 'No Parser Vendor <orders@noparser.example>',
+                                    },
+                                    {'name': 'Subject', 'value': 'Invoice attached'},
+                                    {'name': 'Date', 'value': 'Thu, 9 Apr 2026 12:00:00 +0000'},
+                                ],
+                                'parts': [
+                                    {
+                                        'filename': 'invoice.pdf',
+                                        'mimeType': 'application/pdf',
+                                        'body': {'attachmentId': 'att-1'},
+                                    }
+                                ],
+                            }
+                        }
+
+                return FakeExecute()
+
+            def attachments(self_inner):
+                return FakeAttachments()
+
+        class FakeUsers:
+            def messages(self_inner):
+                return FakeMessages()
+
+        class FakeService:
+            def users(self_inner):
+                return FakeUsers()
+
+        return FakeService()
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_process_gmail_message_returns_attachment_even_without_parser(self):
+        attachment_data = base64.urlsafe_b64encode(b'%PDF-1.4 fake pdf').decode('utf-8')
+        service = self._fake_service(attachment_data)
+
+        with patch('invoices.services._selected_parser_for_vendor', return_value=None):
+            result = process_gmail_message(service, 'gmail-msg-no-parser')
+
+        self.assertEqual(result['status'], 'error')
+        self.assertEqual(result['reason'], 'no parser configured')
+        self.assertIn('attachment', result)
+        self.assertEqual(result['attachment']['mimeType'], 'application/pdf')
+        self.assertTrue(result['attachment']['url'].endswith('gmail-msg-no-parser_invoice.pdf'))
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_process_gmail_message_names_attachment_with_vendor_and_job(self):
+        attachment_data = base64.urlsafe_b64encode(b'%PDF-1.4 fake pdf').decode('utf-8')
+        service = self._fake_service(attachment_data)
+
+        def fake_parser(_pdf_path):
+            return {
+                'invoice_number': 'INV-123',
+                'cust_po': 'PO-456',
+                'line_items': [{
+                    'id': 'item-1',
+                    'name': 'Parsed Item',
+                    'job_id': 'JOB-123',
+                    'job': 'Install',
+                    'qty': '1',
+                    'unit_price': 10,
+                    'total_price': 10,
+                }],
+            }
+
+        fake_parser.name = 'Parsed Vendor'
+
+        with patch('invoices.services._selected_parser_for_vendor', return_value=fake_parser):
+            result = process_gmail_message(service, 'gmail-msg-rename')
+
+        self.assertEqual(result['status'], 'processed')
+        self.assertEqual(
+            result['attachment']['filename'],
+            'gmail-msg-rename_Noparser_JOB-123_Install.pdf',
+        )
+        cache = EmailMessageCache.objects.get(email_id='gmail-msg-rename')
+        self.assertEqual(cache.attachment_filename, 'gmail-msg-rename_Noparser_JOB-123_Install.pdf')
+        self.assertEqual(cache.attachment_original_filename, 'invoice.pdf')
+        stored = StoredAttachment.objects.get(email_id='gmail-msg-rename')
+        self.assertEqual(stored.filename, 'gmail-msg-rename_Noparser_JOB-123_Install.pdf')
+        with open(blob_path(stored.sha256), 'rb') as handle:
+            self.assertEqual(handle.read(), b'%PDF-1.4 fake pdf')
+        timings = ProcessedEmail.objects.get(email_id='gmail-msg-rename').timings
+        self.assertEqual(set(timings['stages']), {'fetch', 'decode', 'parse', 'persist', 'rename'})
+        self.assertTrue(all(seconds >= 0 for seconds in timings['stages'].values()))
+        self.assertEqual(timings['parser_method'], 'fake_parser')
+        self.assertIsNone(timings['candidates_tried'])
+
+
+class AttachmentStoreTests(TestCase):
+    def test_attachment_is_decoded_in_slices_and_hashed(self):
+        import hashlib
+
+        media_dir = tempfile.mkdtemp()
+        payload_bytes = os.urandom(50_000)
+        # Gmail may omit base64 padding.
+        encoded = base64.urlsafe_b64encode(payload_bytes).decode('ascii').rstrip('=')
+        payload = {'size': len(payload_bytes), 'data': encoded}
+
+        with override_settings(MEDIA_ROOT=media_dir), \
+                patch.object(services, 'ATTACHMENT_DECODE_CHUNK', 4096):
+            stored_filename, pdf_sha256 = services._store_gmail_attachment(
+                'msg-1', {'filename': 'big scan.pdf'}, payload, services.StageTimings(),
+            )
+            path = blob_path(pdf_sha256)
+
+        self.assertEqual(stored_filename, 'msg-1_big_scan.pdf')
+        self.assertEqual(pdf_sha256, hashlib.sha256(payload_bytes).hexdigest())
+        self.assertEqual(
+            os.path.relpath(path, media_dir),
+            os.path.join('blobs', pdf_sha256[:2], pdf_sha256[2:4], f'{pdf_sha256}.pdf'),
+        )
+        with open(path, 'rb') as handle:
+            self.assertEqual(handle.read(), payload_bytes)
+        self.assertEqual(os.listdir(os.path.join(media_dir, 'blobs')), [pdf_sha256[:2]])
+        self.assertNotIn('data', payload)
+
+    def test_failed_decode_leaves_no_partial_file(self):
+        media_dir = tempfile.mkdtemp()
+
+        with override_settings(MEDIA_ROOT=media_dir), \
+                patch('invoices.attachment_store.os.fsync', side_effect=OSError('disk full')), \
+                self.assertRaises(OSError):
+            write_blob([b'%PDF-1.4 partial'])
+
+        self.assertEqual(os.listdir(os.path.join(media_dir, 'blobs')), [])
+
+    def test_resent_pdf_is_stored_once_and_renamed_in_the_database(self):
+        media_dir = tempfile.mkdtemp()
+        payload_bytes = b'%PDF-1.4 resent statement'
+        encoded = base64.urlsafe_b64encode(payload_bytes).decode('ascii')
+
+        with override_settings(MEDIA_ROOT=media_dir):
+            digests = [
+                services._store_gmail_attachment(
+                    message_id,
+                    {'filename': 'statement.pdf'},
+                    {'data': encoded},
+                    services.StageTimings(),
+                )[1]
+                for message_id in ('msg-1', 'msg-2')
+            ]
+            first = link_attachment('msg-1', 'msg-1_statement.pdf', digests[0])
+            second = link_attachment('msg-2', 'msg-2_statement.pdf', digests[1])
+            with patch('invoices.attachment_store.os.replace') as replace:
+                renamed = rename_attachment(second, 'msg-1_statement.pdf')
+            self.assertEqual(attachment_path(renamed), blob_path(digests[0]))
+            blob_files = [name for _root, _dirs, files in os.walk(media_dir) for name in files]
+
+        self.assertEqual(digests[0], digests[1])
+        self.assertEqual(blob_files, [f'{digests[0]}.pdf'])
+        replace.assert_not_called()
+        self.assertEqual(renamed, 'msg-1_statement_2.pdf')
+        self.assertEqual(first.size, len(payload_bytes))
+        self.assertEqual(link_attachment('msg-2', 'msg-2_statement.pdf', digests[1]).pk, second.pk)
+
+    def test_attachment_url_serves_the_blob_by_digest(self):
+        media_dir = tempfile.mkdtemp()
+        with override_settings(MEDIA_ROOT=media_dir):
+            sha256 = write_blob([b'%PDF-1.4 ', b'served'])
+            link_attachment(
+                'msg-1', 'msg-1_Vendor_invoice.pdf', sha256, mime_type='application/pdf'
+            )
+            link_attachment(
+                'msg-2', 'msg-2_Vendor_invoice.pdf', sha256, mime_type='application/pdf'
+            )
+            url = services.attachment_url('msg-2_Vendor_invoice.pdf', sha256)
+
+            response = self.client.get(url)
+            missing = self.client.get(services.attachment_url('msg-9_missing.pdf', 'f' * 64))
+
+            self.assertEqual(url, f'/api/attachments/{sha256}/msg-2_Vendor_invoice.pdf')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/pdf')
+            self.assertIn('msg-2_Vendor_invoice.pdf', response['Content-Disposition'])
+            self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 served')
+            self.assertEqual(missing.status_code, 404)
+        # Files saved before the store keep a /media/ URL, which is only routed in DEBUG.
+        self.assertEqual(services.attachment_url('legacy_invoice.pdf'), '/media/legacy_invoice.pdf')
+
+    def test_attachment_lookup_is_an_indexed_query_not_a_media_scan(self):
+        media_dir = tempfile.mkdtemp()
+        with override_settings(MEDIA_ROOT=media_dir):
+            sha256 = write_blob([b'%PDF-1.4 indexed'])
+            link_attachment(
+                'msg-7', 'msg-7_Vendor_invoice.pdf', sha256, original_filename='invoice.pdf'
+            )
+
+            with patch('invoices.attachment_store.os.scandir') as scandir, \
+                    patch('os.listdir') as listdir, \
+                    CaptureQueriesContext(connection) as queries:
+                found = services.attachment_info_for_message('msg-7')
+                missing = services.attachment_info_for_message('msg-8')
+
+        scandir.assert_not_called()
+        listdir.assert_not_called()
+        self.assertEqual(found['filename'], 'msg-7_Vendor_invoice.pdf')
+        self.assertEqual(found['original_filename'], 'invoice.pdf')
+        self.assertEqual(found['url'], f'/api/attachments/{sha256}/msg-7_Vendor_invoice.pdf')
+        self.assertIsNone(missing)
+        self.assertEqual(
+            EmailMessageCache.objects.get(email_id='msg-7').attachment_filename,
+            'msg-7_Vendor_invoice.pdf',
+        )
+        index_queries = [query for query in queries if 'invoices_storedattachment' in query['sql']]
+        self.assertEqual(len(index_queries), 2)
+
+    def test_backfill_command_moves_pre_store_pdfs_into_the_index(self):
+        from django.core.management import call_command
+
+        media_dir = tempfile.mkdtemp()
+        for name, content in (
+            ('msg-a_invoice.pdf', b'%PDF-1.4 a'),
+            ('msg-b_Vendor_JOB-1.pdf', b'%PDF-1.4 b'),
+            ('notes.txt', b'not a pdf'),
+        ):
+            with open(os.path.join(media_dir, name), 'wb') as handle:
+                handle.write(content)
+
+        with override_settings(MEDIA_ROOT=media_dir):
+            self.assertIsNone(services.attachment_info_for_message('msg-a'))
+            call_command('backfill_attachment_index', stdout=StringIO())
+            found = services.attachment_info_for_message('msg-a')
+            with open(attachment_path('msg-b_Vendor_JOB-1.pdf'), 'rb') as handle:
+                content = handle.read()
+            call_command('backfill_attachment_index', stdout=StringIO())
+
+        self.assertEqual(found['filename'], 'msg-a_invoice.pdf')
+        self.assertEqual(found['original_filename'], 'invoice.pdf')
+        self.assertEqual(content, b'%PDF-1.4 b')
+        self.assertEqual(sorted(os.listdir(media_dir)), ['blobs', 'notes.txt'])
+        self.assertEqual(
+            sorted(StoredAttachment.objects.values_list('email_id', 'filename')),
+            [('msg-a', 'msg-a_invoice.pdf'), ('msg-b', 'msg-b_Vendor_JOB-1.pdf')],
+        )
+
+    def test_known_digest_skips_rehashing_for_cache_key(self):
+        from ..parse_cache import parse_cache_key
+
+        pdf_path = os.path.join(settings.BASE_DIR, 'test', 'wurth2.pdf')
+        with patch('invoices.parse_cache.file_sha256') as file_sha256:
+            key = parse_cache_key(parse_wurth_invoice, pdf_path, 'a' * 64)
+
+        file_sha256.assert_not_called()
+        self.assertEqual(key['pdf_sha256'], 'a' * 64)
+
+
+class ParseResultCacheTests(TestCase):
+    def setUp(self):
+        self.pdf_path = os.path.join(settings.BASE_DIR, 'test', 'wurth2.pdf')
+
+    def test_repeated_parse_returns_cached_envelope(self):
+        from ..parse_cache import parse_with_cache
+
+        first = parse_with_cache(parse_wurth_invoice, self.pdf_path)
+        with patch('invoices.parsers.pdf.fitz.open') as mock_open:
+            second = parse_with_cache(parse_wurth_invoice, self.pdf_path)
+
+        mock_open.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(
+            first,
+            normalize_parser_output(
+                parse_wurth_invoice(self.pdf_path), vendor_name=parse_wurth_invoice.name
+            ),
+        )
+        entry = ParseResultCache.objects.get()
+        self.assertEqual(entry.parser_method, 'parse_wurth_invoice')
+        self.assertEqual(entry.hit_count, 1)
+
+    def test_parser_code_change_invalidates_cached_results(self):
+        from ..parse_cache import parse_with_cache
+
+        parse_with_cache(parse_wurth_invoice, self.pdf_path)
+        with patch('invoices.parse_cache.parser_code_version', return_value='changed'):
+            parse_with_cache(parse_wurth_invoice, self.pdf_path)
+
+        self.assertEqual(
+            list(ParseResultCache.objects.values_list('parser_version', flat=True)),
+            ['changed'],
+        )
+
+    @override_settings(PARSE_CACHE_MAX_ENTRIES=1, PARSE_CACHE_EVICT_EVERY=1)
+    def test_least_recently_used_entries_are_evicted(self):
+        from ..parse_cache import parse_with_cache
+
+        parse_with_cache(parse_wurth_invoice, self.pdf_path)
+        parse_with_cache(
+            parse_sherwin_invoice, os.path.join(settings.BASE_DIR, 'test', 'sherwin2.pdf')
+        )
+
+        self.assertEqual(
+            list(ParseResultCache.objects.values_list('parser_method', flat=True)),
+            ['parse_sherwin_invoice'],
+        )
+
+    @override_settings(PARSE_CACHE_EVICT_EVERY=3)
+    def test_eviction_runs_every_few_stores_not_on_each_one(self):
+        from ..parse_cache import parser_code_version, store_parse_result
+
+        key = {'parser_method': 'parse_wurth_invoice', 'parser_version': parser_code_version()}
+        with patch('invoices.parse_cache.evict_parse_cache') as evict:
+            store_parse_result({**key, 'pdf_sha256': 'warm'}, {'invoice_number': 'W'})
+            evict.reset_mock()
+            for index in range(6):
+                store_parse_result(
+                    {**key, 'pdf_sha256': f'{index:064d}'}, {'invoice_number': str(index)}
+                )
+
+        self.assertEqual(evict.call_count, 2)
+
+    def test_parsers_outside_the_parsers_package_are_not_cached(self):
+        from ..parse_cache import parse_with_cache
+
+        def fake_parser(_pdf_path):
+            return {'invoice_number': 'INV-1', 'line_items': []}
+
+        result = parse_with_cache(fake_parser, self.pdf_path, vendor_name='Fake Vendor')
+
+        self.assertEqual(result['vendor_name'], 'Fake Vendor')
+        self.assertFalse(ParseResultCache.objects.exists())
+
+
+class ResetInvoiceDataTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Reset Vendor', invoice_type='pdf')
+        self.contact = Contact.objects.create(
+            vendor=self.vendor,
+            name='Reset Contact',
+            email='reset@example.com',
+        )
+        self.job = Job.objects.create(
+            vendor=self.vendor,
+            job_id='job-1',
+            name='Reset Job',
+        )
+        self.item_type = ItemType.objects.create(name='Hardware')
+        self.vendor_email = VendorEmail.objects.create(
+            vendor=self.vendor,
+            email='reset@example.com',
+            is_primary=True,
+        )
+        self.email_cache = EmailMessageCache.objects.create(
+            email_id='reset-msg-1',
+            from_header='Reset Contact <reset@example.com>',
+            subject='Reset Invoice',
+            vendor=self.vendor,
+        )
+        self.automation_settings = InvoiceAutomationSettings.load()
+        self.automation_settings.auto_process_enabled = True
+        self.automation_settings.save(update_fields=['auto_process_enabled'])
+        self.processed_email = ProcessedEmail.objects.create(
+            email_id='reset-msg-1',
+            status='processed',
+            processed=timezone.now(),
+            vendor=self.vendor,
+            data={'foo': 'bar'},
+        )
+        self.invoice = Invoice.objects.create(
+            vendor=self.vendor,
+            contact=self.contact,
+            source_email_id='reset-msg-1:1',
+            status='processed',
+        )
+        self.inventory_item = InventoryItem.objects.create(
+            vendor=self.vendor,
+            item_type=self.item_type,
+            item_key='reset-item',
+            name='Reset Item',
+            current_qty=3,
+        )
+        self.line_item = LineItem.objects.create(
+            invoice=self.invoice,
+            inventory_item=self.inventory_item,
+            item_type=self.item_type,
+            job=self.job,
+            item_id='line-1',
+            name='Reset Item',
+            qty=3,
+            unit_price=10,
+            total_price=30,
+        )
+
+    @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+    def test_reset_invoice_data_clears_invoice_state_and_pdfs(self):
+        os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
+        media_pdf_path = os.path.join(settings.MEDIA_ROOT, 'reset-msg-1_invoice.pdf')
+        with open(media_pdf_path, 'wb') as handle:
+            handle.write(b'%PDF-1.4 fake reset pdf')
+        stored_blob_path = blob_path(write_blob([b'%PDF-1.4 stored reset pdf']))
+        link_attachment(
+            'reset-msg-2', 'reset-msg-2_invoice.pdf', os.path.basename(stored_blob_path)[:-4]
+        )
+
+        result = reset_invoice_data()
+
+        self.assertFalse(result['remove_all'])
+        self.assertEqual(result['deleted_counts']['email_message_cache'], 1)
+        self.assertEqual(result['deleted_counts']['processed_emails'], 1)
+        self.assertEqual(result['deleted_counts']['invoices'], 1)
+        self.assertEqual(result['deleted_counts']['inventory_items'], 1)
+        self.assertEqual(result['deleted_counts']['contacts'], 1)
+        self.assertEqual(result['deleted_counts']['jobs'], 1)
+        self.assertEqual(result['deleted_counts']['vendor_emails'], 1)
+        self.assertNotIn('vendors', result['deleted_counts'])
+        self.assertNotIn('item_types', result['deleted_counts'])
+        self.assertEqual(EmailMessageCache.objects.count(), 0)
+        self.assertEqual(ProcessedEmail.objects.count(), 0)
+        self.assertEqual(Invoice.objects.count(), 0)
+        self.assertEqual(LineItem.objects.count(), 0)
+        self.assertEqual(InventoryItem.objects.count(), 0)
+        self.assertEqual(ItemType.objects.count(), 1)
+        self.assertEqual(Contact.objects.count(), 0)
+        self.assertEqual(Job.objects.count(), 0)
+        self.assertEqual(VendorEmail.objects.count(), 0)
+        self.assertEqual(Vendor.objects.count(), 1)
+        self.assertEqual(InvoiceAutomationSettings.objects.count(), 1)
+        self.assertFalse(os.path.exists(media_pdf_path))
+        self.assertEqual(result['deleted_counts']['stored_attachments'], 1)
+        self.assertEqual(StoredAttachment.objects.count(), 0)
+        self.assertFalse(os.path.exists(stored_blob_path))
+
+    def test_reset_invoice_data_can_remove_everything(self):
+        result = reset_invoice_data(remove_all=True)
+
+        self.assertTrue(result['remove_all'])
+        self.assertEqual(result['deleted_counts']['vendors'], 1)
+        self.assertEqual(result['deleted_counts']['item_types'], 1)
+        self.assertEqual(result['deleted_counts']['automation_settings'], 1)
+        self.assertEqual(EmailMessageCache.objects.count(), 0)
+        self.assertEqual(ProcessedEmail.objects.count(), 0)
+        self.assertEqual(Invoice.objects.count(), 0)
+        self.assertEqual(LineItem.objects.count(), 0)
+        self.assertEqual(InventoryItem.objects.count(), 0)
+        self.assertEqual(Contact.objects.count(), 0)
+        self.assertEqual(Job.objects.count(), 0)
+        self.assertEqual(VendorEmail.objects.count(), 0)
+        self.assertEqual(Vendor.objects.count(), 0)
+        self.assertEqual(ItemType.objects.count(), 0)
+        self.assertEqual(InvoiceAutomationSettings.objects.count(), 0)
+
+    def test_reset_invoice_data_view_preserves_references_by_default(self):
+        response = self.client.post(
+            '/api/automation/reset-data/',
+            data=json.dumps({'remove_all': 'false'}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['remove_all'])
+        self.assertEqual(Vendor.objects.count(), 1)
+        self.assertEqual(ItemType.objects.count(), 1)
+        self.assertEqual(Contact.objects.count(), 0)
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_reset_invoice_data_view_can_remove_everything(self):
+        response = self.client.post(
+            '/api/automation/reset-data/',
+            data=json.dumps({'remove_all': True}),
+            content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['remove_all'])
+        self.assertEqual(Vendor.objects.count(), 0)
+        self.assertEqual(ItemType.objects.count(), 0)
+        self.assertEqual(InvoiceAutomationSettings.objects.count(), 0)
+
+    def test_reset_invoice_data_clears_inventory_with_out_of_range_decimals(self):
+        """Regression: qty larger than DecimalField(12,4) must not block reset."""
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO invoices_inventoryitem (
+                    vendor_id, item_key, item_id, name, description, unit,
+                    current_qty, last_unit_price, last_total_price, metadata,
+                    created_at, updated_at
+                ) VALUES (%s, %s, %s, %s, '', '', %s, 0, 0, '{}', datetime('now'), datetime('now'))
+                """,
+                [self.vendor.id, 'bad-qty', 'BAD', 'Bad Qty', '15320149005'],
+            )
+
+        reset_invoice_data()
+
+        self.assertEqual(InventoryItem.objects.count(), 0)
+        self.assertEqual(Invoice.objects.count(), 0)
+        self.assertEqual(LineItem.objects.count(), 0)
+        self.assertEqual(ProcessedEmail.objects.count(), 0)
+
+
+class AutomationSettingsTests(TestCase):
+    def test_process_pending_gmail_invoices_returns_disabled_when_toggle_is_off(self):
+        settings_obj = InvoiceAutomationSettings.load()
+        settings_obj.auto_process_enabled = False
+        settings_obj.last_processed_at = timezone.now() - timedelta(days=1)
+        settings_obj.save(update_fields=['auto_process_enabled', 'last_processed_at'])
+        original_last_processed_at = settings_obj.last_processed_at
+
+        result = process_pending_gmail_invoices()
+
+        settings_obj.refresh_from_db()
+        self.assertEqual(result, {'status': 'disabled', 'processed': 0})
+        self.assertEqual(settings_obj.last_processed_at, original_last_processed_at)
+
+    @override_settings(GMAIL_INGEST_FETCH_WORKERS=1, GMAIL_INGEST_PARSE_WORKERS=1)
+    @patch('invoices.services.get_gmail_service', return_value=object())
+    @patch('invoices.services._list_message_ids', return_value=['msg-1', 'msg-2'])
+    def test_process_pending_gmail_invoices_stops_when_disabled_mid_run(
+        self,
+        _list_message_ids,
+        _get_gmail_service,
+    ):
+        settings_obj = InvoiceAutomationSettings.load()
+        settings_obj.auto_process_enabled = True
+        settings_obj.save(update_fields=['auto_process_enabled'])
+
+        processed_messages = []
+
+        def fake_process_gmail_message(_service, message_id):
+            processed_messages.append(message_id)
+            if message_id == 'msg-1':
+                InvoiceAutomationSettings.objects.filter(pk=settings_obj.pk).update(
+                    auto_process_enabled=False
+                )
+            return {'status': 'processed'}
+
+        process = fake_process_gmail_message
+        with patch('invoices.services.process_gmail_message', side_effect=process), \
+                patch('invoices.services._current_history_id', return_value='1001'):
+            result = process_pending_gmail_invoices()
+
+        settings_obj.refresh_from_db()
+        self.assertEqual(result['status'], 'ok')
+        self.assertEqual(result['processed'], 1)
+        self.assertEqual(processed_messages, ['msg-1'])
+        self.assertFalse(settings_obj.auto_process_enabled)
+        self.assertIsNone(settings_obj.last_processed_at)
+        self.assertEqual(settings_obj.gmail_history_id, '')
+
+
+def _pipeline_gmail_message(message_id, subject=None):
+    return {
+        'id': message_id,
+        'internalDate': str(int(timezone.now().timestamp() * 1000)),
+        'payload': {
+            'headers': [
+                {'name': 'From', 'value': 'Pipeline Vendor <orders@pipeline.example>'},
+                {'name': 'Subject', 'value': subject or f'Invoice {message_id}'},
+                {'name': 'Date', 'value': 'Thu, 9 Apr 2026 12:00:00 +0000'},
+            ],
+            'parts': [{
+                'filename': 'invoice.pdf',
+                'mimeType': 'application/pdf',
+                'body': {'attachmentId': f'att-{message_id}'},
+            }],
+        },
+    }
+
+
+def _pipeline_gmail_transport(attachment_bytes, message_ids, search=None):
+    return GmailStubTransport(
+        messages=[_pipeline_gmail_message(message_id) for message_id in message_ids],
+        attachments={
+            (message_id, f'att-{message_id}'): attachment_bytes for message_id in message_ids
+        },
+        search=search,
+    )
+
+
+def _pipeline_fake_parser(_pdf_path):
+    return {
+        'invoice_number': 'PIPE-1',
+        'line_items': [
+            {'id': 'item-1', 'name': 'Widget', 'qty': '1', 'unit_price': 5, 'total_price': 5},
+        ],
+    }
+
+
+_pipeline_fake_parser.name = 'Pipeline Vendor'
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    GMAIL_INGEST_FETCH_WORKERS=3,
+    GMAIL_INGEST_PARSE_WORKERS=0,
+)
+class GmailIngestPipelineTests(TestCase):
+    def setUp(self):
+        settings_obj = InvoiceAutomationSettings.load()
+        settings_obj.auto_process_enabled = True
+        settings_obj.save(update_fields=['auto_process_enabled'])
+
+    def _run(self, message_ids, transport, parser=_pipeline_fake_parser, limit=None):
+        with patch('invoices.services.get_gmail_service', return_value=transport.service()), \
+                patch('invoices.services._list_message_ids', return_value=iter(message_ids)), \
+                patch('invoices.services.gmail_service_factory', return_value=transport.service), \
+                patch('invoices.services._selected_parser_for_vendor', return_value=parser):
+            return process_pending_gmail_invoices(limit=limit)
+
+    def test_pipeline_processes_every_pending_message(self):
+        message_ids = [f'pipe-{index}' for index in range(7)]
+        ProcessedEmail.objects.create(email_id='pipe-3', status='processed')
+
+        transport = _pipeline_gmail_transport(b'%PDF-1.4 fake pdf', message_ids)
+
+        result = self._run(message_ids, transport)
+
+        self.assertEqual(result['status'], 'ok')
+        self.assertEqual(result['processed'], 6)
+        # The profile read, one batch for the messages, then one request per attachment.
+        self.assertEqual(transport.round_trips, 2 + 6)
+        self.assertEqual(len([call for call in transport.calls if '/messages/' in call[1]]), 12)
+        self.assertEqual(
+            sorted(Invoice.objects.values_list('source_email_id', flat=True)),
+            sorted(f'{message_id}:1' for message_id in message_ids if message_id != 'pipe-3'),
+        )
+        self.assertIsNotNone(InvoiceAutomationSettings.load().last_processed_at)
+        timed = ProcessedEmail.objects.exclude(email_id='pipe-3').values_list('timings', flat=True)
+        for timings in timed:
+            self.assertEqual(
+                set(timings['stages']), {'fetch', 'decode', 'parse', 'persist', 'rename'}
+            )
+            self.assertEqual(timings['parser_method'], '_pipeline_fake_parser')
+
+    def test_pipeline_records_fetch_errors_and_keeps_going(self):
+        transport = _pipeline_gmail_transport(b'%PDF-1.4 fake pdf', ['pipe-0', 'pipe-2'])
+
+        result = self._run(['pipe-0', 'pipe-1', 'pipe-2'], transport)
+
+        self.assertEqual(result['processed'], 2)
+        failed = ProcessedEmail.objects.get(email_id='pipe-1')
+        self.assertEqual(failed.status, 'error')
+        self.assertIn('not found', failed.data['error'])
+
+    def test_pipeline_respects_limit(self):
+        message_ids = [f'pipe-{index}' for index in range(6)]
+
+        result = self._run(
+            message_ids, _pipeline_gmail_transport(b'%PDF-1.4 fake pdf', message_ids), limit=2
+        )
+
+        self.assertEqual(result['processed'], 2)
+        self.assertEqual(Invoice.objects.count(), 2)
+
+    @override_settings(GMAIL_INGEST_PARSE_WORKERS=2)
+    def test_pipeline_parses_on_process_pool(self):
+        with open(os.path.join(settings.BASE_DIR, 'test', 'wurth2.pdf'), 'rb') as handle:
+            transport = _pipeline_gmail_transport(handle.read(), ['pipe-a', 'pipe-b'])
+        expected = normalize_parser_output(
+            parse_wurth_invoice(os.path.join(settings.BASE_DIR, 'test', 'wurth2.pdf')),
+            vendor_name=parse_wurth_invoice.name,
+        )
+
+        with patch('invoices.services.parse_cache_key', return_value=None):
+            result = self._run(['pipe-a', 'pipe-b'], transport, parser=parse_wurth_invoice)
+
+        self.assertEqual(result['processed'], 2)
+        for message_result in result['results']:
+            self.assertEqual(message_result['parsed'], expected)
+
+
+def _subject_mentions_invoice(_query, message):
+    headers = message['payload']['headers']
+    subject = next(header['value'] for header in headers if header['name'] == 'Subject')
+    return 'invoice' in subject.lower()
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), GMAIL_INGEST_PARSE_WORKERS=0)
+class GmailHistorySyncTests(TestCase):
+    def setUp(self):
+        self.settings_obj = InvoiceAutomationSettings.load()
+        self.settings_obj.auto_process_enabled = True
+        self.settings_obj.save(update_fields=['auto_process_enabled'])
+        self.transport = _pipeline_gmail_transport(
+            b'%PDF-1.4 fake pdf',
+            ['old-1', 'old-2'],
+            search=_subject_mentions_invoice,
+        )
+
+    def _deliver(self, message_id, subject=None):
+        self.transport.add_message(
+            _pipeline_gmail_message(message_id, subject),
+            attachments={(message_id, f'att-{message_id}'): b'%PDF-1.4 fake pdf'},
+        )
+
+    def _run(self, limit=None):
+        service, parser = self.transport.service, _pipeline_fake_parser
+        with patch('invoices.services.get_gmail_service', return_value=service()), \
+                patch('invoices.services.gmail_service_factory', return_value=service), \
+                patch('invoices.services._selected_parser_for_vendor', return_value=parser):
+            return process_pending_gmail_invoices(limit=limit)
+
+    def _history_calls(self):
+        return [call for call in self.transport.calls if call[1].endswith('/history')]
+
+    def test_first_run_lists_full_window_and_stores_history_id(self):
+        result = self._run()
+
+        self.settings_obj.refresh_from_db()
+        self.assertEqual(result['processed'], 2)
+        self.assertEqual(self.settings_obj.gmail_history_id, str(self.transport.history_id))
+        self.assertEqual(self._history_calls(), [])
+
+    def test_later_runs_only_process_messages_added_since_history_id(self):
+        self._run()
+        self._deliver('new-1')
+        self._deliver('new-2', subject='Lunch on Friday')
+        self.transport.calls.clear()
+
+        result = self._run()
+
+        self.settings_obj.refresh_from_db()
+        self.assertEqual(result['processed'], 1)
+        self.assertEqual(
+            [item['processed_email'].email_id for item in result['results']], ['new-1']
+        )
+        self.assertFalse(ProcessedEmail.objects.filter(email_id='new-2').exists())
+        self.assertEqual(len(self._history_calls()), 1)
+        self.assertEqual(self.settings_obj.gmail_history_id, str(self.transport.history_id))
+
+    def test_incremental_run_retries_messages_reset_to_pending(self):
+        self._run()
+        ProcessedEmail.objects.filter(email_id='old-1').update(status='pending')
+        Invoice.objects.filter(source_email_id='old-1:1').delete()
+
+        result = self._run()
+
+        self.assertEqual(result['processed'], 1)
+        self.assertEqual(ProcessedEmail.objects.get(email_id='old-1').status, 'processed')
+
+    def test_incremental_run_does_not_refetch_stale_or_permanent_errors(self):
+        self._run()
+        now = timezone.now()
+        ProcessedEmail.objects.create(
+            email_id='stale-error', status='error', processed=now - timedelta(days=400),
+            data={'error': 'Gmail timed out'},
+        )
+        ProcessedEmail.objects.create(
+            email_id='no-pdf', status='error', processed=now,
+            data={'error': 'No PDF attachment found'},
+        )
+        ProcessedEmail.objects.create(
+            email_id='given-up', status='error', processed=now,
+            data={'error': 'Gmail timed out', 'attempts': MAX_MESSAGE_ATTEMPTS},
+        )
+        ProcessedEmail.objects.create(
+            email_id='transient', status='error', processed=now,
+            data={'error': 'Gmail timed out', 'attempts': 1},
+        )
+        self.transport.calls.clear()
+
+        self._run()
+
+        fetched = {
+            call[1].rsplit('/', 1)[-1] for call in self.transport.calls if '/messages/' in call[1]
+        }
+        self.assertIn('transient', fetched)
+        self.assertFalse(fetched & {'stale-error', 'no-pdf', 'given-up'})
+        self.assertEqual(ProcessedEmail.objects.get(email_id='transient').data['attempts'], 2)
+
+    def test_failed_new_message_lookup_keeps_history_id_for_next_run(self):
+        self._run()
+        self.settings_obj.refresh_from_db()
+        stored_history_id = self.settings_obj.gmail_history_id
+        self._deliver('new-1')
+        self.transport.rate_limit(1)
+
+        result = self._run()
+
+        self.settings_obj.refresh_from_db()
+        self.assertEqual(result['processed'], 0)
+        self.assertEqual(self.settings_obj.gmail_history_id, stored_history_id)
+        self.assertFalse(ProcessedEmail.objects.filter(email_id='new-1').exists())
+
+        result = self._run()
+
+        self.settings_obj.refresh_from_db()
+        self.assertEqual(
+            [item['processed_email'].email_id for item in result['results']], ['new-1']
+        )
+        self.assertEqual(self.settings_obj.gmail_history_id, str(self.transport.history_id))
+
+    def test_expired_history_falls_back_to_full_resync(self):
+        self._run()
+        self._deliver('new-1')
+        self.transport.expire_history()
+        ProcessedEmail.objects.filter(email_id='old-2').delete()
+
+        result = self._run()
+
+        self.settings_obj.refresh_from_db()
+        self.assertEqual(
+            sorted(item['processed_email'].email_id for item in result['results']),
+            ['new-1', 'old-2'],
+        )
+        self.assertEqual(self.settings_obj.gmail_history_id, str(self.transport.history_id))
+
+    def test_limited_run_keeps_previous_history_id(self):
+        self._run()
+        stored_history_id = InvoiceAutomationSettings.load().gmail_history_id
+        self._deliver('new-1')
+        self._deliver('new-2')
+
+        result = self._run(limit=1)
+
+        self.assertEqual(result['processed'], 1)
+        self.assertEqual(InvoiceAutomationSettings.load().gmail_history_id, stored_history_id)
+
+    def test_widening_the_age_window_forces_a_full_resync(self):
+        self._run()
+
+        update_automation_settings(max_email_age_days=self.settings_obj.max_email_age_days + 30)
+
+        self.assertEqual(InvoiceAutomationSettings.load().gmail_history_id, '')
+
+
+class InvoiceReceiptStatusTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(name='Receipt Vendor', invoice_type='pdf')
+        self.invoice = Invoice.objects.create(
+            vendor=self.vendor,
+            source_email_id='receipt-msg-1',
+            status='processed',
+        )
+        self.line_one = LineItem.objects.create(
+            invoice=self.invoice,
+            item_id='line-1',
+            name='Item One',
+            qty=1,
+            unit_price=10,
+            total_price=10,
+        )
+        self.line_two = LineItem.objects.create(
+            invoice=self.invoice,
+            item_id='line-2',
+            name='Item Two',
+            qty=1,
+            unit_price=20,
+            total_price=20,
+        )
+
+    def test_invoice_status_transitions_with_line_item_receipts(self):
+        response = self.client.patch(
+            f'/api/line-items/{self.line_one.id}/',
+            data=json.dumps({'received': True}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, 'partially_received')
+
+        response = self.client.patch(
+            f'/api/line-items/{self.line_two.id}/',
+            data=json.dumps({'received': True}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, 'received')
+
+    def test_invoice_status_returns_to_processed_when_no_line_items_received(self):
+        response = self.client.patch(
+            f'/api/line-items/{self.line_one.id}/',
+            data=json.dumps({'received': True}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.patch(
+            f'/api/line-items/{self.line_one.id}/',
+            data=json.dumps({'received': False}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.invoice.refresh_from_db()
+        self.assertEqual(self.invoice.status, 'processed')
+
+
+class IngestTimingTests(TestCase):
+    def _processed(self, email_id, vendor, stages, processed=None):
+        return ProcessedEmail.objects.create(
+            email_id=email_id,
+            status='processed',
+            processed=processed or timezone.now(),
+            vendor=vendor,
+            timings={
+                'stages': stages,
+                'parser_method': 'parse_wurth_invoice',
+                'candidates_tried': None,
+            },
+        )
+
+    def test_endpoint_reports_percentiles_per_stage_and_vendor(self):
+        wurth = Vendor.objects.create(name='Wurth', invoice_type='pdf')
+        sierra = Vendor.objects.create(name='Sierra', invoice_type='pdf')
+        for index in range(10):
+            self._processed(f'wurth-{index}', wurth, {'fetch': 0.1, 'parse': float(index + 1)})
+        self._processed('sierra-1', sierra, {'fetch': 0.5, 'parse': 4.0})
+        self._processed(
+            'old', sierra, {'fetch': 99.0, 'parse': 99.0},
+            processed=timezone.now() - timedelta(days=3),
+        )
+        ProcessedEmail.objects.create(
+            email_id='untimed', status='processed', processed=timezone.now()
+        )
+
+        response = self.client.get('/api/automation/ingest-timings/?hours=24')
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['messages'], 11)
+        self.assertEqual(body['stages']['parse']['count'], 11)
+        self.assertAlmostEqual(body['stages']['parse']['p50'], 5.0)
+        self.assertAlmostEqual(body['vendors']['Wurth']['parse']['p50'], 5.5)
+        self.assertAlmostEqual(body['vendors']['Wurth']['parse']['p95'], 9.55)
+        self.assertAlmostEqual(body['vendors']['Wurth']['total']['p50'], 5.6)
+        self.assertEqual(body['vendors']['Sierra']['fetch'], {'count': 1, 'p50': 0.5, 'p95': 0.5})
+
+    def test_endpoint_rejects_bad_window(self):
+        response = self.client.get('/api/automation/ingest-timings/?hours=soon')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_endpoint_rejects_non_finite_window(self):
+        for hours in ('nan', 'inf', '-inf'):
+            response = self.client.get(f'/api/automation/ingest-timings/?hours={hours}')
+
+            self.assertEqual(response.status_code, 400, hours)
+
+    def test_endpoint_clamps_huge_window(self):
+        response = self.client.get('/api/automation/ingest-timings/?hours=1e12')
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        window = parse_datetime(body['until']) - parse_datetime(body['since'])
+        self.assertEqual(window, timedelta(hours=MAX_TIMING_WINDOW_HOURS))
+
+    def test_generic_parser_reports_candidates_tried(self):
+        pdf_path = os.path.join(settings.BASE_DIR, 'test', 'wurth2.pdf')
+
+        result = normalize_parser_output(parse_generic_invoice(pdf_path), vendor_name='Generic')
+
+        self.assertGreaterEqual(result['candidates_tried'], 1)
+        self.assertNotIn('candidates_tried', normalize_parser_output(parse_wurth_invoice(pdf_path)))
+
+
+class GenericParserTests(TestCase):
+    def test_defaults_to_generic_parser_when_vendor_parser_missing(self):
+        vendor = Vendor.objects.create(name='Unknown Vendor', invoice_type='pdf')
+
+        parser = _selected_parser_for_vendor(vendor)
+
+        self.assertIsNotNone(parser)
+        self.assertEqual(parser.__name__, 'parse_generic_invoice')
+
+    def test_generic_parser_handles_fixture_pdfs(self):
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        expected_vendors = {
+            'quickbooks.pdf': 'Cache Valley Fire Protection',
+            'quickbooks2.pdf': 'Sterling Medical, LLC',
+            'generic.pdf': 'American Saw & Hammering',
+        }
+
+        for pdf_name, expected_vendor in expected_vendors.items():
+            pdf_path = os.path.join(test_dir, pdf_name)
+            raw = parse_generic_invoice(pdf_path)
+            result = normalize_parser_output(
+                raw, vendor_name=getattr(parse_generic_invoice, 'name', None)
+            )
+
+            self.assertTrue(result['invoices'], pdf_name)
+            self.assertTrue(result['invoices'][0]['line_items'], pdf_name)
+            self.assertEqual(result['vendor_name'], expected_vendor, pdf_name)
+            invoice = result['invoices'][0]
+            self.assertTrue(
+                invoice.get('invoice_number') or invoice.get('invoice_total'), pdf_name
+            )
+
+
+class ParserFingerprintTests(TestCase):
+    def test_fixture_pdfs_rank_their_vendor_parser_first(self):
+        from ..parsers.fingerprints import rank_parsers
+        from ..parsers.generic import _FINGERPRINT_INDEX
+
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        expected = {
+            'wurth6.pdf': 'parse_wurth_invoice',
+            'rugby2.pdf': 'parse_rugby_invoice',
+            'se1.pdf': 'parse_sierra_invoice',
+            'ipaco3.pdf': 'parse_ipaco_invoice',
+            'generic.pdf': 'parse_american_saw_invoice',
+        }
+
+        for pdf_name, parser_name in expected.items():
+            ranked = rank_parsers(_FINGERPRINT_INDEX, os.path.join(test_dir, pdf_name))
+            self.assertTrue(ranked, pdf_name)
+            self.assertEqual(ranked[0][0].__name__, parser_name, pdf_name)
+
+        self.assertEqual(
+            rank_parsers(_FINGERPRINT_INDEX, os.path.join(test_dir, 'quickbooks.pdf')), []
+        )
+
+    def test_generic_parser_skips_full_sweep_for_confident_match(self):
+        from ..parsers import generic
+
+        pdf_path = os.path.join(settings.BASE_DIR, 'test', 'wurth2.pdf')
+        with patch.object(
+            generic, '_best_parser_result', wraps=generic._best_parser_result
+        ) as mock_best:
+            result = parse_generic_invoice(pdf_path)
+
+        self.assertEqual(mock_best.call_count, 1)
+        self.assertEqual(list(mock_best.call_args.args[1]), [parse_wurth_invoice])
+        self.assertEqual(result['invoices'][0]['invoice_number'], '9026384419')
+
+
+def _slow_candidate_parser(pdf_path):
+    import time
+
+    time.sleep(30)
+    return {}
+
+
+def _matching_candidate_parser(pdf_path):
+    invoice = {
+        'invoice_number': 'INV-1',
+        'invoice_total': '10.00',
+        'vendor_name': 'Quick Vendor',
+        'line_items': [
+            make_line_item(item_id='A1', name='Widget', qty='1', unit_price=10, total_price=10),
+        ],
+    }
+    return invoice
+
+
+class ParallelCandidateEvaluationTests(TestCase):
+    def test_parallel_mode_skips_candidates_that_time_out(self):
+        from ..parsers.generic import _is_good_enough, _score_result
+        from ..parsers.parallel import evaluate_parsers
+
+        started = time.monotonic()
+        result, score = evaluate_parsers(
+            os.path.join(settings.BASE_DIR, 'test', 'generic.pdf'),
+            [_slow_candidate_parser, _matching_candidate_parser],
+            workers=2,
+            scorer=_score_result,
+            good_enough=lambda result: False,
+            timeout=0.5,
+        )
+
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual(result['invoices'][0]['invoice_number'], 'INV-1')
+        self.assertEqual(score, _score_result(result))
+        self.assertTrue(_is_good_enough(result))
+
+    def test_parallel_mode_returns_early_on_good_enough_result(self):
+        from ..parsers.generic import _is_good_enough, _score_result
+        from ..parsers.parallel import evaluate_parsers
+
+        started = time.monotonic()
+        result, _score = evaluate_parsers(
+            os.path.join(settings.BASE_DIR, 'test', 'generic.pdf'),
+            [_slow_candidate_parser, _matching_candidate_parser],
+            workers=2,
+            scorer=_score_result,
+            good_enough=_is_good_enough,
+        )
+
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual(result['vendor_name'], 'Quick Vendor')
+
+    def test_generic_parser_matches_sequential_output_in_parallel_mode(self):
+        pdf_path = os.path.join(settings.BASE_DIR, 'test', 'quickbooks.pdf')
+        sequential = parse_generic_invoice(pdf_path)
+
+        with patch.dict(os.environ, {'INVOICE_PARSER_WORKERS': '2'}):
+            parallel = parse_generic_invoice(pdf_path)
+
+        self.assertEqual(parallel, sequential)
+
+
+def _service_test_parser(pdf_path):
+    """Stands in for a registered parser inside forked parse-service workers."""
+    name = os.path.basename(pdf_path)
+    if name == 'slow.pdf':
+        time.sleep(30)
+    if name == 'hungry.pdf':
+        ballast = bytearray(96 * 1024 * 1024)
+        time.sleep(30)
+        return {'invoice_number': str(len(ballast)), 'line_items': []}
+    return {'invoice_number': str(os.getpid()), 'line_items': []}
+
+
+class ParseServiceTests(TestCase):
+    def _service(self, **options):
+        from ..parsers.service import ParseService
+
+        service = ParseService(**options)
+        self.addCleanup(service.shutdown)
+        return service
+
+    def test_service_matches_inline_parse(self):
+        pdf_path = os.path.join(settings.BASE_DIR, 'test', 'wurth2.pdf')
+        service = self._service(workers=1)
+
+        result = service.parse('parse_wurth_invoice', pdf_path, 'Wurth')
+
+        self.assertEqual(
+            result, normalize_parser_output(parse_wurth_invoice(pdf_path), vendor_name='Wurth')
+        )
+
+    def test_job_over_time_limit_fails_and_worker_is_replaced(self):
+        from ..parsers.service import ParseJobTimeout
+
+        with patch('invoices.parsers.wurth.parse_wurth_invoice', _service_test_parser):
+            service = self._service(workers=1, timeout=0.5)
+            started = time.monotonic()
+            with self.assertRaises(ParseJobTimeout):
+                service.parse('parse_wurth_invoice', '/tmp/slow.pdf')
+            result = service.parse('parse_wurth_invoice', '/tmp/quick.pdf')
+
+        self.assertLess(time.monotonic() - started, 20)
+        self.assertNotEqual(result['invoices'][0]['invoice_number'], str(os.getpid()))
+
+    def test_job_over_memory_limit_fails(self):
+        from ..parsers.service import ParseJobMemoryExceeded
+
+        if not os.path.exists(f'/proc/{os.getpid()}/statm'):
+            self.skipTest('resident memory is read from /proc')
+        with patch('invoices.parsers.wurth.parse_wurth_invoice', _service_test_parser):
+            service = self._service(workers=1, timeout=20, max_memory_mb=32)
+            with self.assertRaises(ParseJobMemoryExceeded):
+                service.parse('parse_wurth_invoice', '/tmp/hungry.pdf')
+
+    def test_workers_are_recycled_after_max_jobs(self):
+        with patch('invoices.parsers.wurth.parse_wurth_invoice', _service_test_parser):
+            service = self._service(workers=1, max_jobs_per_worker=2)
+            pids = [
+                service.parse(
+                    'parse_wurth_invoice', '/tmp/quick.pdf'
+                )['invoices'][0]['invoice_number']
+                for _ in range(4)
+            ]
+
+        self.assertEqual(pids[0], pids[1])
+        self.assertEqual(pids[2], pids[3])
+        self.assertNotEqual(pids[0], pids[2])
+
+    def test_ad_hoc_parsers_run_inline(self):
+        from ..parsers.service import registered_method, submit_parser
+
+        future = submit_parser(_service_test_parser, '/tmp/quick.pdf', vendor_name='Inline')
+
+        self.assertIsNone(registered_method(_service_test_parser))
+        self.assertEqual(registered_method(parse_wurth_invoice), 'parse_wurth_invoice')
+        self.assertEqual(future.result()['invoices'][0]['invoice_number'], str(os.getpid()))
+
+
+class PageParallelParsingTests(TestCase):
+    def _bundle(self, pdf_name, pages):
+        import pymupdf
+
+        source = pymupdf.open(os.path.join(settings.BASE_DIR, 'test', pdf_name))
+        bundle = pymupdf.open()
+        while len(bundle) < pages:
+            bundle.insert_pdf(source)
+        handle = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        handle.close()
+        bundle.save(handle.name)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_bundle_parsers_match_sequential_output_in_page_parallel_mode(self):
+        cases = [
+            ('wurth.pdf', parse_wurth_invoice),
+            ('rugby1.pdf', parse_rugby_invoice),
+            ('weinig1.pdf', parse_weinig_invoice),
+            ('ipaco1.pdf', parse_ipaco_invoice),
+        ]
+        for pdf_name, parser in cases:
+            pdf_path = self._bundle(pdf_name, 12)
+            sequential = parser(pdf_path)
+            with patch.dict(
+                os.environ, {'INVOICE_PAGE_WORKERS': '3', 'INVOICE_PAGE_PARALLEL_MIN_PAGES': '4'}
+            ):
+                parallel = parser(pdf_path)
+
+            self.assertEqual(parallel, sequential, pdf_name)
+
+    def test_bundle_parser_runs_inside_parallel_candidate_evaluation(self):
+        from ..parsers.generic import _score_result
+        from ..parsers.parallel import evaluate_parsers
+
+        pdf_path = self._bundle('wurth.pdf', 12)
+        expected = normalize_parser_output(
+            parse_wurth_invoice(pdf_path), vendor_name=parse_wurth_invoice.name
+        )
+        env = {
+            'INVOICE_PARSER_WORKERS': '2',
+            'INVOICE_PAGE_WORKERS': '2',
+            'INVOICE_PAGE_PARALLEL_MIN_PAGES': '4',
+        }
+        with patch.dict(os.environ, env):
+            result, _score = evaluate_parsers(
+                pdf_path,
+                [parse_wurth_invoice, parse_wurth_invoice],
+                workers=2,
+                scorer=_score_result,
+                good_enough=lambda result: False,
+            )
+
+        self.assertEqual(result, expected)
+
+    def test_worker_page_lines_are_adopted_by_the_document(self):
+        from ..parsers.pages import map_pages
+        from ..parsers.wurth import _wurth_page_invoice
+
+        pdf_path = self._bundle('wurth.pdf', 8)
+        with ParsedDocument(pdf_path) as document:
+            with patch.dict(
+                os.environ, {'INVOICE_PAGE_WORKERS': '2', 'INVOICE_PAGE_PARALLEL_MIN_PAGES': '2'}
+            ):
+                invoices = map_pages(document, _wurth_page_invoice)
+
+            self.assertEqual(len(invoices), 8)
+            self.assertTrue(all(document.has_page_lines(index) for index in range(8)))
+            with ParsedDocument(pdf_path) as fresh:
+                expected = fresh.page_lines(3)
+            with patch('invoices.parsers.pdf.fitz.Page.get_text') as get_text:
+                self.assertEqual(document.pages[3], expected)
+            get_text.assert_not_called()
+
+
+class ParsedDocumentTests(TestCase):
+    def test_parsers_accept_parsed_document_or_path(self):
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        cases = {
+            'wurth.pdf': parse_wurth_invoice,
+            'rugby3.pdf': parse_rugby_invoice,
+            'sherwin2.pdf': parse_sherwin_invoice,
+            'weinig3.pdf': parse_weinig_invoice,
+        }
+
+        for pdf_name, parser in cases.items():
+            pdf_path = os.path.join(test_dir, pdf_name)
+            with ParsedDocument(pdf_path) as document:
+                self.assertEqual(parser(document), parser(pdf_path), pdf_name)
+
+    def test_generic_parser_opens_pdf_once(self):
+        import pymupdf
+
+        pdf_path = os.path.join(settings.BASE_DIR, 'test', 'quickbooks.pdf')
+        with patch('invoices.parsers.pdf.fitz.open', wraps=pymupdf.open) as mock_open:
+            parse_generic_invoice(pdf_path)
+
+        self.assertEqual(mock_open.call_count, 1)
+
+    def test_parsers_close_documents_they_open_and_leave_callers_open(self):
+        import pymupdf
+
+        real_open = pymupdf.open
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        parsers = {
+            'ipaco1.pdf': parse_ipaco_invoice,
+            'rugby3.pdf': parse_rugby_invoice,
+            'sherwin2.pdf': parse_sherwin_invoice,
+            'wurth.pdf': parse_wurth_invoice,
+        }
+        for pdf_name, parser in parsers.items():
+            opened = []
+
+            def tracking_open(*args, **kwargs):
+                opened.append(real_open(*args, **kwargs))
+                return opened[-1]
+
+            pdf_path = os.path.join(test_dir, pdf_name)
+            with patch('invoices.parsers.pdf.fitz.open', side_effect=tracking_open):
+                parser(pdf_path)
+                self.assertTrue(opened, pdf_name)
+                self.assertTrue(all(doc.is_closed for doc in opened), pdf_name)
+
+                opened.clear()
+                with ParsedDocument(pdf_path) as document:
+                    parser(document)
+                    self.assertEqual(len(opened), 1, pdf_name)
+                    self.assertFalse(opened[0].is_closed, pdf_name)
+
+
+class CodeTableTests(TestCase):
+    def _write_pdf(self, ruled=True, table=True):
+        import pymupdf
+
+        document = pymupdf.open()
+        page = document.new_page(width=612, height=792)
+        page.insert_text((50, 60), 'Sierra Forest Products, Inc.', fontsize=14)
+        if table:
+            columns = [50, 130, 330, 390, 440, 510, 580]
+            rows = [
+                ['Code', 'Description', 'Shipped', 'Unit', 'Unit Price', 'Ext. Price'],
+                ['MAP-44', 'Maple 4/4 FAS', '120', 'BF', '4.25', '510.00'],
+                ['PLY-34', 'Birch Ply 3/4', '12', 'EA', '61.00', '732.00'],
+            ]
+            for row_index, row in enumerate(rows):
+                for column_index, cell in enumerate(row):
+                    page.insert_text(
+                        (columns[column_index] + 3, 314 + row_index * 20), cell, fontsize=9
+                    )
+            if ruled:
+                for row_index in range(len(rows) + 1):
+                    y = 300 + row_index * 20
+                    page.draw_line((columns[0], y), (columns[-1], y))
+                for x in columns:
+                    page.draw_line((x, 300), (x, 300 + len(rows) * 20))
+        handle = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        document.save(handle.name)
+        return handle.name
+
+    def test_region_starts_just_above_the_code_header(self):
+        from ..parsers.camelot_tables import code_table_regions
+
+        with ParsedDocument(self._write_pdf()) as document:
+            [(page_number, area)] = code_table_regions(document)
+        left, top, right, bottom = (float(value) for value in area.split(','))
+        self.assertEqual((page_number, left, right, bottom), (1, 0, 612, 0))
+        # The header's top edge sits just under the table's top rule (792 - 300 in PDF points).
+        self.assertAlmostEqual(top, 492, delta=4)
+
+    def test_pdf_without_code_header_never_reaches_camelot(self):
+        from ..parsers.camelot_tables import extract_code_tables
+
+        with patch('camelot.read_pdf') as read_pdf:
+            self.assertEqual(extract_code_tables(self._write_pdf(table=False)), ([], {}))
+        read_pdf.assert_not_called()
+
+    def test_lattice_hit_skips_stream(self):
+        from ..parsers.camelot_tables import _parse_camelot_code_tables, extract_code_tables
+
+        pdf_path = self._write_pdf()
+        _tables, timings = extract_code_tables(pdf_path)
+        self.assertEqual(list(timings), ['lattice'])
+        with self.assertLogs('invoices.parsers.camelot_tables', 'INFO') as logs:
+            items = _parse_camelot_code_tables(pdf_path)
+        self.assertIn('lattice', logs.output[-1])
+        self.assertEqual([(item['id'], item['qty'], item['total_price']) for item in items], [
+            ('MAP-44', '120', '510.00'),
+            ('PLY-34', '12', '732.00'),
+        ])
+
+    def test_stream_reads_unruled_table_region(self):
+        from ..parsers.camelot_tables import _parse_camelot_code_tables
+
+        items = _parse_camelot_code_tables(self._write_pdf(ruled=False))
+        self.assertEqual([item['id'] for item in items], ['MAP-44', 'PLY-34'])
+
+    def test_spent_budget_stops_reading(self):
+        from ..parsers.camelot_tables import extract_code_tables
+
+        with patch('camelot.read_pdf') as read_pdf:
+            tables, timings = extract_code_tables(self._write_pdf(), budget=0)
+        self.assertEqual((tables, list(timings)), ([], ['lattice']))
+        read_pdf.assert_not_called()
+
+    def test_word_backend_matches_camelot(self):
+        from ..parsers.camelot_tables import _parse_camelot_code_tables
+        from ..parsers.code_tables import _parse_word_code_tables
+
+        for ruled in (True, False):
+            pdf_path = self._write_pdf(ruled=ruled)
+            self.assertEqual(
+                _parse_word_code_tables(pdf_path), _parse_camelot_code_tables(pdf_path), ruled
+            )
+
+    def test_word_backend_keeps_sierra_rows_apart(self):
+        from ..parsers.code_tables import _parse_word_code_tables
+
+        items = _parse_word_code_tables(os.path.join(settings.BASE_DIR, 'test', 'se1.pdf'))
+
+        self.assertEqual([item['id'] for item in items][:3], ['59159', '43596', '79042'])
+        self.assertEqual(
+            {key: items[0][key] for key in ('qty', 'unit_price', 'total_price', 'name')},
+            {
+                'qty': '28',
+                'unit_price': '34.00 / PC',
+                'total_price': '952.00',
+                'name': '3/4" W100 White G2S PB 49"x97" Suede TSCA VI Compliant',
+            },
+        )
+
+    def test_backend_is_chosen_per_vendor(self):
+        from ..parsers import code_tables
+
+        self.assertEqual(code_tables.table_backend('sierra'), 'auto')
+        self.assertEqual(code_tables.table_backend('other'), 'camelot')
+        backends = 'sierra=camelot, other=pymupdf, bad=nope'
+        with patch.dict(os.environ, {'CODE_TABLE_BACKENDS': backends}):
+            self.assertEqual(code_tables.table_backend('sierra'), 'camelot')
+            self.assertEqual(code_tables.table_backend('other'), 'pymupdf')
+            self.assertEqual(code_tables.table_backend('bad'), 'camelot')
+
+        with patch.object(code_tables, '_parse_word_code_tables', return_value=[]), \
+                patch.object(
+                    code_tables, '_parse_camelot_code_tables', return_value=['camelot']
+                ) as camelot_mock:
+            self.assertEqual(code_tables.parse_code_tables('x.pdf', 'sierra'), ['camelot'])
+            with patch.dict(os.environ, {'CODE_TABLE_BACKENDS': 'sierra=pymupdf'}):
+                self.assertEqual(code_tables.parse_code_tables('x.pdf', 'sierra'), [])
+        camelot_mock.assert_called_once_with('x.pdf')
+
+
+class RugbyParserTests(TestCase):
+    def test_rugby_parser_handles_invoice_and_credit_memo_fixtures(self):
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        expected = {
+            'rugby1.pdf': {
+                'count': 2,
+                'numbers': {'0013160191-001', '0013165944-001'},
+                'credit_memo': False,
+            },
+            'rugby2.pdf': {
+                'count': 1,
+                'numbers': {'0013176411-001'},
+                'credit_memo': True,
+            },
+            'rugby3.pdf': {
+                'count': 3,
+                'numbers': {'0013206840-001', '0013200907-001', '0013204590-001'},
+                'credit_memo': False,
+            },
+            'rugby4.pdf': {
+                'count': 1,
+                'numbers': {'0013263145-001'},
+                'credit_memo': False,
+            },
+        }
+
+        for pdf_name, checks in expected.items():
+            pdf_path = os.path.join(test_dir, pdf_name)
+            raw = parse_rugby_invoice(pdf_path)
+            result = normalize_parser_output(
+                raw, vendor_name=getattr(parse_rugby_invoice, 'name', None)
+            )
+
+            self.assertEqual(result['vendor_name'], 'Rugby ABP - Salt Lake City', pdf_name)
+            self.assertEqual(len(result['invoices']), checks['count'], pdf_name)
+            self.assertEqual(
+                {invoice['invoice_number'] for invoice in result['invoices']},
+                checks['numbers'],
+                pdf_name,
+            )
+            for invoice in result['invoices']:
+                self.assertTrue(invoice['line_items'], pdf_name)
+                self.assertEqual(len(invoice['line_items']), 1, pdf_name)
+                self.assertTrue(invoice['cust_po'], pdf_name)
+                if checks['credit_memo']:
+                    self.assertLess(float(invoice['invoice_total']), 0, pdf_name)
+                else:
+                    self.assertGreaterEqual(float(invoice['invoice_total']), 0, pdf_name)
+
+
+class WeinigParserTests(TestCase):
+    def test_weinig_parser_handles_invoice_and_statement_fixtures(self):
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        expected = {
+            'weinig1.pdf': {
+                'vendor_name': 'Weinig Holz-Her USA, Inc.',
+                'invoice_number': '1193770',
+                'invoice_total': '621.15',
+                'item_count': 11,
+            },
+            'weinig2.pdf': {
+                'vendor_name': 'Weinig Holz-Her USA, Inc.',
+                'invoice_number': '1193770',
+                'invoice_total': '621.15',
+                'item_count': 1,
+            },
+            'weinig3.pdf': {
+                'vendor_name': 'WEINIG USA, Inc.',
+                'invoice_number': '1199657',
+                'invoice_total': '903.15',
+                'item_count': 6,
+            },
+        }
+
+        for pdf_name, checks in expected.items():
+            pdf_path = os.path.join(test_dir, pdf_name)
+            raw = parse_weinig_invoice(pdf_path)
+            result = normalize_parser_output(
+                raw, vendor_name=getattr(parse_weinig_invoice, 'name', None)
+            )
+
+            self.assertEqual(result['vendor_name'], checks['vendor_name'], pdf_name)
+            self.assertEqual(len(result['invoices']), 1, pdf_name)
+
+            invoice = result['invoices'][0]
+            self.assertEqual(invoice['invoice_number'], checks['invoice_number'], pdf_name)
+            self.assertEqual(invoice['invoice_total'], checks['invoice_total'], pdf_name)
+            self.assertTrue(invoice['line_items'], pdf_name)
+            self.assertEqual(len(invoice['line_items']), checks['item_count'], pdf_name)
+            self.assertTrue(invoice['cust_po'], pdf_name)
+
+
+class IpacoParserTests(TestCase):
+    def test_ipaco_parser_handles_invoice_and_statement_fixtures(self):
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        expected = {
+            'ipaco1.pdf': {
+                'vendor_name': 'IPACO Inc.',
+                'invoice_number': 'PS557500',
+                'invoice_total': '25.11',
+                'item_count': 2,
+            },
+            'ipaco2.pdf': {
+                'vendor_name': 'IPACO Inc.',
+                'invoice_count': 2,
+                'invoice_totals': ['45.94', '41.18'],
+            },
+            'ipaco3.pdf': {
+                'vendor_name': 'IPACO Inc.',
+                'invoice_number': 'BL95086',
+                'invoice_total': '4487.28',
+                'item_count': 2,
+            },
+            'ipaco4.pdf': {
+                'vendor_name': 'IPACO Inc.',
+                'invoice_number': 'BL95383',
+                'invoice_total': '561.18',
+                'item_count': 3,
+            },
+            'ipaco5.pdf': {
+                'vendor_name': 'IPACO Inc.',
+                'invoice_number': 'PS550499',
+                'invoice_total': '7.73',
+                'item_count': 1,
+            },
+        }
+
+        for pdf_name, checks in expected.items():
+            pdf_path = os.path.join(test_dir, pdf_name)
+            raw = parse_ipaco_invoice(pdf_path)
+            result = normalize_parser_output(
+                raw, vendor_name=getattr(parse_ipaco_invoice, 'name', None)
+            )
+
+            self.assertEqual(result['vendor_name'], checks['vendor_name'], pdf_name)
+            if 'invoice_count' in checks:
+                self.assertEqual(len(result['invoices']), checks['invoice_count'], pdf_name)
+                self.assertEqual(
+                    [invoice['invoice_total'] for invoice in result['invoices']],
+                    checks['invoice_totals'],
+                    pdf_name,
+                )
+                continue
+
+            self.assertEqual(len(result['invoices']), 1, pdf_name)
+            invoice = result['invoices'][0]
+            self.assertEqual(invoice['invoice_number'], checks['invoice_number'], pdf_name)
+            self.assertEqual(invoice['invoice_total'], checks['invoice_total'], pdf_name)
+            self.assertEqual(len(invoice['line_items']), checks['item_count'], pdf_name)
+            self.assertTrue(invoice['cust_po'], pdf_name)
+
+
+class SherwinParserTests(TestCase):
+    def test_sherwin_parser_handles_invoice_fixtures(self):
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        expected = {
+            'sherwin1.pdf': {
+                'invoice_number': '95512105181225',
+                'invoice_total': '126.51',
+                'item_count': 1,
+            },
+            'sherwin2.pdf': {
+                'invoice_number': '0260-6',
+                'invoice_total': '164.76',
+                'item_count': 2,
+            },
+            'sherwin3.pdf': {
+                'invoice_number': '08926126650126',
+                'invoice_total': '164.76',
+                'item_count': 2,
+            },
+            'sherwin4.pdf': {
+                'invoice_number': '25714126650326',
+                'invoice_total': '219.69',
+                'item_count': 2,
+            },
+            'sherwin5.pdf': {
+                'invoice_number': '36430126650526',
+                'invoice_total': '109.84',
+                'item_count': 2,
+            },
+        }
+
+        for pdf_name, checks in expected.items():
+            pdf_path = os.path.join(test_dir, pdf_name)
+            raw = parse_sherwin_invoice(pdf_path)
+            result = normalize_parser_output(
+                raw, vendor_name=getattr(parse_sherwin_invoice, 'name', None)
+            )
+
+            self.assertEqual(result['vendor_name'], 'The Sherwin-Williams Co.', pdf_name)
+            self.assertEqual(len(result['invoices']), 1, pdf_name)
+            invoice = result['invoices'][0]
+            self.assertEqual(invoice['invoice_number'], checks['invoice_number'], pdf_name)
+            self.assertEqual(invoice['invoice_total'], checks['invoice_total'], pdf_name)
+            self.assertEqual(len(invoice['line_items']), checks['item_count'], pdf_name)
+            self.assertTrue(invoice['cust_po'], pdf_name)
+
+
+class YatesParserTests(TestCase):
+    def test_yates_parser_handles_invoice_fixtures(self):
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        expected = {
+            'YATES_MOULDINGS1.pdf': {
+                'invoice_number': '5225',
+                'invoice_total': '2360.82',
+                'invoice_due_date': '04/09/2026',
+                'item_count': 1,
+            },
+            'YATES_MOULDINGS2.pdf': {
+                'invoice_number': '5270',
+                'invoice_total': '13956.00',
+                'invoice_due_date': '05/01/2026',
+                'item_count': 3,
+            },
+            'YATES_MOULDINGS3.pdf': {
+                'invoice_number': '5271',
+                'invoice_total': '7875.08',
+                'invoice_due_date': '05/01/2026',
+                'cust_po': 'FENNELL',
+                'item_count': 3,
+            },
+            'YATES_MOULDINGS4.pdf': {
+                'invoice_number': '5327',
+                'invoice_total': '22009.40',
+                'invoice_due_date': '06/05/2026',
+                'item_count': 3,
+            },
+        }
+
+        for pdf_name, checks in expected.items():
+            pdf_path = os.path.join(test_dir, pdf_name)
+            raw = parse_yates_mouldings_invoice(pdf_path)
+            result = normalize_parser_output(
+                raw,
+                vendor_name=getattr(parse_yates_mouldings_invoice, 'name', None),
+            )
+
+            self.assertEqual(result['vendor_name'], 'Yates Mouldings', pdf_name)
+            self.assertEqual(len(result['invoices']), 1, pdf_name)
+            invoice = result['invoices'][0]
+            self.assertEqual(invoice['invoice_number'], checks['invoice_number'], pdf_name)
+            self.assertEqual(invoice['invoice_total'], checks['invoice_total'], pdf_name)
+            self.assertEqual(invoice['invoice_due_date'], checks['invoice_due_date'], pdf_name)
+            self.assertEqual(len(invoice['line_items']), checks['item_count'], pdf_name)
+            if 'cust_po' in checks:
+                self.assertEqual(invoice['cust_po'], checks['cust_po'], pdf_name)
+            else:
+                self.assertFalse(invoice['cust_po'], pdf_name)
+
+
+class McMasterParserTests(TestCase):
+    def test_mcmaster_parser_handles_invoice_fixtures(self):
+        test_dir = os.path.join(settings.BASE_DIR, 'test')
+        expected = {
+            'McMaster_Carr1.PDF': {
+                'invoice_number': '62816707',
+                'invoice_total': '118.72',
+                'item_count': 2,
+            },
+            'McMaster_Carr2.PDF': {
+                'invoice_number': '63537683',
+                'invoice_total': '78.03',
+                'item_count': 4,
+            },
+            'McMaster_Carr3.PDF': {
+                'invoice_number': '64677198',
+                'invoice_total': '96.03',
+                'item_count': 4,
+            },
+            'McMaster_Carr4.PDF': {
+                'invoice_number': '65143433',
+                'invoice_total': '327.23',
+                'item_count': 1,
+            },
+            'McMaster_Carr5.PDF': {
+                'invoice_number': '7920515',
+                'invoice_total': '166.82',
+                'item_count': 2,
+            },
+        }
+
+        for pdf_name, checks in expected.items():
+            pdf_path = os.path.join(test_dir, pdf_name)
+            raw = parse_mcmaster_carr_invoice(pdf_path)
+            result = normalize_parser_output(
+                raw,
+                vendor_name=getattr(parse_mcmaster_carr_invoice, 'name', None),
+            )
+
+            self.assertEqual(result['vendor_name'], 'McMaster-Carr Supply Company', pdf_name)
+            self.assertEqual(len(result['invoices']), 1, pdf_name)
+            invoice = result['invoices'][0]
+            self.assertEqual(invoice['invoice_number'], checks['invoice_number'], pdf_name)
+            self.assertEqual(invoice['invoice_total'], checks['invoice_total'], pdf_name)
+            self.assertEqual(len(invoice['line_items']), checks['item_count'], pdf_name)
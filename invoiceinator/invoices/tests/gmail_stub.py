@@ -0,0 +1,219 @@
+"""Offline stand-in for the Gmail HTTP API.
+
+``GmailStubTransport`` is an httplib2-compatible transport that answers the
+Gmail calls this app makes (profile, history list, message list, message get,
+attachment get, and batch requests wrapping them) from in-memory data. Build a
+real client on it with ``transport.service()`` to exercise request batching
+without network access::
+
+    transport = GmailStubTransport(messages=[{'id': 'msg-1', 'payload': {...}}])
+    service = transport.service()
+    service.users().messages().get(userId='me', id='msg-1').execute()
+    transport.round_trips  # -> 1
+"""
+
+from __future__ import annotations
+
+from base64 import urlsafe_b64encode
+from email.parser import Parser
+import json
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import httplib2
+from googleapiclient.discovery import build
+
+_USER_PATH = '/gmail/v1/users/me'
+_BOUNDARY = 'gmail_stub_batch_boundary'
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 429: 'Too Many Requests'}
+
+
+class GmailStubTransport:
+    """
+    In-memory Gmail backend.
+
+    ``messages`` are Gmail message resources (each with an ``id``);
+    ``attachments`` maps ``(message_id, attachment_id)`` to raw bytes.
+    ``search(query, message)`` decides which messages a list ``q`` matches
+    (default: all). Every added message gets a new mailbox history id.
+    ``round_trips`` counts HTTP requests, ``calls`` records every API call
+    (including each call inside a batch) as ``(method, path, query)``.
+    ``rate_limit(n)`` answers the next ``n`` message gets with Gmail's 429.
+    """
+
+    def __init__(self, messages=(), attachments=None, search=None):
+        self.messages = {}
+        self.attachments = dict(attachments or {})
+        self.search = search
+        self.history_id = 1000
+        self.oldest_history_id = self.history_id
+        self.history = []
+        self.round_trips = 0
+        self.calls = []
+        self.rate_limited_gets = 0
+        self._lock = threading.Lock()
+        for message in messages:
+            self.add_message(message)
+
+    def add_message(self, message, attachments=None):
+        """Deliver ``message``; returns the history id recording its arrival."""
+        with self._lock:
+            self.history_id += 1
+            self.messages[message['id']] = message
+            self.history.append((self.history_id, message['id']))
+            self.attachments.update(attachments or {})
+            return self.history_id
+
+    def rate_limit(self, calls):
+        """Fail the next ``calls`` message gets with ``429 rateLimitExceeded``."""
+        with self._lock:
+            self.rate_limited_gets = calls
+
+    def expire_history(self):
+        """Make every history id issued so far too old for ``history.list``."""
+        with self._lock:
+            self.oldest_history_id = self.history_id
+
+    def service(self):
+        return build('gmail', 'v1', http=self, static_discovery=True, cache_discovery=False)
+
+    def request(
+        self, uri, method='GET', body=None, headers=None, redirections=None, connection_type=None
+    ):
+        with self._lock:
+            self.round_trips += 1
+        parts = urlsplit(uri)
+        if parts.path.rstrip('/').endswith('/batch') or '/batch/' in parts.path:
+            return self._batch(body, headers or {})
+        status, payload = self._dispatch(method, parts.path, parts.query)
+        return _json_response(status, payload)
+
+    def _dispatch(self, method, path, query):
+        params = parse_qs(query)
+        with self._lock:
+            self.calls.append((method, path, params))
+        segments = [segment for segment in path[len(_USER_PATH):].split('/') if segment]
+        if method != 'GET' or not path.startswith(_USER_PATH) or not segments:
+            return _error(400, f'Unsupported call {method} {path}')
+        if segments == ['profile']:
+            return 200, {'emailAddress': 'me@example.com', 'historyId': str(self.history_id)}
+        if segments == ['history']:
+            return self._history(params)
+        if segments[0] != 'messages':
+            return _error(400, f'Unsupported path {path}')
+        segments = segments[1:]
+        if not segments:
+            return self._list(params)
+        with self._lock:
+            throttled = self.rate_limited_gets > 0
+            if throttled:
+                self.rate_limited_gets -= 1
+        if throttled:
+            return 429, {'error': {
+                'code': 429,
+                'message': 'User-rate limit exceeded.',
+                'errors': [{'reason': 'rateLimitExceeded', 'message': 'User-rate limit exceeded.'}],
+            }}
+        message = self.messages.get(segments[0])
+        if message is None:
+            return _error(404, 'Requested entity was not found.')
+        if len(segments) == 1:
+            if params.get('format') == ['minimal']:
+                return 200, {
+                    key: message[key]
+                    for key in ('id', 'threadId', 'labelIds', 'snippet', 'internalDate')
+                    if key in message
+                }
+            return 200, message
+        if len(segments) == 3 and segments[1] == 'attachments':
+            data = self.attachments.get((segments[0], segments[2]))
+            if data is None:
+                return _error(404, 'Requested entity was not found.')
+            return 200, {'size': len(data), 'data': urlsafe_b64encode(data).decode('ascii')}
+        return _error(400, f'Unsupported path {path}')
+
+    def _history(self, params):
+        start = int(params.get('startHistoryId', ['0'])[0])
+        if start < self.oldest_history_id:
+            return _error(404, 'Requested entity was not found.')
+        records = [
+            {
+                'id': str(history_id),
+                'messagesAdded': [{'message': {
+                    'id': message_id,
+                    'threadId': self.messages[message_id].get('threadId', message_id),
+                }}],
+            }
+            for history_id, message_id in self.history
+            if history_id > start
+        ]
+        payload = {'historyId': str(self.history_id)}
+        if records:
+            payload['history'] = records
+        return 200, payload
+
+    def _list(self, params):
+        max_results = int(params.get('maxResults', ['100'])[0])
+        offset = int(params.get('pageToken', ['0'])[0] or 0)
+        query = params.get('q', [''])[0]
+        # Newest first, like Gmail.
+        ids = [
+            message_id
+            for message_id in reversed(list(self.messages))
+            if self.search is None or self.search(query, self.messages[message_id])
+        ]
+        page = ids[offset:offset + max_results]
+        payload = {
+            'messages': [
+                {
+                    'id': message_id,
+                    'threadId': self.messages[message_id].get('threadId', message_id),
+                }
+                for message_id in page
+            ],
+            'resultSizeEstimate': len(ids),
+        }
+        if offset + max_results < len(ids):
+            payload['nextPageToken'] = str(offset + max_results)
+        return 200, payload
+
+    def _batch(self, body, headers):
+        content_type = next(
+            (value for name, value in headers.items() if name.lower() == 'content-type'),
+            '',
+        )
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        envelope = Parser().parsestr(f'Content-Type: {content_type}\r\n\r\n{body}')
+        chunks = []
+        for part in envelope.get_payload():
+            request_line = part.get_payload().lstrip().splitlines()[0]
+            method, target, _version = request_line.split(' ', 2)
+            target_parts = urlsplit(target)
+            status, payload = self._dispatch(method, target_parts.path, target_parts.query)
+            content_id = part['Content-ID'].strip()[1:-1]
+            chunks.append(
+                f'--{_BOUNDARY}\r\n'
+                'Content-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+                'Content-Type: application/json; charset=UTF-8\r\n\r\n'
+                f'{json.dumps(payload)}\r\n'
+            )
+        content = ''.join(chunks) + f'--{_BOUNDARY}--\r\n'
+        response = httplib2.Response({
+            'status': '200',
+            'content-type': f'multipart/mixed; boundary={_BOUNDARY}',
+        })
+        return response, content.encode('utf-8')
+
+
+def _error(status, message):
+    return status, {'error': {'code': status, 'message': message}}
+
+
+def _json_response(status, payload):
+    response = httplib2.Response(
+        {'status': str(status), 'content-type': 'application/json; charset=UTF-8'}
+    )
+    return response, json.dumps(payload).encode('utf-8')
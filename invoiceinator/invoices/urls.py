@@ -1,10 +1,12 @@
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 from .views import (
     ContactViewSet,
+    attachment_file,
     InvoiceViewSet,
     InventoryItemViewSet,
     automation_settings_view,
+    ingest_timings_view,
     google_auth_status,
     google_auth_url,
     google_disconnect,
@@ -35,7 +37,9 @@ router.register(r'line-items', LineItemViewSet, basename='line-item')
 urlpatterns = [
     path('automation/settings/', automation_settings_view),
     path('automation/process-now/', process_invoices_now),
+    path('automation/ingest-timings/', ingest_timings_view),
     path('export/xlsx/', export_invoices_xlsx),
+    re_path(r'^attachments/(?P<sha256>[0-9a-f]{64})/(?P<filename>[^/]+)$', attachment_file),
     path('google/auth-url/', google_auth_url),
     path('google/callback/', google_oauth_callback, name='google_oauth_callback'),
     path('google/status/', google_auth_status),
@@ -19,6 +19,18 @@ def get_gmail_service():
     return build('gmail', 'v1', credentials=creds)
 
 
+def gmail_service_factory():
+    """
+    Return a callable that builds a new Gmail client from the stored credentials.
+
+    Gmail clients are not thread-safe, so each worker thread builds its own.
+    """
+    creds = load_credentials()
+    if not creds:
+        raise RuntimeError('Google account is not connected. Use the frontend auth button.')
+    return lambda: build('gmail', 'v1', credentials=creds)
+
+
 def get_sheets_service():
     creds = load_credentials()
     if not creds:
@@ -3,6 +3,18 @@ from rest_framework.response import Response
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from .attachment_store import attachment_path, blob_path
+from .email_metadata import (
+    SenderVendors,
+    cache_email_metadata,
+    fetch_gmail_metadata,
+    prefetch_email_metadata,
+    vendor_from_cached_sender,
+    vendor_name_from_sender,
+)
+from .inbox_search import InvalidInboxCursor, cached_inbox_page, cached_inbox_queryset
+from .ingest_timing import stage_timing_percentiles
+from .record_search import search_invoices, search_line_items
 from .utils import get_gmail_service
 from .google_oauth import (
     GoogleOAuthNotConfiguredError,
@@ -21,6 +33,7 @@ from .models import (
     Job,
     LineItem,
     ProcessedEmail,
+    StoredAttachment,
     Vendor,
     VendorEmail,
     exclude_ignored_vendor_relations,
@@ -40,7 +53,7 @@ from .services import (
     attachment_info_from_cache,
     parsed_envelope_for_process_result,
     persist_parsed_invoices,
-    export_invoices_workbook,
+    export_invoices_workbook_chunks,
     get_automation_settings,
     process_gmail_message,
     process_pending_gmail_invoices,
@@ -49,14 +62,15 @@ from .services import (
     update_automation_settings,
 )
 from django.conf import settings
-from django.http import HttpResponseRedirect, HttpResponse
+from django.http import FileResponse, Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+import math
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 import time
-import re
 import base64
 import traceback
 
@@ -66,22 +80,12 @@ GMAIL_INVOICE_QUERY = 'has:attachment invoice'
 MAX_EMAIL_PAGE_SIZE = 100
 DEFAULT_EMAIL_PAGE_SIZE = 20
 MAX_FILTER_BACKFILL_PAGES = 5
+# Longest window ingest-timings reports on; larger ``hours`` are clamped to it.
+MAX_TIMING_WINDOW_HOURS = 24 * 366
 
 # Store temporary files with their creation time
 temp_files = {}
 
-# List of email domains that require special handling (extracting name before email)
-SPECIAL_EMAIL_DOMAINS = [
-    'notification.intuit.com',
-    'billtrust.com',
-    'live.com',
-    'outlook.com',
-    'gmail.com',
-    'yahoo.com',
-    'hotmail.com',
-    'msn.com',
-]
-
 
 def get_module_functions(module_path):
     """
@@ -127,28 +131,8 @@ def cleanup_temp_files():
 
 
 
-def _extract_sender_email(from_header):
-    if not from_header:
-        return None
-    email_match = re.search(r'<(.+?)>|([^<\s]+@[^>\s]+)', from_header)
-    if not email_match:
-        return None
-    return email_match.group(1) or email_match.group(2)
-
-
-def _vendor_name_from_sender(from_header, sender_email):
-    if not sender_email:
-        return None
-    if any(sender_email.endswith(f'@{domain}') for domain in SPECIAL_EMAIL_DOMAINS):
-        name_match = re.search(r'^(.+?)\s*<', from_header or '')
-        if name_match:
-            return name_match.group(1).strip()
-    domain_match = re.search(r'@(.+?)\.[^.]+$', sender_email)
-    return domain_match.group(1).title() if domain_match else "Unknown"
-
-
 def _sync_vendor_for_sender(from_header, sender_email):
-    vendor_name = _vendor_name_from_sender(from_header, sender_email)
+    vendor_name = vendor_name_from_sender(from_header, sender_email)
     if not vendor_name:
         return vendor_name, None
     try:
@@ -251,97 +235,38 @@ def _invoice_payload_from_result(result, email_id=None):
     return invoice
 
 
-def _header_map(headers):
-    return {
-        str(header.get('name') or '').lower(): header.get('value') or ''
-        for header in headers or []
-    }
-
-
-def _count_attachment_parts(part):
-    count = 1 if part.get('filename') else 0
-    for child in part.get('parts') or []:
-        count += _count_attachment_parts(child)
-    return count
-
-
-def _vendor_from_cached_sender(from_header):
-    sender_email = _extract_sender_email(from_header)
-    if not sender_email:
-        return None, None
-    vendor_email = VendorEmail.objects.select_related('vendor').filter(email=sender_email).first()
-    if vendor_email:
-        return vendor_email.vendor.name, vendor_email.vendor_id
-    return _vendor_name_from_sender(from_header, sender_email), None
-
-
-def _vendor_is_ignored(vendor_id):
-    if not vendor_id:
-        return False
-    return Vendor.objects.filter(pk=vendor_id, ignore=True).exists()
-
-
-def _email_from_ignored_vendor(cache, processed):
+def _email_from_ignored_vendor(cache, processed, sender_vendors=None):
     """True when this Gmail message belongs to an ignored vendor."""
     if processed and processed.vendor_id:
         return bool(getattr(processed.vendor, 'ignore', False))
     if cache and cache.vendor_id:
         return bool(getattr(cache.vendor, 'ignore', False))
     from_header = cache.from_header if cache else ''
-    _, vendor_id = _vendor_from_cached_sender(from_header)
-    return _vendor_is_ignored(vendor_id)
-
-
-def _fetch_gmail_metadata(service, message_id):
-    return service.users().messages().get(
-        userId='me',
-        id=message_id,
-        format='metadata',
-        metadataHeaders=['From', 'Date', 'Subject'],
-    ).execute()
-
-
-def _cache_email_metadata(message_id, gmail_message):
-    payload = gmail_message.get('payload') or {}
-    headers = payload.get('headers') or []
-    headers_by_name = _header_map(headers)
-    from_header = headers_by_name.get('from', '')
-    vendor_name, vendor_id = _vendor_from_cached_sender(from_header)
-    cache, _created = EmailMessageCache.objects.update_or_create(
-        email_id=message_id,
-        defaults={
-            'thread_id': gmail_message.get('threadId') or '',
-            'snippet': gmail_message.get('snippet') or '',
-            'from_header': from_header,
-            'subject': headers_by_name.get('subject', ''),
-            'date_header': headers_by_name.get('date', ''),
-            'attachment_count': _count_attachment_parts(payload),
-            'vendor_id': vendor_id,
-            'raw_headers': headers_by_name,
-            'last_seen_at': timezone.now(),
-        },
-    )
-    if vendor_name and not cache.vendor_id:
-        cache._inferred_vendor_name = vendor_name
-    return cache
+    _name, _vendor_id, ignored = (sender_vendors or SenderVendors()).vendor_for(from_header)
+    return ignored
 
 
-def _email_cache_to_item(cache, processed=None):
+def _email_cache_to_item(cache, processed=None, sender_vendors=None):
     vendor_name = cache.vendor.name if cache.vendor_id else getattr(cache, '_inferred_vendor_name', '')
     vendor_id = cache.vendor_id
-    if not vendor_name:
-        vendor_name, inferred_vendor_id = _vendor_from_cached_sender(cache.from_header)
-        vendor_id = vendor_id or inferred_vendor_id
+    sender_ignored = False
+    if not cache.vendor_id:
+        inferred_name, inferred_vendor_id, sender_ignored = (
+            (sender_vendors or SenderVendors()).vendor_for(cache.from_header)
+        )
+        vendor_name = vendor_name or inferred_name
+        vendor_id = inferred_vendor_id
     if processed and processed.vendor_id:
         vendor_name = processed.vendor.name
         vendor_id = processed.vendor_id
     attachment = attachment_info_from_cache(cache)
 
-    vendor_ignored = False
     if cache.vendor_id:
         vendor_ignored = bool(getattr(cache.vendor, 'ignore', False))
-    elif vendor_id:
-        vendor_ignored = _vendor_is_ignored(vendor_id)
+    elif processed and processed.vendor_id:
+        vendor_ignored = bool(getattr(processed.vendor, 'ignore', False))
+    else:
+        vendor_ignored = sender_ignored
 
     return {
         'id': cache.email_id,
@@ -359,20 +284,60 @@ def _email_cache_to_item(cache, processed=None):
     }
 
 
-def _serialize_list_email(service, message_id, processed=None, cache=None):
+def _serialize_list_email(service, message_id, processed=None, cache=None, sender_vendors=None):
     if cache is None:
         cache = EmailMessageCache.objects.select_related('vendor').filter(email_id=message_id).first()
     if cache is None:
-        cache = _cache_email_metadata(message_id, _fetch_gmail_metadata(service, message_id))
-    return _email_cache_to_item(cache, processed=processed)
+        cache = cache_email_metadata(message_id, fetch_gmail_metadata(service, message_id), sender_vendors)
+    return _email_cache_to_item(cache, processed=processed, sender_vendors=sender_vendors)
+
+
+def _inbox_day(iso_date):
+    """Start of ``YYYY-MM-DD`` in the current time zone, or ``None``."""
+    if not iso_date:
+        return None
+    try:
+        return timezone.make_aware(datetime.strptime(iso_date[:10], '%Y-%m-%d'))
+    except ValueError:
+        return None
+
+
+def _list_cached_emails(page_size, page_token, status_filter, vendor_id, search, date_from, date_to):
+    """The inbox page answered from ``EmailMessageCache`` alone (see inbox_search.py)."""
+    try:
+        vendor_pk = int(vendor_id) if vendor_id else None
+    except (TypeError, ValueError):
+        vendor_pk = None
+    queryset = cached_inbox_queryset(
+        status=status_filter,
+        vendor_id=vendor_pk,
+        search=search,
+        received_after=_inbox_day(date_from),
+        received_before=_inbox_day(date_to),
+    )
+    try:
+        caches, next_page_token = cached_inbox_page(queryset, page_size, page_token)
+    except InvalidInboxCursor as exc:
+        return Response({'error': str(exc)}, status=400)
+
+    processed_map = ProcessedEmail.objects.filter(
+        email_id__in=[cache.email_id for cache in caches]
+    ).select_related('vendor').in_bulk(field_name='email_id')
+    sender_vendors = SenderVendors(cache.from_header for cache in caches)
+    return Response({
+        'emails': [
+            _email_cache_to_item(cache, processed=processed_map.get(cache.email_id), sender_vendors=sender_vendors)
+            for cache in caches
+        ],
+        'nextPageToken': next_page_token,
+        'pageSize': page_size,
+        'hasMore': bool(next_page_token),
+        'source': 'local',
+    })
 
 
 @api_view(['GET'])
 def list_invoice_emails(request):
-    try:
-        service = get_gmail_service()
-    except RuntimeError as exc:
-        return _google_connection_error_response(exc)
     page_token = request.GET.get('pageToken') or None
     try:
         page_size = int(request.GET.get('maxResults', DEFAULT_EMAIL_PAGE_SIZE))
@@ -389,6 +354,14 @@ def list_invoice_emails(request):
     date_from = (request.GET.get('dateFrom') or '').strip() or None
     date_to = (request.GET.get('dateTo') or '').strip() or None
 
+    source = (request.GET.get('source') or settings.INBOX_SOURCE or 'gmail').strip().lower()
+    if source == 'local':
+        return _list_cached_emails(page_size, page_token, status_filter, vendor_id, search, date_from, date_to)
+
+    try:
+        service = get_gmail_service()
+    except RuntimeError as exc:
+        return _google_connection_error_response(exc)
     gmail_query = _build_gmail_list_query(search, vendor_id, date_from, date_to)
     needs_post_filter = bool(status_filter or search or vendor_id)
 
@@ -416,11 +389,20 @@ def list_invoice_emails(request):
         cache_map = EmailMessageCache.objects.filter(email_id__in=message_ids).select_related('vendor').in_bulk(
             field_name='email_id'
         )
+        # One VendorEmail query resolves every cached sender on the page.
+        sender_vendors = SenderVendors(cache.from_header for cache in cache_map.values())
+        cache_map.update(prefetch_email_metadata(service, [
+            message_id
+            for message_id in message_ids
+            if message_id not in cache_map
+            and not _email_from_ignored_vendor(None, processed_map.get(message_id), sender_vendors)
+            and (not status_filter or _email_matches_status(processed_map.get(message_id), status_filter))
+        ], sender_vendors))
 
         for msg in messages:
             processed = processed_map.get(msg['id'])
             cache = cache_map.get(msg['id'])
-            if _email_from_ignored_vendor(cache, processed):
+            if _email_from_ignored_vendor(cache, processed, sender_vendors):
                 continue
             if status_filter:
                 if not _email_matches_status(processed, status_filter):
@@ -431,6 +413,7 @@ def list_invoice_emails(request):
                 msg['id'],
                 processed=processed,
                 cache=cache,
+                sender_vendors=sender_vendors,
             )
             if search and not _email_matches_search(item, search):
                 continue
@@ -523,7 +506,7 @@ def flag_incorrect_parsing(request):
     elif cache and cache.vendor_id:
         vendor = cache.vendor
     elif cache:
-        _, vendor_id = _vendor_from_cached_sender(cache.from_header)
+        _, vendor_id = vendor_from_cached_sender(cache.from_header)
         if vendor_id:
             vendor = Vendor.objects.filter(pk=vendor_id).first()
 
@@ -579,9 +562,8 @@ def test_parser(request):
     if not pdf_filename:
         return Response({'error': 'pdf_filename is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Construct the full path to the file in the media folder
-    media_dir = settings.MEDIA_ROOT
-    file_path = os.path.join(media_dir, pdf_filename)
+    # Resolve the attachment name to its stored blob (or a pre-store file in the media folder)
+    file_path = attachment_path(pdf_filename)
 
     # Check if the file exists
     if not os.path.exists(file_path):
@@ -601,14 +583,11 @@ def test_parser(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Run the parser and coerce to the standard invoice schema
-        from .parsers import normalize_parser_output
+        # Run the parser (or reuse a cached run on the same bytes) and coerce to
+        # the standard invoice schema
+        from .parse_cache import parse_with_cache
 
-        result = parser_func(file_path)
-        result = normalize_parser_output(
-            result,
-            vendor_name=getattr(parser_func, 'name', None),
-        )
+        result = parse_with_cache(parser_func, file_path)
 
         if isinstance(result, dict) and 'error' in result:
             raise Exception(result['error'])
@@ -766,11 +745,46 @@ def process_invoices_now(request):
         return _google_connection_error_response(exc)
 
 
+@api_view(['GET'])
+def ingest_timings_view(request):
+    """p50/p95 seconds per ingest stage and per vendor over the last ``hours`` (default 24)."""
+    try:
+        hours = float(request.query_params.get('hours', 24))
+    except (TypeError, ValueError):
+        hours = 0
+    if not math.isfinite(hours) or hours <= 0:
+        return Response({'error': 'hours must be a positive number'}, status=status.HTTP_400_BAD_REQUEST)
+    until = timezone.now()
+    since = until - timedelta(hours=min(hours, MAX_TIMING_WINDOW_HOURS))
+    return Response({'since': since, 'until': until, **stage_timing_percentiles(since, until)})
+
+
+@api_view(['GET'])
+def attachment_file(request, sha256, filename):
+    """
+    Stream the stored blob ``sha256``; ``filename`` names the download.
+
+    Served through the API so attachments get the same authentication as the
+    rest of it. The ``/media/`` fallback for files under ``MEDIA_ROOT`` is only
+    mounted in DEBUG.
+    """
+    attachments = StoredAttachment.objects.filter(sha256=sha256)
+    stored = attachments.filter(filename=filename).first() or attachments.order_by('pk').first()
+    blob = blob_path(sha256)
+    if stored is None or not os.path.exists(blob):
+        raise Http404(f'{filename} is missing from the attachment store')
+    return FileResponse(
+        open(blob, 'rb'),
+        content_type=stored.mime_type or 'application/pdf',
+        filename=stored.filename,
+    )
+
+
 @api_view(['GET'])
 def export_invoices_xlsx(request):
-    workbook_bytes = export_invoices_workbook()
-    response = HttpResponse(
-        workbook_bytes,
+    # The workbook is zipped as its rows are read, so the download starts straight away.
+    response = StreamingHttpResponse(
+        export_invoices_workbook_chunks(),
         content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
     )
     response['Content-Disposition'] = 'attachment; filename="invoiceinator-export.xlsx"'
@@ -794,22 +808,29 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     ]
 
     def get_queryset(self):
+        # A correlated count rather than Count('line_items'): without a GROUP BY the
+        # list can walk invoice_received_idx and stop after one page.
+        line_item_counts = (
+            LineItem.objects.filter(invoice=models.OuterRef('pk'))
+            .order_by()
+            .values('invoice')
+            .annotate(count=models.Count('id'))
+            .values('count')
+        )
         queryset = exclude_ignored_vendor_relations(
-            super().get_queryset().annotate(line_item_count_sort=models.Count('line_items'))
+            super().get_queryset().annotate(
+                line_item_count_sort=Coalesce(models.Subquery(line_item_counts), 0),
+            )
         )
+        ordering = ('-received_at', '-processed_at', '-id')
         query = self.request.query_params.get('q')
         if query:
-            queryset = queryset.filter(
-                models.Q(invoice_number__icontains=query)
-                | models.Q(source_email_subject__icontains=query)
-                | models.Q(source_email_from__icontains=query)
-                | models.Q(vendor__name__icontains=query)
-                | models.Q(contact__name__icontains=query)
-            )
+            queryset = search_invoices(queryset, query)
+            ordering = ('search_rank', *ordering)
         vendor_id = self.request.query_params.get('vendorId') or self.request.query_params.get('vendor_id')
         if vendor_id:
             queryset = queryset.filter(vendor_id=vendor_id)
-        return queryset.order_by('-received_at', '-processed_at', '-created_at')
+        return queryset.order_by(*ordering)
 
 
 class InventoryItemViewSet(viewsets.ModelViewSet):
@@ -843,7 +864,7 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
                 | models.Q(vendor__name__icontains=query)
                 | models.Q(item_type__name__icontains=query)
             )
-        return queryset.order_by('name', 'item_key')
+        return queryset.order_by('name', 'item_key', 'id')
 
 
 class ItemTypeViewSet(viewsets.ModelViewSet):
@@ -920,21 +941,15 @@ class LineItemViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         queryset = exclude_ignored_vendor_relations(super().get_queryset(), 'invoice__vendor')
+        ordering = ('-created_at', '-id')
         query = self.request.query_params.get('q')
         if query:
-            queryset = queryset.filter(
-                models.Q(name__icontains=query)
-                | models.Q(description__icontains=query)
-                | models.Q(item_id__icontains=query)
-                | models.Q(invoice__invoice_number__icontains=query)
-                | models.Q(item_type__name__icontains=query)
-                | models.Q(job__name__icontains=query)
-                | models.Q(job__job_id__icontains=query)
-            )
+            queryset = search_line_items(queryset, query)
+            ordering = ('search_rank', *ordering)
         inventory_item_id = self.request.query_params.get('inventory_item') or self.request.query_params.get('inventory_item_id')
         if inventory_item_id:
             queryset = queryset.filter(inventory_item_id=inventory_item_id)
-        return queryset.order_by('-created_at')
+        return queryset.order_by(*ordering)
 
     def perform_create(self, serializer):
         line_item = serializer.save()
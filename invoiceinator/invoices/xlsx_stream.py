@@ -0,0 +1,163 @@
+"""Streaming XLSX writer for the invoice export.
+
+openpyxl's write-only workbook spools every sheet to a temp file and only
+assembles the zip on ``save``, so a download cannot start until the whole
+export has been built. ``stream_workbook`` writes the zip container itself:
+each sheet is one zip entry written row by row, and its bytes are yielded as
+soon as they are compressed, so the first rows reach the client while later
+ones are still being read from the database.
+
+Cells are inline strings or numbers, which is all the export writes.
+"""
+
+from __future__ import annotations
+
+import io
+from numbers import Number
+import re
+from xml.sax.saxutils import escape, quoteattr
+import zipfile
+
+FLUSH_BYTES = 64 * 1024
+
+_XML_HEAD = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_DOC_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_SHEET_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml'
+# XML 1.0 forbids these control characters; openpyxl refuses them too.
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_STYLES_XML = (
+    f'{_XML_HEAD}<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable file that keeps what ``zipfile`` writes until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+        self.pending = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.pending += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.pending = 0
+        return data
+
+
+def column_letter(index):
+    """Spreadsheet column name for a 1-based ``index``: 1 → A, 27 → AA."""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell_xml(reference, value):
+    if value is None or value == '':
+        return ''
+    if isinstance(value, Number) and not isinstance(value, bool):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row_xml(number, values):
+    cells = ''.join(
+        _cell_xml(f'{column_letter(column)}{number}', value)
+        for column, value in enumerate(values, 1)
+    )
+    return f'<row r="{number}">{cells}</row>'.encode('utf-8')
+
+
+def _package_parts(titles):
+    sheets = range(1, len(titles) + 1)
+    content_types = (
+        f'{_XML_HEAD}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        f'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.'
+        'relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-'
+        'officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-'
+        'officedocument.spreadsheetml.styles+xml"/>'
+        + ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{index}.xml" ContentType="{_SHEET_TYPE}"/>'
+            for index in sheets
+        )
+        + '</Types>'
+    )
+    root_rels = (
+        f'{_XML_HEAD}<Relationships xmlns="{_REL_NS}">'
+        f'<Relationship Id="rId1" Type="{_DOC_REL}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    workbook = (
+        f'{_XML_HEAD}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_DOC_REL}"><sheets>'
+        + ''.join(
+            f'<sheet name={quoteattr(title)} sheetId="{index}" r:id="rId{index}"/>'
+            for index, title in zip(sheets, titles)
+        )
+        + '</sheets></workbook>'
+    )
+    workbook_rels = (
+        f'{_XML_HEAD}<Relationships xmlns="{_REL_NS}">'
+        + ''.join(
+            f'<Relationship Id="rId{index}" Type="{_DOC_REL}/worksheet" '
+            f'Target="worksheets/sheet{index}.xml"/>'
+            for index in sheets
+        )
+        + f'<Relationship Id="rId{len(titles) + 1}" Type="{_DOC_REL}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    )
+    return [
+        ('[Content_Types].xml', content_types),
+        ('_rels/.rels', root_rels),
+        ('xl/workbook.xml', workbook),
+        ('xl/_rels/workbook.xml.rels', workbook_rels),
+        ('xl/styles.xml', _STYLES_XML),
+    ]
+
+
+def stream_workbook(sheets, flush_bytes=FLUSH_BYTES):
+    """
+    Yield the bytes of an XLSX file holding ``sheets``, a list of ``(title, rows)``.
+
+    ``rows`` may be any iterable of value lists (the first is usually the
+    header) and is consumed lazily; output is yielded whenever about
+    ``flush_bytes`` of compressed data is ready.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _package_parts([title for title, _rows in sheets]):
+            archive.writestr(name, xml)
+        yield sink.drain()
+        for index, (_title, rows) in enumerate(sheets, 1):
+            with archive.open(f'xl/worksheets/sheet{index}.xml', 'w') as entry:
+                entry.write(f'{_XML_HEAD}<worksheet xmlns="{_MAIN_NS}"><sheetData>'.encode('utf-8'))
+                for number, values in enumerate(rows, 1):
+                    entry.write(_row_xml(number, values))
+                    if sink.pending >= flush_bytes:
+                        yield sink.drain()
+                entry.write(b'</sheetData></worksheet>')
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+"""Benchmark the invoice parsers over the test PDFs and gate on regressions.
+
+Runs every vendor parser on its fixtures (``PDF_PARSER_MAP`` from
+``test_parsers.py``) and ``parse_generic_invoice`` on every PDF, recording per
+parser: wall time, the part of it spent inside pymupdf / camelot (opening and
+extracting the PDF) versus parser logic, peak RSS, and ``fitz.open`` calls.
+
+    python test/bench_parsers.py                  # print the table
+    python test/bench_parsers.py --save           # write the JSON baseline
+    python test/bench_parsers.py --check          # exit 1 on a regression
+
+Each file is parsed ``--repeat`` times and the fastest run is kept. Timings are
+machine-specific: refresh the baseline with ``--save`` on the machine that runs
+``--check``, which needs at least ``MIN_CHECK_REPEAT`` runs per file.
+``INVOICE_PARSER_WORKERS`` and ``INVOICE_PAGE_WORKERS`` are forced to 0 so all
+work happens in this process and is counted.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pymupdf as fitz  # noqa: E402
+
+from invoices import parsers  # noqa: E402
+from invoices.parsers import normalize_parser_output  # noqa: E402
+from invoices.parsers.registry import GENERIC_PARSER  # noqa: E402
+
+from test_parsers import PDF_PARSER_MAP  # noqa: E402
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(TEST_DIR, "benchmarks", "parsers.json")
+DEFAULT_THRESHOLD = 0.25
+# Absolute slack so millisecond-scale parsers are not failed by timer noise.
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 16.0
+# Fewer runs per file let one lucky or unlucky run decide the gate.
+MIN_CHECK_REPEAT = 3
+
+
+class PdfProbe:
+    """Counts ``fitz.open`` calls and times pymupdf / camelot work while installed."""
+
+    def __init__(self):
+        self.opens = 0
+        self.seconds = 0.0
+        self._depth = 0
+        self._originals = []
+
+    def reset(self):
+        self.opens = 0
+        self.seconds = 0.0
+
+    def _timed(self, func, counts_open=False):
+        probe = self
+
+        def wrapper(*args, **kwargs):
+            if counts_open:
+                probe.opens += 1
+            if probe._depth:
+                return func(*args, **kwargs)
+            probe._depth += 1
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                probe.seconds += time.perf_counter() - started
+                probe._depth -= 1
+
+        return wrapper
+
+    def _patch(self, owner, name, counts_open=False):
+        original = getattr(owner, name)
+        self._originals.append((owner, name, original))
+        setattr(owner, name, self._timed(original, counts_open))
+
+    def install(self):
+        self._patch(fitz, "open", counts_open=True)
+        self._patch(fitz.Page, "get_text")
+        try:
+            import camelot
+        except ImportError:
+            pass
+        else:
+            self._patch(camelot, "read_pdf")
+
+    def uninstall(self):
+        while self._originals:
+            owner, name, original = self._originals.pop()
+            setattr(owner, name, original)
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak-RSS mark; ``False`` where that is unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as handle:
+            handle.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Linux reports ru_maxrss in KiB, macOS in bytes.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def corpus():
+    """``[(parser_name, pdf_name), ...]``: vendor fixtures, then generic over every PDF."""
+    jobs = sorted((parser_name, pdf_name) for pdf_name, parser_name in PDF_PARSER_MAP.items())
+    pdf_names = sorted(name for name in os.listdir(TEST_DIR) if name.lower().endswith(".pdf"))
+    jobs.extend((GENERIC_PARSER, pdf_name) for pdf_name in pdf_names)
+    return jobs
+
+
+def measure(parser_name, pdf_name, probe, repeat):
+    """Fastest of ``repeat`` runs of one parser on one PDF."""
+    parser = getattr(parsers, parser_name)
+    pdf_path = os.path.join(TEST_DIR, pdf_name)
+    best = None
+    for _ in range(repeat):
+        _reset_peak_rss()
+        probe.reset()
+        started = time.perf_counter()
+        normalize_parser_output(parser(pdf_path), vendor_name=getattr(parser, "name", None))
+        wall = time.perf_counter() - started
+        run = {
+            "wall_seconds": wall,
+            "pdf_seconds": min(probe.seconds, wall),
+            "parse_seconds": max(0.0, wall - probe.seconds),
+            "peak_rss_mb": _peak_rss_mb(),
+            "fitz_opens": probe.opens,
+        }
+        if best is None or run["wall_seconds"] < best["wall_seconds"]:
+            best = run
+    return {field: round(value, 6) for field, value in best.items()}
+
+
+def run_benchmark(repeat, only=None):
+    os.environ["INVOICE_PARSER_WORKERS"] = "0"
+    os.environ["INVOICE_PAGE_WORKERS"] = "0"
+    # Import every parser module (and camelot) before timing anything.
+    for parser_name in parsers.PARSER_MODULES:
+        getattr(parsers, parser_name)
+    try:
+        import camelot  # noqa: F401
+    except ImportError:
+        pass
+
+    probe = PdfProbe()
+    probe.install()
+    files = {}
+    try:
+        for parser_name, pdf_name in corpus():
+            if only and parser_name not in only:
+                continue
+            try:
+                files[f"{parser_name}/{pdf_name}"] = measure(parser_name, pdf_name, probe, repeat)
+            except Exception as exc:
+                print(f"ERROR {parser_name} {pdf_name}: {exc}", file=sys.stderr)
+    finally:
+        probe.uninstall()
+
+    totals = {}
+    for key, run in files.items():
+        parser_name = key.split("/", 1)[0]
+        total = totals.setdefault(parser_name, {
+            "files": 0,
+            "wall_seconds": 0.0,
+            "pdf_seconds": 0.0,
+            "parse_seconds": 0.0,
+            "peak_rss_mb": 0.0,
+            "fitz_opens": 0,
+        })
+        total["files"] += 1
+        for field in ("wall_seconds", "pdf_seconds", "parse_seconds", "fitz_opens"):
+            total[field] += run[field]
+        total["peak_rss_mb"] = max(total["peak_rss_mb"], run["peak_rss_mb"])
+    for total in totals.values():
+        for field in ("wall_seconds", "pdf_seconds", "parse_seconds"):
+            total[field] = round(total[field], 6)
+
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "repeat": repeat,
+        "parsers": totals,
+        "files": files,
+    }
+
+
+def regressions(current, baseline, threshold):
+    """Human-readable regressions of ``current`` against ``baseline``, per parser."""
+    found = []
+    for parser_name, now in sorted(current["parsers"].items()):
+        before = baseline.get("parsers", {}).get(parser_name)
+        if not before or before["files"] != now["files"]:
+            continue
+        slacks = (("wall_seconds", MIN_SECONDS_DELTA), ("peak_rss_mb", MIN_RSS_DELTA_MB))
+        for field, slack in slacks:
+            if now[field] > before[field] * (1 + threshold) and now[field] - before[field] > slack:
+                found.append(f"{parser_name}: {field} {before[field]:.3f} -> {now[field]:.3f}")
+        if now["fitz_opens"] > before["fitz_opens"]:
+            found.append(f"{parser_name}: fitz_opens {before['fitz_opens']} -> {now['fitz_opens']}")
+    return found
+
+
+def print_report(result, baseline=None):
+    previous = (baseline or {}).get("parsers", {})
+    print(
+        f"{'parser':<38} {'files':>5} {'wall s':>8} {'pdf s':>8} {'logic s':>8} "
+        f"{'peak MB':>8} {'opens':>6} {'vs base':>8}"
+    )
+    for parser_name, total in sorted(result["parsers"].items()):
+        before = previous.get(parser_name)
+        change = ""
+        if before and before["wall_seconds"]:
+            change = f"{(total['wall_seconds'] / before['wall_seconds'] - 1) * 100:+.0f}%"
+        print(
+            f"{parser_name:<38} {total['files']:>5} {total['wall_seconds']:>8.3f} "
+            f"{total['pdf_seconds']:>8.3f} {total['parse_seconds']:>8.3f} "
+            f"{total['peak_rss_mb']:>8.1f} {total['fitz_opens']:>6} {change:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--repeat", type=int, default=MIN_CHECK_REPEAT, help="runs per file; the fastest is kept",
+    )
+    parser.add_argument(
+        "--parser", action="append", dest="only", help="limit to this parser (repeatable)",
+    )
+    parser.add_argument(
+        "--save", nargs="?", const=DEFAULT_BASELINE, help="write results as the JSON baseline",
+    )
+    parser.add_argument(
+        "--check", nargs="?", const=DEFAULT_BASELINE, help="fail on regressions against a baseline",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed fractional slowdown",
+    )
+    args = parser.parse_args()
+
+    if (args.check or args.save) and args.repeat < MIN_CHECK_REPEAT:
+        parser.error(f"--check and --save need --repeat {MIN_CHECK_REPEAT} or more")
+
+    baseline = None
+    if args.check:
+        with open(args.check) as handle:
+            baseline = json.load(handle)
+
+    result = run_benchmark(max(1, args.repeat), only=set(args.only or ()))
+    print_report(result, baseline)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as handle:
+            json.dump(result, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        print(f"\nBaseline written to {args.save}")
+
+    if baseline is not None:
+        found = regressions(result, baseline, args.threshold)
+        print()
+        if found:
+            print(f"Regressions beyond {args.threshold:.0%}:")
+            for line in found:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.check}")
+
+
+if __name__ == "__main__":
+    main()